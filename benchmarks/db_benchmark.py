@@ -0,0 +1,286 @@
+"""
+Бенчмарк функцій db_manager на локальному PostgreSQL.
+
+Заповнює базу синтетичними даними заданого обсягу та вимірює пропускну здатність і затримку
+(p50/p95/p99) функцій db_manager за заданої кількості одночасних запитів. Результати зберігаються
+у JSON, щоб порівнювати їх між комітами.
+
+УВАГА: --seed очищує таблиці employees, equipment, equipment_movements та equipment_movement_daily у базі з config.py.
+Запускайте лише на окремій локальній базі для бенчмарків.
+
+Запуск:
+    python benchmarks/db_benchmark.py --seed --equipment 10000 --movements 1000000 --employees 5000
+    python benchmarks/db_benchmark.py --concurrency 16 --requests 2000 --output results.json
+    python benchmarks/db_benchmark.py compare old.json new.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_manager
+from config import LOCATIONS, STATUS_LIST
+from models import EquipmentMovement
+
+# Назви сценаріїв бенчмарку (див. build_scenarios)
+SCENARIOS = ("get_all_equipment", "get_all_equipment_uncached", "get_equipment_by_id",
+             "get_responsible_employee_for_equipment", "insert_equipment_movement", "get_all_equipment_movements")
+
+# SQL-запити для заповнення бази синтетичними даними
+truncate_query = """
+TRUNCATE equipment_movements, equipment_movement_daily, equipment, employees RESTART IDENTITY CASCADE;
+"""
+
+seed_employees_query = """
+INSERT INTO employees (telegram_id, telegram_username, first_name, last_name, role, contact_number, email, location)
+SELECT 1000000 + g, 'user' || g, 'Ім''я ' || g, 'Прізвище ' || g, 'Інженер', '+380' || lpad(g::text, 9, '0'),
+       'user' || g || '@example.com', 'Офіс'
+FROM generate_series(1, $1) AS g;
+"""
+
+seed_equipment_query = """
+INSERT INTO equipment (name, description, location, status, responsible_person_id)
+SELECT 'Обладнання ' || g, 'Опис обладнання ' || g,
+       ($2::text[])[1 + g % array_length($2::text[], 1)],
+       ($3::text[])[1 + g % array_length($3::text[], 1)],
+       1 + g % $4
+FROM generate_series(1, $1) AS g;
+"""
+
+seed_movements_query = """
+INSERT INTO equipment_movements (equipment_id, from_location, to_location, movement_date)
+SELECT 1 + g % $2,
+       ($3::text[])[1 + g % array_length($3::text[], 1)],
+       ($3::text[])[1 + (g + 1) % array_length($3::text[], 1)],
+       CURRENT_TIMESTAMP - make_interval(secs => $1 - g)
+FROM generate_series(1, $1) AS g;
+"""
+
+
+async def seed(equipment_count: int, movements_count: int, employees_count: int):
+    """
+    Очищує таблиці та заповнює їх синтетичними даними.
+
+    :param equipment_count: Кількість одиниць обладнання.
+    :param movements_count: Кількість рухів обладнання.
+    :param employees_count: Кількість працівників.
+    """
+    async with db_manager.acquire() as conn:
+        started = time.perf_counter()
+        await conn.execute(truncate_query)
+        await conn.execute(seed_employees_query, employees_count)
+        await conn.execute(seed_equipment_query, equipment_count, list(LOCATIONS), list(STATUS_LIST),
+                           employees_count)
+        await conn.execute(seed_movements_query, movements_count, equipment_count, list(LOCATIONS))
+        await conn.execute("ANALYZE;")
+        print(f"Базу заповнено за {time.perf_counter() - started:.1f} с: {employees_count} працівників, "
+              f"{equipment_count} обладнання, {movements_count} рухів")
+    db_manager.invalidate_employee_cache()
+    db_manager.equipment_catalogue.invalidate()
+
+
+def build_scenarios(equipment_count: int):
+    """
+    Описує сценарії бенчмарку: назва -> (асинхронна функція однієї операції, чи є сценарій важким).
+
+    :param equipment_count: Кількість обладнання в базі (для вибору випадкових ID).
+    :return: Словник сценаріїв.
+    """
+    def random_id():
+        return random.randint(1, equipment_count)
+
+    async def get_all_equipment_cached():
+        await db_manager.get_all_equipment()
+
+    async def get_all_equipment_uncached():
+        # Скидаємо кеш каталогу, щоб виміряти сам запит до БД
+        db_manager.equipment_catalogue.invalidate()
+        await db_manager.get_all_equipment()
+
+    async def get_equipment_by_id():
+        await db_manager.get_equipment_by_id(random_id())
+
+    async def get_responsible_employee_for_equipment():
+        await db_manager.get_responsible_employee_for_equipment(random_id())
+
+    async def insert_equipment_movement():
+        await db_manager.insert_equipment_movement(EquipmentMovement(
+            equipment_id=random_id(), from_location=random.choice(LOCATIONS), to_location=random.choice(LOCATIONS),
+            movement_date=datetime.now(timezone.utc)))
+
+    async def get_all_equipment_movements():
+        await db_manager.get_all_equipment_movements()
+
+    return {
+        "get_all_equipment": (get_all_equipment_cached, False),
+        "get_all_equipment_uncached": (get_all_equipment_uncached, True),
+        "get_equipment_by_id": (get_equipment_by_id, False),
+        "get_responsible_employee_for_equipment": (get_responsible_employee_for_equipment, False),
+        "insert_equipment_movement": (insert_equipment_movement, False),
+        "get_all_equipment_movements": (get_all_equipment_movements, True),
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """
+    Обчислює перцентиль методом найближчого рангу.
+
+    :param sorted_values: Відсортований список значень.
+    :param q: Перцентиль від 0 до 100.
+    :return: Значення перцентиля, або 0 для порожнього списку.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(operation, requests: int, concurrency: int) -> dict:
+    """
+    Виконує операцію задану кількість разів із заданою кількістю одночасних виконавців.
+
+    :param operation: Асинхронна функція однієї операції.
+    :param requests: Загальна кількість операцій.
+    :param concurrency: Кількість одночасних виконавців.
+    :return: Словник з результатами вимірювання.
+    """
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args):
+    await db_manager.init_pool()
+    try:
+        await db_manager.apply_migrations()
+        if args.seed:
+            await seed(args.equipment, args.movements, args.employees)
+
+        async with db_manager.acquire() as conn:
+            equipment_count = await conn.fetchval("SELECT COUNT(*) FROM equipment;")
+        if not equipment_count:
+            raise SystemExit("Таблиця equipment порожня - запустіть бенчмарк з --seed")
+
+        scenarios = build_scenarios(equipment_count)
+        selected = args.scenario or list(scenarios)
+        results = {}
+        for name in selected:
+            operation, heavy = scenarios[name]
+            requests = args.heavy_requests if heavy else args.requests
+            # Прогрів: кеш запитів asyncpg, підключення пулу, кеш каталогу
+            await run_scenario(operation, min(requests, args.concurrency), args.concurrency)
+            results[name] = await run_scenario(operation, requests, args.concurrency)
+            result = results[name]
+            print(f"{name:<40}{result['throughput_rps']:>10.1f} оп/с   p50 {result['p50_ms']:>9.2f}   "
+                  f"p95 {result['p95_ms']:>9.2f}   p99 {result['p99_ms']:>9.2f} мс   помилок {result['errors']}")
+    finally:
+        await db_manager.close_pool()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "settings": {"concurrency": args.concurrency, "requests": args.requests,
+                     "heavy_requests": args.heavy_requests, "equipment": equipment_count},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"Результати збережено у {args.output}")
+
+
+def compare(old_path: str, new_path: str):
+    """
+    Порівнює два файли результатів і виводить зміну пропускної здатності та p95 для кожного сценарію.
+
+    :param old_path: Файл результатів "до".
+    :param new_path: Файл результатів "після".
+    """
+    with open(old_path, encoding="utf-8") as file:
+        old = json.load(file)
+    with open(new_path, encoding="utf-8") as file:
+        new = json.load(file)
+
+    print(f"{'сценарій':<40}{'оп/с':>24}{'p95 мс':>24}")
+    print(f"{'':<40}{old.get('commit') or '?':>11} -> {new.get('commit') or '?':<10}")
+    for name, new_result in new["results"].items():
+        old_result = old["results"].get(name)
+        if old_result is None:
+            continue
+
+        def change(key):
+            before, after = old_result[key], new_result[key]
+            percent = (after - before) / before * 100 if before else 0.0
+            return f"{before:.1f} -> {after:.1f} ({percent:+.0f}%)"
+
+        print(f"{name:<40}{change('throughput_rps'):>24}{change('p95_ms'):>24}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(description="Порівняння результатів бенчмарку")
+        parser.add_argument("command")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        args = parser.parse_args()
+        compare(args.old, args.new)
+        return
+
+    parser = argparse.ArgumentParser(description="Бенчмарк функцій db_manager на локальному PostgreSQL")
+    parser.add_argument("--seed", action="store_true", help="очистити таблиці та заповнити їх синтетичними даними")
+    parser.add_argument("--equipment", type=int, default=10000, help="кількість обладнання для --seed")
+    parser.add_argument("--movements", type=int, default=1000000, help="кількість рухів для --seed")
+    parser.add_argument("--employees", type=int, default=5000, help="кількість працівників для --seed")
+    parser.add_argument("--concurrency", type=int, default=8, help="кількість одночасних запитів")
+    parser.add_argument("--requests", type=int, default=1000, help="кількість операцій у легких сценаріях")
+    parser.add_argument("--heavy-requests", type=int, default=5,
+                        help="кількість операцій у важких сценаріях (повне читання таблиць)")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="запустити лише вказані сценарії (можна повторювати)")
+    parser.add_argument("--output", default="bench_results.json", help="файл для результатів у форматі JSON")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
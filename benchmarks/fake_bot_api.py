@@ -0,0 +1,193 @@
+"""
+Локальний фейковий сервер Telegram Bot API для навантажувального тестування бота.
+
+Реалізує getMe, getUpdates (long polling), sendMessage, editMessageText, answerCallbackQuery та
+службові методи; решта методів відповідає успіхом. Оновлення додаються через push_update(),
+а вихідні виклики бота рахуються за методами.
+
+Окремий запуск (бот запускається окремо з TELEGRAM_BASE_URL = 'http://127.0.0.1:8081/bot'):
+    python benchmarks/fake_bot_api.py --port 8081
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl
+
+# Методи, що надсилають або змінюють повідомлення (вважаються відповіддю бота користувачу)
+REPLY_METHODS = {"sendMessage", "editMessageText", "editMessageReplyMarkup", "sendDocument"}
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot",
+            "can_join_groups": False, "can_read_all_group_messages": False, "supports_inline_queries": True}
+
+
+class FakeBotApi:
+    def __init__(self):
+        self.calls = Counter()
+        self._updates = []
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_updates = asyncio.Condition()
+        self._reply_waiters = defaultdict(list)
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081):
+        """
+        Запускає HTTP-сервер.
+
+        :param host: Адреса прослуховування.
+        :param port: Порт (0 - будь-який вільний).
+        :return: Базова адреса Bot API для Application.builder().base_url().
+        """
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{port}/bot"
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def reset_counters(self):
+        self.calls.clear()
+
+    async def push_update(self, update: dict) -> int:
+        """
+        Додає оновлення в чергу getUpdates.
+
+        :param update: Оновлення без update_id.
+        :return: Присвоєний update_id.
+        """
+        update_id = next(self._update_ids)
+        self._updates.append({"update_id": update_id, **update})
+        async with self._new_updates:
+            self._new_updates.notify_all()
+        return update_id
+
+    def expect_reply(self, chat_id: int) -> asyncio.Future:
+        """
+        Повертає Future, що завершиться при наступному повідомленні бота в цей чат.
+
+        :param chat_id: ID чату.
+        :return: Future з назвою методу Bot API, яким бот відповів.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._reply_waiters[chat_id].append(future)
+        return future
+
+    def next_message_id(self) -> int:
+        return next(self._message_ids)
+
+    def _notify_reply(self, chat_id, method: str):
+        waiters = self._reply_waiters.pop(chat_id, [])
+        for future in waiters:
+            if not future.done():
+                future.set_result(method)
+
+    def _message(self, chat_id, text: str = None) -> dict:
+        return {"message_id": self.next_message_id(), "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "from": BOT_USER, "text": text or ""}
+
+    async def _get_updates(self, params: dict):
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        limit = int(params.get("limit") or 100)
+        # Підтверджені оновлення (з id менше offset) більше не потрібні
+        if offset:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if timeout:
+            async with self._new_updates:
+                if not self._updates:
+                    try:
+                        await asyncio.wait_for(self._new_updates.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+        return self._updates[:limit]
+
+    async def _dispatch(self, method: str, params: dict):
+        self.calls[method] += 1
+        if method == "getMe":
+            return BOT_USER
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method in REPLY_METHODS:
+            chat_id = params.get("chat_id")
+            chat_id = int(chat_id) if chat_id is not None else None
+            self._notify_reply(chat_id, method)
+            if method == "sendDocument":
+                return self._message(chat_id)
+            return self._message(chat_id, params.get("text"))
+        return True
+
+    @staticmethod
+    def _parse_params(headers: dict, body: bytes) -> dict:
+        content_type = headers.get("content-type", "")
+        if not body:
+            return {}
+        if content_type.startswith("application/json"):
+            return json.loads(body)
+        if content_type.startswith("multipart/form-data"):
+            # Для файлів достатньо простих текстових полів
+            fields = re.findall(rb'name="([^"]+)"\r\n\r\n([^\r]*)\r\n', body)
+            return {name.decode(): value.decode("utf-8", "replace") for name, value in fields}
+        params = {}
+        for name, value in parse_qsl(body.decode("utf-8")):
+            # python-telegram-bot кодує складні значення як JSON-рядки
+            try:
+                params[name] = json.loads(value)
+            except ValueError:
+                params[name] = value
+        return params
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            # З'єднання keep-alive: обробляємо запити, доки клієнт його не закриє
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+                path = request_line.decode("latin-1").split()[1]
+                method = path.rstrip("/").rsplit("/", 1)[-1]
+                result = await self._dispatch(method, self._parse_params(headers, body))
+                payload = json.dumps({"ok": True, "result": result}, ensure_ascii=False).encode("utf-8")
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             + f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Фейковий сервер Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    server = FakeBotApi()
+    base_url = await server.start(args.host, args.port)
+    print(f"Фейковий Bot API слухає {base_url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(dict(server.calls))
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
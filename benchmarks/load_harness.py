@@ -0,0 +1,201 @@
+"""
+Наскрізний навантажувальний тест бота з фейковим Telegram Bot API.
+
+Запускає фейковий Bot API, бота з equipment_telegram.build_application(), спрямованого на нього,
+та багато імітованих користувачів, що надсилають /equipment, /movements і натискання кнопок
+переміщення/зміни статусу. Для кожного сценарію звітує затримку від надсилання оновлення до
+відповіді бота (p50/p95/p99), пропускну здатність та кількість викликів Bot API за методами.
+
+Бот працює зі сховищем з config.py; імітовані користувачі мають Telegram ID, починаючи з --user-id-base
+(1000001 збігається з працівниками, створеними benchmarks/db_benchmark.py --seed).
+З --storage memory бот працює зі сховищем у пам'яті, заповненим працівниками для всіх імітованих
+користувачів та --max-equipment-id одиницями обладнання, - так вимірюються самі обробники без бази даних.
+
+Запуск:
+    python benchmarks/load_harness.py --users 200 --updates 5000 --output load_results.json
+    python benchmarks/load_harness.py --storage memory --no-rate-limit --users 200 --updates 20000
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_bot_api import FakeBotApi
+from db_benchmark import percentile, git_commit
+
+import equipment_telegram
+from memory_storage import MemoryStorage
+from callbacks import encode_callback, MOVE_TO, STATUS_TO
+from config import LOCATIONS, STATUS_LIST
+
+SCENARIOS = ("equipment", "movements", "move", "status", "mixed")
+
+_callback_ids = itertools.count(1)
+
+
+def user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+
+
+def command_update(user_id: int, command: str) -> dict:
+    return {"message": {"message_id": 1, "date": int(time.time()), "chat": {"id": user_id, "type": "private"},
+                        "from": user(user_id), "text": command,
+                        "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}]}}
+
+
+def callback_update(user_id: int, data: str) -> dict:
+    return {"callback_query": {"id": str(next(_callback_ids)), "from": user(user_id), "chat_instance": str(user_id),
+                               "data": data,
+                               "message": {"message_id": 1, "date": int(time.time()),
+                                           "chat": {"id": user_id, "type": "private"},
+                                           "from": {"id": 1, "is_bot": True, "first_name": "FakeBot"},
+                                           "text": "Список обладнання"}}}
+
+
+def make_update(scenario: str, user_id: int, max_equipment_id: int) -> dict:
+    if scenario == "mixed":
+        scenario = random.choice(SCENARIOS[:-1])
+    if scenario == "equipment":
+        return command_update(user_id, "/equipment")
+    if scenario == "movements":
+        return command_update(user_id, "/movements")
+    equipment_id = random.randint(1, max_equipment_id)
+    if scenario == "move":
+        return callback_update(user_id, encode_callback(MOVE_TO, equipment_id, random.randrange(len(LOCATIONS))))
+    return callback_update(user_id, encode_callback(STATUS_TO, equipment_id, random.randrange(len(STATUS_LIST))))
+
+
+async def run_scenario(server: FakeBotApi, scenario: str, args) -> dict:
+    """
+    Виконує один сценарій: кожен імітований користувач надсилає оновлення по одному й чекає відповіді бота.
+
+    :param server: Фейковий Bot API.
+    :param scenario: Назва сценарію.
+    :param args: Аргументи командного рядка.
+    :return: Словник з результатами.
+    """
+    server.reset_counters()
+    latencies = []
+    timeouts = 0
+    remaining = iter(range(args.updates))
+
+    async def simulated_user(user_id: int):
+        nonlocal timeouts
+        for _ in remaining:
+            reply = server.expect_reply(user_id)
+            started = time.perf_counter()
+            await server.push_update(make_update(scenario, user_id, args.max_equipment_id))
+            try:
+                await asyncio.wait_for(reply, args.reply_timeout)
+                latencies.append(time.perf_counter() - started)
+            except asyncio.TimeoutError:
+                timeouts += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(simulated_user(args.user_id_base + index) for index in range(args.users)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "updates": args.updates,
+        "users": args.users,
+        "replies": len(latencies),
+        "timeouts": timeouts,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ups": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "api_calls": dict(server.calls),
+    }
+
+
+async def seed_memory_storage(storage: MemoryStorage, args):
+    """
+    Заповнює сховище в пам'яті працівниками для імітованих користувачів та обладнанням для кнопок.
+
+    :param storage: Порожнє сховище в пам'яті.
+    :param args: Аргументи командного рядка.
+    """
+    employees = [(index, args.user_id_base + index, f"user{index}", f"Ім'я {index}", f"Прізвище {index}",
+                  "Інженер", f"+380{index:09d}", f"user{index}@example.com", "Офіс")
+                 for index in range(args.users)]
+    await storage.bulk_upsert_employees(employees)
+    equipment = [(equipment_id, equipment_id, f"Обладнання {equipment_id}", None,
+                  LOCATIONS[equipment_id % len(LOCATIONS)], STATUS_LIST[0],
+                  args.user_id_base + equipment_id % args.users)
+                 for equipment_id in range(1, args.max_equipment_id + 1)]
+    await storage.bulk_upsert_equipment(equipment)
+
+
+async def run(args):
+    server = FakeBotApi()
+    base_url = await server.start(args.host, args.port)
+    storage = None
+    if args.storage == "memory":
+        storage = MemoryStorage()
+        await seed_memory_storage(storage, args)
+    # Фоновий обробник сповіщень теж надсилає sendMessage, і ці виклики рахувались би як відповіді на оновлення
+    application = equipment_telegram.build_application(base_url=base_url, rate_limited=not args.no_rate_limit,
+                                                       storage=storage, notifications=False)
+
+    # Запуск бота вручну (як у run_polling, але в нашому циклі подій)
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    await application.updater.start_polling(poll_interval=0.0, timeout=1)
+
+    results = {}
+    try:
+        for scenario in args.scenario or SCENARIOS:
+            results[scenario] = result = await run_scenario(server, scenario, args)
+            print(f"{scenario:<12}{result['throughput_ups']:>9.1f} онов/с   p50 {result['p50_ms']:>8.1f}   "
+                  f"p95 {result['p95_ms']:>8.1f}   p99 {result['p99_ms']:>8.1f} мс   "
+                  f"без відповіді {result['timeouts']}   виклики API {result['api_calls']}")
+    finally:
+        await application.updater.stop()
+        await application.stop()
+        await application.post_shutdown(application)
+        await application.shutdown()
+        await server.stop()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "settings": {"users": args.users, "updates": args.updates, "rate_limited": not args.no_rate_limit,
+                     "storage": args.storage},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"Результати збережено у {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Наскрізний навантажувальний тест бота з фейковим Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="порт фейкового Bot API (0 - будь-який вільний)")
+    parser.add_argument("--users", type=int, default=100, help="кількість імітованих користувачів")
+    parser.add_argument("--updates", type=int, default=2000, help="кількість оновлень у кожному сценарії")
+    parser.add_argument("--user-id-base", type=int, default=1000001, help="Telegram ID першого користувача")
+    parser.add_argument("--max-equipment-id", type=int, default=100, help="найбільший ID обладнання для кнопок")
+    parser.add_argument("--reply-timeout", type=float, default=10.0, help="час очікування відповіді бота (с)")
+    parser.add_argument("--no-rate-limit", action="store_true",
+                        help="вимкнути обмеження частоти вихідних запитів (вимірювати лише сам бот)")
+    parser.add_argument("--storage", choices=("config", "memory"), default="config",
+                        help="сховище бота: з config.py або в пам'яті (без бази даних)")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="запустити лише вказані сценарії")
+    parser.add_argument("--output", default="load_results.json", help="файл для результатів у форматі JSON")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
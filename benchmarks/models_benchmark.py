@@ -0,0 +1,120 @@
+"""
+Мікробенчмарк моделей: час створення об'єктів з рядків запиту та пам'ять на один об'єкт.
+
+Порівнює попередні моделі на основі __dict__, що створювались через Model(**row),
+з поточними моделями на __slots__, що створюються через Model.from_record(row).
+
+Запуск: python benchmarks/models_benchmark.py [--count 100000]
+"""
+import argparse
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Employee, Equipment, EquipmentMovement
+
+
+# Попередні моделі (на основі __dict__) для порівняння
+class DictEquipment:
+    def __init__(self, id, name, description, location, status, responsible_person_id):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.location = location
+        self.status = status
+        self.responsible_person_id = responsible_person_id
+
+
+class DictEmployee:
+    def __init__(self, id, telegram_id, telegram_username, first_name, last_name, role, contact_number, email,
+                 location):
+        self.id = id
+        self.telegram_id = telegram_id
+        self.telegram_username = telegram_username
+        self.first_name = first_name
+        self.last_name = last_name
+        self.role = role
+        self.contact_number = contact_number
+        self.email = email
+        self.location = location
+
+
+class DictEquipmentMovement:
+    def __init__(self, equipment_id, from_location, to_location, movement_date, id=None):
+        self.id = id
+        self.equipment_id = equipment_id
+        self.from_location = from_location
+        self.to_location = to_location
+        self.movement_date = movement_date
+
+
+# Імітація asyncpg Record: доступ за позицією (кортеж) та за назвою колонки (словник для Model(**row))
+def make_rows(count: int):
+    now = datetime.now(timezone.utc)
+    equipment_columns = ("id", "name", "description", "location", "status", "responsible_person_id")
+    employee_columns = ("id", "telegram_id", "telegram_username", "first_name", "last_name", "role",
+                        "contact_number", "email", "location")
+    movement_columns = ("id", "equipment_id", "from_location", "to_location", "movement_date")
+
+    equipment = [(i, f"Обладнання {i}", "Опис", "Інженерна кімната", "Доступний", i % 50) for i in range(count)]
+    employees = [(i, 100000 + i, f"user{i}", "Ім'я", "Прізвище", "Інженер", "+380000000000", "mail@example.com",
+                  "Офіс") for i in range(count)]
+    movements = [(i, i % 300, "Аудиторія 3.333", "Виробнича зона", now) for i in range(count)]
+    return {
+        "Equipment": (equipment, [dict(zip(equipment_columns, row)) for row in equipment]),
+        "Employee": (employees, [dict(zip(employee_columns, row)) for row in employees]),
+        "EquipmentMovement": (movements, [dict(zip(movement_columns, row)) for row in movements]),
+    }
+
+
+MODELS = {
+    "Equipment": (DictEquipment, Equipment),
+    "Employee": (DictEmployee, Employee),
+    "EquipmentMovement": (DictEquipmentMovement, EquipmentMovement),
+}
+
+
+def measure_memory(build) -> float:
+    """
+    Вимірює середню кількість байтів на один створений об'єкт.
+
+    :param build: Функція без аргументів, що повертає список об'єктів.
+    :return: Байтів на об'єкт.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Список, що тримає об'єкти, не враховуємо
+    return (after - before - sys.getsizeof(objects)) / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Мікробенчмарк створення моделей")
+    parser.add_argument("--count", type=int, default=100000, help="кількість рядків")
+    parser.add_argument("--repeat", type=int, default=5, help="кількість повторів вимірювання часу")
+    args = parser.parse_args()
+
+    rows = make_rows(args.count)
+    print(f"{'модель':<20}{'варіант':<26}{'мкс/об.':>10}{'байт/об.':>11}")
+    for name, (old_model, new_model) in MODELS.items():
+        tuples, dicts = rows[name]
+        variants = (
+            ("__dict__, Model(**row)", lambda: [old_model(**row) for row in dicts]),
+            ("__slots__, from_record", lambda: [new_model.from_record(row) for row in tuples]),
+        )
+        for label, build in variants:
+            seconds = min(timeit.repeat(build, number=1, repeat=args.repeat))
+            memory = measure_memory(build)
+            print(f"{name:<20}{label:<26}{seconds / args.count * 1e6:>10.3f}{memory:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
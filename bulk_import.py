@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import csv
+import io
+
+from config import LOCATIONS, STATUS_LIST
+from db_manager import init_pool, close_pool
+from models import Employee, Equipment
+from storage import PostgresStorage
+
+# Обов'язкові колонки CSV-файлів для імпорту
+EMPLOYEE_COLUMNS = ("telegram_id", "telegram_username", "first_name", "last_name", "role", "contact_number", "email",
+                    "location")
+EQUIPMENT_COLUMNS = ("name", "description", "location", "status")
+
+
+def _required(row: dict, column: str) -> str:
+    value = (row.get(column) or "").strip()
+    if not value:
+        raise ValueError(f"порожнє поле {column}")
+    return value
+
+
+def _optional_int(row: dict, column: str):
+    value = (row.get(column) or "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"поле {column} має бути цілим числом: {value}")
+
+
+def validate_employee_row(row: dict) -> Employee:
+    """
+    Перевіряє рядок CSV з працівником.
+
+    :param row: Словник колонка -> значення.
+    :return: Об'єкт Employee (без id).
+    :raises ValueError: Якщо рядок некоректний.
+    """
+    telegram_id = _optional_int(row, "telegram_id")
+    if telegram_id is None:
+        raise ValueError("порожнє поле telegram_id")
+    return Employee(id=None, telegram_id=telegram_id,
+                    telegram_username=_required(row, "telegram_username").lstrip("@"),
+                    first_name=_required(row, "first_name"), last_name=_required(row, "last_name"),
+                    role=_required(row, "role"), contact_number=_required(row, "contact_number"),
+                    email=_required(row, "email"), location=_required(row, "location"))
+
+
+def validate_equipment_row(row: dict) -> tuple:
+    """
+    Перевіряє рядок CSV з обладнанням.
+
+    :param row: Словник колонка -> значення (id та responsible_telegram_id необов'язкові).
+    :return: Кортеж (Equipment, telegram_id відповідального або None).
+    :raises ValueError: Якщо рядок некоректний.
+    """
+    location = _required(row, "location")
+    if location not in LOCATIONS:
+        raise ValueError(f"невідома локація: {location}")
+    status = _required(row, "status")
+    if status not in STATUS_LIST:
+        raise ValueError(f"невідомий статус: {status}")
+    equipment = Equipment(id=_optional_int(row, "id"), name=_required(row, "name"),
+                          description=(row.get("description") or "").strip() or None,
+                          location=location, status=status, responsible_person_id=None)
+    return equipment, _optional_int(row, "responsible_telegram_id")
+
+
+def parse_employees_csv(text: str) -> tuple:
+    """
+    Розбирає та перевіряє CSV з працівниками.
+
+    :param text: Вміст CSV-файлу.
+    :return: Кортеж (записи для bulk_upsert_employees, список пар (номер рядка, текст помилки)).
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in EMPLOYEE_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        return [], [(1, f"відсутні колонки: {', '.join(missing)}")]
+
+    records, errors, seen = [], [], {}
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            employee = validate_employee_row(row)
+        except ValueError as e:
+            errors.append((line_number, str(e)))
+            continue
+        if employee.telegram_id in seen:
+            errors.append((line_number, f"telegram_id {employee.telegram_id} вже є в рядку {seen[employee.telegram_id]}"))
+            continue
+        seen[employee.telegram_id] = line_number
+        records.append((line_number, employee.telegram_id, employee.telegram_username, employee.first_name,
+                        employee.last_name, employee.role, employee.contact_number, employee.email,
+                        employee.location))
+    return records, errors
+
+
+def parse_equipment_csv(text: str) -> tuple:
+    """
+    Розбирає та перевіряє CSV з обладнанням.
+
+    :param text: Вміст CSV-файлу.
+    :return: Кортеж (записи для bulk_upsert_equipment, список пар (номер рядка, текст помилки)).
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in EQUIPMENT_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        return [], [(1, f"відсутні колонки: {', '.join(missing)}")]
+
+    records, errors, seen = [], [], {}
+    for line_number, row in enumerate(reader, start=2):
+        try:
+            equipment, responsible_telegram_id = validate_equipment_row(row)
+        except ValueError as e:
+            errors.append((line_number, str(e)))
+            continue
+        if equipment.id is not None:
+            if equipment.id in seen:
+                errors.append((line_number, f"id {equipment.id} вже є в рядку {seen[equipment.id]}"))
+                continue
+            seen[equipment.id] = line_number
+        records.append((line_number, equipment.id, equipment.name, equipment.description, equipment.location,
+                        equipment.status, responsible_telegram_id))
+    return records, errors
+
+
+async def import_csv(storage, kind: str, text: str) -> tuple:
+    """
+    Імпортує працівників або обладнання з CSV; некоректні рядки пропускаються, решта імпортується.
+
+    :param storage: Сховище даних (storage.Storage), у яке імпортуються записи.
+    :param kind: "employees" або "equipment".
+    :param text: Вміст CSV-файлу.
+    :return: Кортеж (кількість імпортованих рядків, відсортований список пар (номер рядка, текст помилки)).
+    """
+    if kind == "employees":
+        records, errors = parse_employees_csv(text)
+        imported = await storage.bulk_upsert_employees(records)
+    else:
+        records, errors = parse_equipment_csv(text)
+        imported, db_errors = await storage.bulk_upsert_equipment(records)
+        errors += db_errors
+    return imported, sorted(errors)
+
+
+def format_import_report(imported: int, errors: list, limit: int = 20) -> str:
+    """
+    Формує текстовий звіт про імпорт.
+
+    :param imported: Кількість імпортованих рядків.
+    :param errors: Список пар (номер рядка, текст помилки).
+    :param limit: Максимальна кількість помилок у звіті.
+    :return: Текст звіту.
+    """
+    report = f"Імпортовано рядків: {imported}\nПомилок: {len(errors)}"
+    for line_number, message in errors[:limit]:
+        report += f"\nРядок {line_number}: {message}"
+    if len(errors) > limit:
+        report += f"\n... та ще {len(errors) - limit}"
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Масовий імпорт працівників або обладнання з CSV")
+    parser.add_argument("kind", choices=("employees", "equipment"), help="що імпортувати")
+    parser.add_argument("path", help="шлях до CSV-файлу (UTF-8)")
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8-sig") as file:
+        text = file.read()
+
+    await init_pool()
+    try:
+        imported, errors = await import_csv(PostgresStorage(), args.kind, text)
+        print(format_import_report(imported, errors, limit=len(errors)))
+    finally:
+        await close_pool()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
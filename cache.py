@@ -0,0 +1,202 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+# Виняток для запитів, що чекали на завантаження, скасоване разом із запитом, який його виконував
+class _LoadCancelled(Exception):
+    pass
+
+
+# Асинхронний кеш з обмеженим розміром (LRU), часом життя записів (TTL) та об'єднанням одночасних промахів
+class AsyncTTLCache:
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float = None):
+        """
+        Ініціалізація кешу.
+
+        :param max_size: Максимальна кількість записів; найдавніше використані записи витісняються першими.
+        :param ttl: Час життя знайденого значення в секундах.
+        :param negative_ttl: Час життя порожнього результату (None) в секундах; 0 - не кешувати порожні результати.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._entries = OrderedDict()  # ключ -> (час закінчення дії, значення)
+        self._pending = {}  # ключ -> Future завантаження, що виконується
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key, loader):
+        """
+        Повертає значення з кешу або завантажує його через loader.
+
+        Одночасні запити того самого відсутнього ключа чекають на одне завантаження.
+
+        :param key: Ключ кешу.
+        :param loader: Асинхронна функція, що приймає ключ і повертає значення (або None).
+        :return: Значення з кешу або результат loader.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except _LoadCancelled:
+                # Сам цей запит не скасовано: завантажуємо знову (або чекаємо на нове спільне завантаження)
+                return await self.get_or_load(key, loader)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await loader(key)
+        except asyncio.CancelledError:
+            future.set_exception(_LoadCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Позначаємо виняток як отриманий, навіть якщо ніхто інший не чекав на це завантаження
+            future.exception()
+            raise
+        finally:
+            # Якщо ключ інвалідовано під час завантаження, результат не зберігається
+            still_current = self._pending.get(key) is future
+            if still_current:
+                del self._pending[key]
+
+        future.set_result(value)
+        if still_current:
+            self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        """
+        Видаляє запис з кешу.
+
+        :param key: Ключ, який потрібно видалити; None - очистити весь кеш.
+        """
+        if key is None:
+            self._entries.clear()
+            self._pending.clear()
+        else:
+            self._entries.pop(key, None)
+            self._pending.pop(key, None)
+
+    def stats(self) -> dict:
+        """
+        Повертає лічильники роботи кешу.
+
+        :return: Словник із кількістю влучань, промахів, об'єднаних запитів, витіснень та поточним розміром.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+
+# Кеш одного значення з номером версії: будь-який запис у БД або інвалідовує його, або оновлює на місці
+class VersionedCache:
+    def __init__(self, max_age: float = None):
+        """
+        Ініціалізація порожнього кешу.
+
+        :param max_age: Найбільший вік значення в секундах, після якого воно завантажується заново
+                        (обмежує час, протягом якого не видно змін з інших процесів); None - без обмеження.
+        """
+        self.version = 0
+        self.max_age = max_age
+        self._value = None
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, loader):
+        """
+        Повертає закешоване значення або завантажує його через loader (одночасні промахи чекають на одне завантаження).
+
+        :param loader: Асинхронна функція без аргументів, що повертає нове значення.
+        :return: Значення кешу.
+        """
+        if self._fresh():
+            self.hits += 1
+            return self._value
+        async with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            version = self.version
+            loaded_at = time.monotonic()
+            value = await loader()
+            # Якщо під час завантаження кеш було інвалідовано, значення могло застаріти - не зберігаємо його
+            if version == self.version:
+                self._value = value
+                self._loaded = True
+                self._loaded_at = loaded_at
+            return value
+
+    def _fresh(self) -> bool:
+        if not self._loaded:
+            return False
+        return self.max_age is None or time.monotonic() - self._loaded_at < self.max_age
+
+    def update(self, patch):
+        """
+        Оновлює закешоване значення на місці.
+
+        :param patch: Функція, що приймає поточне значення і повертає оновлене.
+        """
+        self.version += 1
+        if self._loaded:
+            self._value = patch(self._value)
+
+    def invalidate(self):
+        """
+        Скидає закешоване значення; наступне звернення завантажить його заново.
+        """
+        self.version += 1
+        self.invalidations += 1
+        self._value = None
+        self._loaded = False
+
+    def stats(self) -> dict:
+        """
+        Повертає лічильники роботи кешу.
+
+        :return: Словник із версією, кількістю влучань, промахів та інвалідацій.
+        """
+        return {
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "loaded": self._loaded,
+        }
@@ -0,0 +1,107 @@
+from config import LOCATIONS, STATUS_LIST
+
+# Версія формату callback_data; стара кнопка з іншою версією розпізнається за префіксом
+CALLBACK_VERSION = "1"
+
+# Максимальний розмір callback_data, дозволений Telegram (у байтах UTF-8)
+CALLBACK_DATA_LIMIT = 64
+
+# Коди дій для callback_data
+MOVE = "m"  # вибір локації для переміщення: (id обладнання)
+MOVE_TO = "l"  # переміщення на локацію: (id обладнання, індекс у LOCATIONS)
+STATUS = "s"  # вибір статусу: (id обладнання)
+STATUS_TO = "t"  # встановлення статусу: (id обладнання, індекс у STATUS_LIST)
+EQUIPMENT_PAGE = "e"  # сторінка списку обладнання: (номер сторінки)
+MOVEMENTS_OLDER = "o"  # старіші рухи обладнання: (мікросекунди з 1970 року, id руху)
+MOVEMENTS_NEWER = "w"  # новіші рухи обладнання: (мікросекунди з 1970 року, id руху)
+SELECT_MODE = "x"  # увімкнення режиму вибору кількох одиниць: (номер сторінки)
+SELECT_CANCEL = "q"  # вимкнення режиму вибору: (номер сторінки)
+TOGGLE = "c"  # позначка/зняття позначки з обладнання: (id обладнання, номер сторінки)
+BULK_MOVE = "b"  # вибір локації для вибраного обладнання: ()
+BULK_MOVE_TO = "L"  # переміщення вибраного обладнання: (індекс у LOCATIONS)
+BULK_STATUS = "S"  # вибір статусу для вибраного обладнання: ()
+BULK_STATUS_TO = "T"  # встановлення статусу вибраного обладнання: (індекс у STATUS_LIST)
+RESERVATION_CANCEL = "r"  # скасування власного бронювання: (id бронювання)
+
+# Аргументи кожної дії: довжина списку, що індексується аргументом, або None для ID, номерів сторінок тощо
+CALLBACK_ARGS = {
+    MOVE: (None,),
+    MOVE_TO: (None, len(LOCATIONS)),
+    STATUS: (None,),
+    STATUS_TO: (None, len(STATUS_LIST)),
+    EQUIPMENT_PAGE: (None,),
+    MOVEMENTS_OLDER: (None, None),
+    MOVEMENTS_NEWER: (None, None),
+    SELECT_MODE: (None,),
+    SELECT_CANCEL: (None,),
+    TOGGLE: (None, None),
+    BULK_MOVE: (),
+    BULK_MOVE_TO: (len(LOCATIONS),),
+    BULK_STATUS: (),
+    BULK_STATUS_TO: (len(STATUS_LIST),),
+    RESERVATION_CANCEL: (None,),
+}
+
+
+def encode_callback(action: str, *args: int) -> str:
+    """
+    Кодує дію та її цілочисельні аргументи в компактний рядок callback_data.
+
+    Приклад: encode_callback(MOVE_TO, 42, 3) -> "1l:42:3".
+
+    :param action: Код дії.
+    :param args: Цілочисельні аргументи дії (ID, індекси в LOCATIONS/STATUS_LIST тощо).
+    :return: Рядок callback_data.
+    """
+    data = CALLBACK_VERSION + action + "".join(f":{int(arg)}" for arg in args)
+    if len(data.encode("utf-8")) > CALLBACK_DATA_LIMIT:
+        raise ValueError(f"callback_data довша за {CALLBACK_DATA_LIMIT} байт: {data}")
+    return data
+
+
+def _decode_legacy_callback(data: str):
+    # Формати кнопок, надісланих до появи версіонованого формату
+    parts = data.split("_", 3)
+    if data.startswith("movee_to_") and len(parts) == 4 and parts[3] in LOCATIONS:
+        return MOVE_TO, (int(parts[2]), LOCATIONS.index(parts[3]))
+    if data.startswith("update_status_") and len(parts) == 4 and parts[3] in STATUS_LIST:
+        return STATUS_TO, (int(parts[2]), STATUS_LIST.index(parts[3]))
+    if data.startswith("upd_status_") and len(parts) == 3:
+        return STATUS, (int(parts[2]),)
+    if data.startswith("move_") and len(parts) == 2:
+        return MOVE, (int(parts[1]),)
+    if data.startswith("eqpage_") and len(parts) == 2:
+        return EQUIPMENT_PAGE, (int(parts[1]),)
+    if data.startswith("mvpage_") and len(parts) == 4:
+        action = MOVEMENTS_OLDER if parts[1] == "n" else MOVEMENTS_NEWER
+        return action, (int(parts[2]), int(parts[3]))
+    return None
+
+
+def _valid_args(action: str, args: tuple) -> bool:
+    # Кількість аргументів має відповідати дії, а всі аргументи - бути невід'ємними та в межах списків
+    limits = CALLBACK_ARGS.get(action)
+    if limits is None or len(args) != len(limits):
+        return False
+    return all(arg >= 0 and (limit is None or arg < limit) for arg, limit in zip(args, limits))
+
+
+def decode_callback(data: str):
+    """
+    Розбирає callback_data у код дії та аргументи.
+
+    :param data: Рядок callback_data з натиснутої кнопки.
+    :return: Кортеж (код дії, кортеж цілочисельних аргументів), або None, якщо формат невідомий,
+             дія не існує або її аргументи не відповідають дії (кількість, межі індексів).
+    """
+    try:
+        if data.startswith(CALLBACK_VERSION) and len(data) > 1 and not data[1].isdigit():
+            action, *args = data[1:].split(":")
+            decoded = action, tuple(int(arg) for arg in args)
+        else:
+            decoded = _decode_legacy_callback(data)
+    except ValueError:
+        return None
+    if decoded is None or not _valid_args(*decoded):
+        return None
+    return decoded
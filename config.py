@@ -3,4 +3,114 @@ API_TELEGRAM_TOKEN = 'YOUR_TELEGRAM_BOT_TOKEN_HERE'
 DB_USER = 'DB_USER'
 DB_PASSWORD = 'DB_PASSWORD'
 DB_NAME = 'DB_NAME'
-DB_HOST = 'DB_HOST'
\ No newline at end of file
+DB_HOST = 'DB_HOST'
+
+# Локації та статуси обладнання (у callback_data кнопок передаються їхні індекси, тож нові значення додаються в кінець)
+LOCATIONS = "Аудиторія 3.333", "Інженерна кімната", "Co-working-зона", "Виробнича зона", "Ремонтна майстерня", "Внутрішній дворик"
+
+STATUS_LIST = "Доступний", "Зайнятий"
+
+# Налаштування пулу підключень до бази даних
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 10
+DB_POOL_ACQUIRE_TIMEOUT = 10  # секунди очікування вільного підключення
+DB_STATEMENT_CACHE_SIZE = 100
+
+# Кількість рухів обладнання на одній сторінці /movements
+MOVEMENTS_PAGE_SIZE = 10
+
+# Кеш перевірки працівників за Telegram ID
+EMPLOYEE_CACHE_MAX_SIZE = 10000
+EMPLOYEE_CACHE_TTL = 300  # секунди для знайдених працівників
+EMPLOYEE_CACHE_NEGATIVE_TTL = 60  # секунди для користувачів, які не є працівниками
+
+# Сповіщення інших процесів бота про зміни каталогу обладнання через PostgreSQL LISTEN/NOTIFY.
+# Без прослуховування бот бачить зміни з інших процесів (зокрема імпорт через python bulk_import.py)
+# лише після CATALOGUE_CACHE_MAX_AGE; імпорт надсилає сповіщення завжди, незалежно від цього параметра.
+CATALOGUE_NOTIFY_ENABLED = False
+CATALOGUE_NOTIFY_CHANNEL = 'equipment_catalogue_changed'
+CATALOGUE_CACHE_MAX_AGE = 300  # секунди, після яких каталог обладнання завантажується заново (None - без обмеження)
+
+# Застосовувати нові міграції схеми під час запуску бота (інакше - вручну: python migrations.py)
+RUN_MIGRATIONS_ON_STARTUP = True
+
+# Кількість одиниць обладнання на одній сторінці /equipment
+EQUIPMENT_PAGE_SIZE = 5
+
+# Обмеження вихідних запитів до Telegram Bot API
+SEND_GLOBAL_RATE = 30  # запитів на секунду для всього бота
+SEND_PER_CHAT_INTERVAL = 1.0  # секунд між повідомленнями в один чат
+SEND_MAX_RETRIES = 3  # повторів після відповіді RetryAfter
+
+# Кількість рядків, що підвантажуються серверним курсором за раз під час експорту рухів
+EXPORT_CURSOR_PREFETCH = 1000
+
+# Telegram ID адміністраторів (імпорт даних, статистика)
+ADMIN_TELEGRAM_IDS = ()
+
+# Обмеження CSV-файлів, що завантажуються для імпорту в чаті (файл повністю читається в пам'ять)
+IMPORT_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+IMPORT_UPLOAD_MAX_ROWS = 50000
+
+# HTTP-сервер метрик у форматі Prometheus (None - вимкнено); слухає лише локальну адресу
+METRICS_HTTP_HOST = '127.0.0.1'
+METRICS_HTTP_PORT = None
+
+# Адреса Bot API (None - офіційний сервер Telegram). Для навантажувального тестування з фейковим сервером:
+# 'http://127.0.0.1:8081/bot'
+TELEGRAM_BASE_URL = None
+
+# Кількість оновлень, що обробляються одночасно (1 - послідовна обробка); порядок у межах чату зберігається
+CONCURRENT_UPDATES = 32
+
+# Режим webhook (потребує python-telegram-bot[webhooks]); бот слухає локальну адресу за зворотним проксі
+WEBHOOK_ENABLED = False
+WEBHOOK_LISTEN = '127.0.0.1'
+WEBHOOK_PORT = 8443
+WEBHOOK_URL_PATH = 'telegram'
+WEBHOOK_URL = 'https://example.com/telegram'  # публічна адреса, яку проксі передає на WEBHOOK_LISTEN:WEBHOOK_PORT
+WEBHOOK_SECRET_TOKEN = None  # рядок, який Telegram передає в заголовку X-Telegram-Bot-Api-Secret-Token
+
+# Пошук обладнання (/find та inline-режим)
+SEARCH_RESULTS_LIMIT = 10
+SEARCH_CACHE_MAX_SIZE = 1000
+SEARCH_CACHE_TTL = 15  # секунди
+
+# Бронювання обладнання: часовий пояс, у якому користувачі вводять час, та найбільша тривалість бронювання
+RESERVATION_TIMEZONE = 'Europe/Kyiv'
+RESERVATION_MAX_DAYS = 30
+# Скільки вільних одиниць показувати у відповіді /reserve без ID обладнання
+RESERVATION_FREE_LIST_LIMIT = 30
+
+# Фонові сповіщення відповідальних працівників про переміщення та зміну статусу їхнього обладнання
+NOTIFY_ENABLED = True
+NOTIFY_COALESCE_WINDOW = 10  # секунди: зміни одного обладнання за цей час надсилаються одним повідомленням
+NOTIFY_POLL_INTERVAL = 2  # секунди між перевірками черги
+NOTIFY_BATCH_SIZE = 200  # груп (отримувач, обладнання) за одну перевірку
+NOTIFY_SEND_CONCURRENCY = 5  # одночасних надсилань, щоб не витісняти відповіді на команди з ліміту Bot API
+NOTIFY_LEASE = 120  # секунди, після яких незавершене надсилання повторюється
+NOTIFY_MAX_ATTEMPTS = 5
+
+# Помісячні секції журналу рухів обладнання (equipment_movements)
+MOVEMENTS_PARTITIONS_AHEAD = 3  # на скільки місяців наперед створювати секції
+MOVEMENTS_RETENTION_MONTHS = None  # скільки повних місяців зберігати в журналі крім поточного (None - без обмежень)
+MOVEMENTS_ARCHIVE_SCHEMA = 'equipment_movements_archive'  # куди переносити старі секції (None - видаляти)
+MOVEMENTS_MAINTENANCE_INTERVAL = 24 * 60 * 60  # секунди між перевірками секцій
+
+# Звіт /report за денним зведенням рухів обладнання
+REPORT_DEFAULT_DAYS = 30
+REPORT_TOP_EQUIPMENT = 5
+REPORT_MAX_DAYS = 366  # найдовший період одного звіту
+
+# Шар виконання запитів до бази даних: тайм-аути, повтори тимчасових збоїв та запобіжник
+DB_QUERY_TIMEOUT = 5  # секунди на одну спробу звичайного запиту
+DB_BULK_TIMEOUT = 120  # секунди для імпорту та обслуговування секцій
+DB_RETRY_ATTEMPTS = 3  # загальна кількість спроб, включно з першою
+DB_RETRY_BASE_DELAY = 0.05  # секунди; затримка подвоюється з кожною спробою (з випадковим розкидом)
+DB_RETRY_MAX_DELAY = 1.0
+DB_CIRCUIT_FAILURE_THRESHOLD = 5  # збоїв поспіль, після яких запити відхиляються одразу
+DB_CIRCUIT_RESET_TIMEOUT = 10  # секунди до пробного запиту після розмикання
+
+# Сховище даних бота: 'postgres' - PostgreSQL з налаштувань вище, 'memory' - у пам'яті процесу
+# (без бази даних, дані не зберігаються; для тестів і профілювання обробників)
+STORAGE_BACKEND = 'postgres'
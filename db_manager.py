@@ -1,40 +1,11 @@
-import asyncpg
-# SQL-запити для створення таблиць
-create_employee_table = """
-CREATE TABLE IF NOT EXISTS employees (
-    id SERIAL PRIMARY KEY,
-    telegram_id BIGINT NOT NULL,
-    telegram_username TEXT NOT NULL,
-    first_name TEXT NOT NULL,
-    last_name TEXT NOT NULL,
-    role TEXT NOT NULL,
-    contact_number TEXT NOT NULL,
-    email TEXT NOT NULL,
-    location TEXT NOT NULL  
-);
-"""
-
-create_equipment_table = """
-CREATE TABLE IF NOT EXISTS equipment (
-    id SERIAL PRIMARY KEY,
-    name TEXT NOT NULL,
-    description TEXT,
-    location TEXT NOT NULL,
-    status TEXT NOT NULL,
-    responsible_person_id INTEGER REFERENCES employees(id) ON DELETE SET NULL
-);
-"""
-
-create_equipment_movement_table = """
-CREATE TABLE IF NOT EXISTS equipment_movements (
-    id SERIAL PRIMARY KEY,
-    equipment_id INTEGER REFERENCES equipment(id) ON DELETE CASCADE,
-    from_location TEXT NOT NULL,
-    to_location TEXT NOT NULL,
-    movement_date TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-);
-"""
+import asyncio
+import functools
+import os
+import time
+import uuid
+from datetime import date, datetime, timezone
 
+import asyncpg
 # SQL-запити для отримання даних
 get_all_equipment_query = """
 SELECT id, name, description, location, status, responsible_person_id
@@ -68,6 +39,41 @@ JOIN equipment eq ON eq.responsible_person_id = e.id
 WHERE eq.id = $1;
 """
 
+# SQL-запити для отримання обладнання разом із відповідальним працівником одним запитом
+_equipment_with_responsible_select = """
+SELECT eq.id, eq.name, eq.description, eq.location, eq.status, eq.responsible_person_id,
+       e.id AS e_id, e.telegram_id AS e_telegram_id, e.telegram_username AS e_telegram_username,
+       e.first_name AS e_first_name, e.last_name AS e_last_name, e.role AS e_role,
+       e.contact_number AS e_contact_number, e.email AS e_email, e.location AS e_location
+FROM equipment eq
+LEFT JOIN employees e ON e.id = eq.responsible_person_id
+"""
+
+get_all_equipment_with_responsible_query = _equipment_with_responsible_select + """
+ORDER BY eq.id;
+"""
+
+get_available_equipment_with_responsible_query = _equipment_with_responsible_select + """
+WHERE eq.status = 'Доступний'
+ORDER BY eq.id;
+"""
+
+# SQL-запит для пошуку обладнання за назвою та описом (використовує триграмний індекс equipment_search_trgm_idx)
+# $1 - текст запиту, $2 - шаблон ILIKE, $3 - лише доступне обладнання, $4 - кількість результатів
+search_equipment_query = """
+SELECT eq.id, eq.name, eq.description, eq.location, eq.status, eq.responsible_person_id,
+       e.id AS e_id, e.telegram_id AS e_telegram_id, e.telegram_username AS e_telegram_username,
+       e.first_name AS e_first_name, e.last_name AS e_last_name, e.role AS e_role,
+       e.contact_number AS e_contact_number, e.email AS e_email, e.location AS e_location
+FROM equipment eq
+LEFT JOIN employees e ON e.id = eq.responsible_person_id
+WHERE ($1 <% (eq.name || ' ' || coalesce(eq.description, ''))
+       OR (eq.name || ' ' || coalesce(eq.description, '')) ILIKE $2)
+  AND (NOT $3 OR eq.status = 'Доступний')
+ORDER BY word_similarity($1, eq.name || ' ' || coalesce(eq.description, '')) DESC, eq.id
+LIMIT $4;
+"""
+
 # SQL-запит для оновлення місцезнаходження обладнання
 update_equipment_location_query = """
 UPDATE equipment
@@ -78,7 +84,60 @@ WHERE id = $2;
 # SQL-запит для вставки нового запису про переміщення обладнання
 insert_equipment_movement_query = """
 INSERT INTO equipment_movements (equipment_id, from_location, to_location, movement_date)
-VALUES ($1, $2, $3, $4)
+VALUES ($1, $2, $3, COALESCE($4::timestamptz, CURRENT_TIMESTAMP))
+RETURNING id;
+"""
+
+# SQL-запит для атомарного переміщення обладнання: блокує рядок обладнання, запам'ятовує попереднє
+# місцезнаходження, оновлює його та додає запис про переміщення - одним виразом і одним зверненням до БД
+relocate_equipment_query = """
+WITH old AS (
+    SELECT id, location
+    FROM equipment
+    WHERE id = $1
+    FOR UPDATE
+), upd AS (
+    UPDATE equipment eq
+    SET location = $2
+    FROM old
+    WHERE eq.id = old.id
+    RETURNING eq.id
+)
+INSERT INTO equipment_movements (equipment_id, from_location, to_location, movement_date)
+SELECT old.id, old.location, $2, CURRENT_TIMESTAMP
+FROM old
+JOIN upd ON upd.id = old.id
+RETURNING id;
+"""
+
+# SQL-запит для масового переміщення обладнання одним виразом; рядки блокуються в порядку id,
+# а обладнання, що вже знаходиться на цільовій локації, пропускається
+bulk_relocate_equipment_query = """
+WITH old AS (
+    SELECT id, location
+    FROM equipment
+    WHERE id = ANY($1::integer[]) AND location <> $2
+    ORDER BY id
+    FOR UPDATE
+), upd AS (
+    UPDATE equipment eq
+    SET location = $2
+    FROM old
+    WHERE eq.id = old.id
+    RETURNING eq.id
+)
+INSERT INTO equipment_movements (equipment_id, from_location, to_location, movement_date)
+SELECT old.id, old.location, $2, CURRENT_TIMESTAMP
+FROM old
+JOIN upd ON upd.id = old.id
+RETURNING equipment_id;
+"""
+
+# SQL-запит для масової зміни статусу обладнання
+bulk_update_equipment_status_query = """
+UPDATE equipment
+SET status = $1
+WHERE id = ANY($2::integer[])
 RETURNING id;
 """
 
@@ -96,6 +155,267 @@ FROM equipment_movements
 ORDER BY id;
 """
 
+# SQL-запити для посторінкового (keyset) перегляду рухів обладнання з назвою обладнання.
+# Сторінки йдуть від найновіших рухів до найстаріших за ключем (movement_date, id).
+_equipment_movements_page_select = """
+SELECT m.id, m.equipment_id, m.from_location, m.to_location, m.movement_date, eq.name AS equipment_name
+FROM equipment_movements m
+JOIN equipment eq ON eq.id = m.equipment_id
+"""
+
+get_equipment_movements_first_page_query = _equipment_movements_page_select + """
+ORDER BY m.movement_date DESC, m.id DESC
+LIMIT $1;
+"""
+
+get_equipment_movements_older_page_query = _equipment_movements_page_select + """
+WHERE (m.movement_date, m.id) < ($1, $2)
+ORDER BY m.movement_date DESC, m.id DESC
+LIMIT $3;
+"""
+
+get_equipment_movements_newer_page_query = _equipment_movements_page_select + """
+WHERE (m.movement_date, m.id) > ($1, $2)
+ORDER BY m.movement_date ASC, m.id ASC
+LIMIT $3;
+"""
+
+# SQL-запит для потокового експорту рухів обладнання з необов'язковими фільтрами
+# ($1 - дата від (включно), $2 - дата до (не включно), $3 - ID обладнання, $4 - локація звідки або куди).
+# Межі дат без OR, щоб PostgreSQL відсікав секції поза періодом.
+export_equipment_movements_query = """
+SELECT m.id, m.equipment_id, m.from_location, m.to_location, m.movement_date, eq.name AS equipment_name
+FROM equipment_movements m
+JOIN equipment eq ON eq.id = m.equipment_id
+WHERE m.movement_date >= COALESCE($1::timestamptz, '-infinity')
+  AND m.movement_date < COALESCE($2::timestamptz, 'infinity')
+  AND ($3::integer IS NULL OR m.equipment_id = $3)
+  AND ($4::text IS NULL OR m.from_location = $4 OR m.to_location = $4)
+ORDER BY m.movement_date, m.id;
+"""
+
+# SQL-запити для масового імпорту через тимчасову проміжну таблицю, заповнену командою COPY
+create_employees_staging_query = """
+CREATE TEMP TABLE employees_staging (
+    line_number INTEGER NOT NULL,
+    telegram_id BIGINT NOT NULL,
+    telegram_username TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    contact_number TEXT NOT NULL,
+    email TEXT NOT NULL,
+    location TEXT NOT NULL
+) ON COMMIT DROP;
+"""
+
+upsert_employees_from_staging_query = """
+INSERT INTO employees (telegram_id, telegram_username, first_name, last_name, role, contact_number, email, location)
+SELECT telegram_id, telegram_username, first_name, last_name, role, contact_number, email, location
+FROM employees_staging
+ON CONFLICT (telegram_id) DO UPDATE
+SET telegram_username = EXCLUDED.telegram_username,
+    first_name = EXCLUDED.first_name,
+    last_name = EXCLUDED.last_name,
+    role = EXCLUDED.role,
+    contact_number = EXCLUDED.contact_number,
+    email = EXCLUDED.email,
+    location = EXCLUDED.location;
+"""
+
+create_equipment_staging_query = """
+CREATE TEMP TABLE equipment_staging (
+    line_number INTEGER NOT NULL,
+    id INTEGER,
+    name TEXT NOT NULL,
+    description TEXT,
+    location TEXT NOT NULL,
+    status TEXT NOT NULL,
+    responsible_telegram_id BIGINT
+) ON COMMIT DROP;
+"""
+
+# Рядки з відповідальним, якого немає серед працівників
+get_equipment_staging_unknown_responsible_query = """
+SELECT s.line_number, s.responsible_telegram_id
+FROM equipment_staging s
+LEFT JOIN employees e ON e.telegram_id = s.responsible_telegram_id
+WHERE s.responsible_telegram_id IS NOT NULL AND e.id IS NULL
+ORDER BY s.line_number;
+"""
+
+delete_equipment_staging_unknown_responsible_query = """
+DELETE FROM equipment_staging s
+WHERE s.responsible_telegram_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM employees e WHERE e.telegram_id = s.responsible_telegram_id);
+"""
+
+upsert_equipment_with_id_from_staging_query = """
+INSERT INTO equipment (id, name, description, location, status, responsible_person_id)
+SELECT s.id, s.name, s.description, s.location, s.status, e.id
+FROM equipment_staging s
+LEFT JOIN employees e ON e.telegram_id = s.responsible_telegram_id
+WHERE s.id IS NOT NULL
+ON CONFLICT (id) DO UPDATE
+SET name = EXCLUDED.name,
+    description = EXCLUDED.description,
+    location = EXCLUDED.location,
+    status = EXCLUDED.status,
+    responsible_person_id = EXCLUDED.responsible_person_id;
+"""
+
+insert_equipment_without_id_from_staging_query = """
+INSERT INTO equipment (name, description, location, status, responsible_person_id)
+SELECT s.name, s.description, s.location, s.status, e.id
+FROM equipment_staging s
+LEFT JOIN employees e ON e.telegram_id = s.responsible_telegram_id
+WHERE s.id IS NULL
+ORDER BY s.line_number;
+"""
+
+# Після вставки явних ID послідовність має продовжуватись після найбільшого ID
+sync_equipment_id_sequence_query = """
+SELECT setval(pg_get_serial_sequence('equipment', 'id'), GREATEST((SELECT MAX(id) FROM equipment), 1));
+"""
+
+# SQL-запит для зведення кількості обладнання за локацією та статусом (таблиця підтримується тригерами)
+get_equipment_occupancy_query = """
+SELECT location, status, item_count
+FROM equipment_occupancy
+WHERE item_count > 0
+ORDER BY location, status;
+"""
+
+# SQL-запит для отримання обладнання без бронювань, що перетинаються з проміжком [$1, $2)
+# (анти-з'єднання перевіряється за GiST-індексом обмеження equipment_reservations_no_overlap)
+get_equipment_free_in_period_query = """
+SELECT eq.id, eq.name, eq.description, eq.location, eq.status, eq.responsible_person_id
+FROM equipment eq
+WHERE NOT EXISTS (
+    SELECT 1
+    FROM equipment_reservations r
+    WHERE r.equipment_id = eq.id
+      AND r.period && tstzrange($1, $2, '[)')
+)
+ORDER BY eq.id;
+"""
+
+# SQL-запити для бронювань обладнання
+insert_reservation_query = """
+INSERT INTO equipment_reservations (equipment_id, employee_id, period)
+VALUES ($1, $2, tstzrange($3, $4, '[)'))
+RETURNING id;
+"""
+
+get_conflicting_reservations_query = """
+SELECT id, equipment_id, employee_id, lower(period) AS starts_at, upper(period) AS ends_at
+FROM equipment_reservations
+WHERE equipment_id = $1
+  AND period && tstzrange($2, $3, '[)')
+ORDER BY lower(period);
+"""
+
+get_employee_reservations_query = """
+SELECT r.id, r.equipment_id, r.employee_id, lower(r.period) AS starts_at, upper(r.period) AS ends_at,
+       eq.name AS equipment_name
+FROM equipment_reservations r
+JOIN equipment eq ON eq.id = r.equipment_id
+WHERE r.employee_id = $1
+  AND upper(r.period) > CURRENT_TIMESTAMP
+ORDER BY lower(r.period), r.id;
+"""
+
+delete_reservation_query = """
+DELETE FROM equipment_reservations
+WHERE id = $1 AND employee_id = $2
+RETURNING id;
+"""
+
+# SQL-запит для додавання подій сповіщення відповідальним працівникам змінених одиниць обладнання
+# ($1 - ID обладнання, $2 - вид зміни, $3 - нове значення, $4 - Telegram ID автора зміни, якого не сповіщаємо)
+enqueue_notification_events_query = """
+INSERT INTO notification_events (recipient_telegram_id, equipment_id, equipment_name, kind, new_value)
+SELECT e.telegram_id, eq.id, eq.name, $2, $3
+FROM equipment eq
+JOIN employees e ON e.id = eq.responsible_person_id
+WHERE eq.id = ANY($1::integer[])
+  AND e.telegram_id IS DISTINCT FROM $4;
+"""
+
+# Видалення подій, які так і не вдалося надіслати за $1 спроб
+delete_exhausted_notification_events_query = """
+DELETE FROM notification_events
+WHERE attempts >= $1
+  AND (claimed_until IS NULL OR claimed_until < CURRENT_TIMESTAMP);
+"""
+
+# Захоплення подій для надсилання: групи (отримувач, обладнання), найстаріша подія яких чекає довше за вікно
+# об'єднання ($1 секунд), захоплюються цілком на час оренди ($3 секунд). Повторна перевірка claimed_until
+# в UPDATE не дає двом процесам бота захопити ті самі події.
+claim_notification_events_query = """
+WITH due AS (
+    SELECT recipient_telegram_id, equipment_id
+    FROM notification_events
+    WHERE claimed_until IS NULL OR claimed_until < CURRENT_TIMESTAMP
+    GROUP BY recipient_telegram_id, equipment_id
+    HAVING MIN(created_at) <= CURRENT_TIMESTAMP - make_interval(secs => $1)
+    LIMIT $2
+)
+UPDATE notification_events n
+SET claimed_until = CURRENT_TIMESTAMP + make_interval(secs => $3),
+    attempts = n.attempts + 1
+FROM due
+WHERE n.recipient_telegram_id = due.recipient_telegram_id
+  AND n.equipment_id = due.equipment_id
+  AND (n.claimed_until IS NULL OR n.claimed_until < CURRENT_TIMESTAMP)
+RETURNING n.id, n.recipient_telegram_id, n.equipment_id, n.equipment_name, n.kind, n.new_value, n.created_at;
+"""
+
+delete_notification_events_query = """
+DELETE FROM notification_events
+WHERE id = ANY($1::bigint[]);
+"""
+
+# SQL-запити для обслуговування секцій equipment_movements
+ensure_equipment_movement_partitions_query = """
+SELECT create_equipment_movement_partitions(CURRENT_TIMESTAMP, CURRENT_TIMESTAMP + make_interval(months => $1));
+"""
+
+# Створює секції для місяців, рядки яких потрапили в секцію за замовчуванням (запізнілі або давні рухи)
+ensure_equipment_movement_partitions_from_default_query = """
+SELECT create_equipment_movement_partitions_from_default();
+"""
+
+get_equipment_movement_partitions_query = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+WHERE i.inhparent = 'equipment_movements'::regclass
+  AND c.relname ~ '^equipment_movements_y[0-9]{4}m[0-9]{2}$'
+ORDER BY c.relname;
+"""
+
+# SQL-запити для звіту за денним зведенням рухів (без читання журналу equipment_movements)
+# ($1 - перший день, $2 - останній день періоду, включно)
+get_location_movement_totals_query = """
+SELECT location, SUM(arrivals) AS arrivals, SUM(departures) AS departures
+FROM equipment_movement_daily
+WHERE day BETWEEN $1 AND $2
+GROUP BY location
+ORDER BY location;
+"""
+
+get_most_moved_equipment_query = """
+SELECT d.equipment_id, eq.name, SUM(d.arrivals) AS moves
+FROM equipment_movement_daily d
+LEFT JOIN equipment eq ON eq.id = d.equipment_id
+WHERE d.day BETWEEN $1 AND $2
+GROUP BY d.equipment_id, eq.name
+HAVING SUM(d.arrivals) > 0
+ORDER BY moves DESC, d.equipment_id
+LIMIT $3;
+"""
+
 update_equipment_status_query = """
 UPDATE equipment
 SET status = $1
@@ -106,209 +426,927 @@ from config import DB_USER
 from config import DB_NAME
 from config import DB_PASSWORD
 from config import DB_HOST
+from config import DB_POOL_MIN_SIZE
+from config import DB_POOL_MAX_SIZE
+from config import DB_POOL_ACQUIRE_TIMEOUT
+from config import DB_STATEMENT_CACHE_SIZE
+from config import MOVEMENTS_PAGE_SIZE
+from config import EXPORT_CURSOR_PREFETCH
+from config import EMPLOYEE_CACHE_MAX_SIZE
+from config import EMPLOYEE_CACHE_TTL
+from config import EMPLOYEE_CACHE_NEGATIVE_TTL
+from config import CATALOGUE_NOTIFY_ENABLED
+from config import CATALOGUE_NOTIFY_CHANNEL
+from config import CATALOGUE_CACHE_MAX_AGE
+from config import SEARCH_RESULTS_LIMIT
+from config import SEARCH_CACHE_MAX_SIZE
+from config import SEARCH_CACHE_TTL
+from config import MOVEMENTS_PARTITIONS_AHEAD
+from config import MOVEMENTS_RETENTION_MONTHS
+from config import MOVEMENTS_ARCHIVE_SCHEMA
+from config import MOVEMENTS_MAINTENANCE_INTERVAL
+from config import DB_QUERY_TIMEOUT
+from config import DB_BULK_TIMEOUT
+from config import DB_RETRY_ATTEMPTS
+from config import DB_RETRY_BASE_DELAY
+from config import DB_RETRY_MAX_DELAY
+from config import DB_CIRCUIT_FAILURE_THRESHOLD
+from config import DB_CIRCUIT_RESET_TIMEOUT
 
-from models import Equipment, EquipmentMovement, Employee
+from cache import AsyncTTLCache, VersionedCache
+from migrations import run_migrations
+from metrics import metrics, instrument_query, log_db_error, observe_pool_wait
+from db_resilience import CircuitBreaker, is_unavailable, is_retryable, backoff_delay
+from errors import StorageError, StorageUnavailableError, StorageTimeoutError, ConflictError, NotFoundError
 
-async def create_tables():
-    # Підключення до бази даних
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+from models import Equipment, EquipmentMovement, Employee, Reservation
 
-    try:
-        # Створення таблиць
-        await conn.execute(create_employee_table)
-        await conn.execute(create_equipment_table)
-        await conn.execute(create_equipment_movement_table)
-        print("Таблиці успішно створено.")
-    except Exception as e:
-        print(f"Помилка при створенні таблиць: {e}")
-    finally:
-        # Закриття підключення
-        await conn.close()
+# Спільний пул підключень, що створюється один раз під час запуску бота
+_pool = None
 
-async def get_employee_by_telegram_id(telegram_id: int):
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+# Кеш перевірки, чи є користувач Telegram працівником (включно з негативними результатами)
+employee_cache = AsyncTTLCache(max_size=EMPLOYEE_CACHE_MAX_SIZE, ttl=EMPLOYEE_CACHE_TTL,
+                               negative_ttl=EMPLOYEE_CACHE_NEGATIVE_TTL)
+
+# Кеш каталогу обладнання: словник {id обладнання: (Equipment, Employee або None)} у порядку id
+equipment_catalogue = VersionedCache(CATALOGUE_CACHE_MAX_AGE)
+
+# Короткочасний кеш результатів пошуку обладнання (inline-запити надходять на кожне натискання клавіші)
+search_cache = AsyncTTLCache(max_size=SEARCH_CACHE_MAX_SIZE, ttl=SEARCH_CACHE_TTL)
+
+# Унікальний ідентифікатор процесу, щоб не реагувати на власні сповіщення LISTEN/NOTIFY
+_process_token = f"{os.getpid()}-{uuid.uuid4().hex}"
+
+# Окреме підключення, що слухає сповіщення про зміни каталогу від інших процесів бота
+_listener_conn = None
+
+# Фонова задача, що періодично створює майбутні секції equipment_movements та застосовує політику зберігання
+_maintenance_task = None
+
+# Ідентифікатор advisory-блокування, щоб секції обслуговував лише один процес бота одночасно
+MOVEMENTS_MAINTENANCE_LOCK_ID = 727002
+
+# Запобіжник звернень до бази даних, спільний для всіх функцій db_manager
+db_circuit = CircuitBreaker(DB_CIRCUIT_FAILURE_THRESHOLD, DB_CIRCUIT_RESET_TIMEOUT)
+
+
+async def init_pool():
+    """
+    Створює спільний пул підключень до бази даних (якщо його ще не створено).
+
+    :return: Пул підключень asyncpg.
+    """
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST,
+                                          min_size=DB_POOL_MIN_SIZE,
+                                          max_size=DB_POOL_MAX_SIZE,
+                                          statement_cache_size=DB_STATEMENT_CACHE_SIZE)
+        print(f"Пул підключень створено (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE}).")
+    return _pool
+
+
+async def close_pool():
+    """
+    Закриває спільний пул підключень до бази даних.
+    """
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+        print("Пул підключень закрито.")
+
+
+# Контекстний менеджер отримання підключення з пулу, що вимірює час очікування вільного підключення
+class _TimedAcquire:
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        started = time.perf_counter()
+        try:
+            conn = await self._context.__aenter__()
+        except asyncio.TimeoutError:
+            observe_pool_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        observe_pool_wait(time.perf_counter() - started)
+        return conn
+
+    async def __aexit__(self, *exc_info):
+        return await self._context.__aexit__(*exc_info)
+
+
+def acquire():
+    """
+    Повертає контекстний менеджер для отримання підключення зі спільного пулу.
+
+    :return: Контекстний менеджер, що видає підключення asyncpg.
+    """
+    if _pool is None:
+        raise RuntimeError("Пул підключень не ініціалізовано. Викличте init_pool() під час запуску бота.")
+    return _TimedAcquire(_pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT))
+
+
+def _storage_error(description: str, error: Exception) -> StorageError:
+    """
+    Перетворює виняток asyncpg на типізовану помилку сховища і враховує збій у запобіжнику.
+
+    :param description: Опис операції, що не вдалася.
+    :param error: Виняток.
+    :return: StorageTimeoutError, StorageUnavailableError або StorageError.
+    """
+    if isinstance(error, StorageError):
+        return error
+    if is_unavailable(error):
+        db_circuit.record_failure()
+    else:
+        # Помилка в запиті чи даних означає, що база доступна
+        db_circuit.record_success()
+    if isinstance(error, (asyncio.TimeoutError, asyncpg.exceptions.QueryCanceledError)):
+        storage_error = StorageTimeoutError(f"{description}: перевищено час очікування")
+    elif is_unavailable(error):
+        storage_error = StorageUnavailableError(f"{description}: {error}")
+    else:
+        storage_error = StorageError(f"{description}: {error}")
+    log_db_error(description, error if str(error) else "перевищено час очікування")
+    return storage_error
+
+
+async def _run_db_operation(operation, args, kwargs, description: str, idempotent: bool, timeout: float):
+    attempt = 0
+    while True:
+        attempt += 1
+        if not db_circuit.allow():
+            raise StorageUnavailableError(f"{description}: звернення до бази даних тимчасово призупинено")
+        try:
+            async with acquire() as conn:
+                result = await asyncio.wait_for(operation(conn, *args, **kwargs), timeout)
+        except StorageError:
+            # Конфлікт чи відсутній запис, виявлені самою операцією: база доступна
+            db_circuit.record_success()
+            raise
+        except Exception as e:
+            if attempt < DB_RETRY_ATTEMPTS and is_retryable(e, idempotent):
+                if is_unavailable(e):
+                    db_circuit.record_failure()
+                metrics.query_retries[operation.__name__] += 1
+                await asyncio.sleep(backoff_delay(attempt, DB_RETRY_BASE_DELAY, DB_RETRY_MAX_DELAY))
+                continue
+            if isinstance(e, asyncio.TimeoutError):
+                # Операцію скасовано тайм-аутом, тому instrument_query не врахував цю помилку
+                metrics.query_errors[operation.__name__] += 1
+            raise _storage_error(description, e) from e
+        db_circuit.record_success()
+        return result
+
+
+def db_operation(description: str, idempotent: bool = True, timeout: float = DB_QUERY_TIMEOUT):
+    """
+    Обгортає функцію db_manager, що приймає підключення першим аргументом, у спільний шар виконання:
+    підключення з пулу, тайм-аут, повтори з випадковою затримкою для тимчасових збоїв та запобіжник.
+
+    Обгорнута функція викликається без підключення; замість порожніх результатів при збоях вона піднімає
+    StorageError (StorageUnavailableError - якщо база недоступна чи запобіжник розімкнено).
+
+    :param description: Опис операції для журналу та тексту помилки.
+    :param idempotent: Чи можна повторити операцію після обриву з'єднання (повторний запис не змінить результат).
+    :param timeout: Найбільший час виконання однієї спроби в секундах.
+    :return: Декоратор.
+    """
+    def decorator(operation):
+        @functools.wraps(operation)
+        async def wrapper(*args, **kwargs):
+            return await _run_db_operation(operation, args, kwargs, description, idempotent, timeout)
+        return wrapper
+    return decorator
+
+
+async def apply_migrations():
+    """
+    Застосовує нові міграції схеми бази даних (викликається один раз під час запуску бота).
+    """
+    async with acquire() as conn:
+        applied_now = await run_migrations(conn)
+        if applied_now:
+            print(f"Застосовано міграції: {applied_now}")
+
+@db_operation("Помилка при перевірці працівника")
+@instrument_query
+async def _fetch_employee_by_telegram_id(conn, telegram_id: int):
     employee = await conn.fetchrow(get_employee_by_telegram_id_query, telegram_id)
     return employee
 
+async def get_employee_by_telegram_id(telegram_id: int):
+    """
+    Отримує працівника за його Telegram ID (з кешу, якщо запис ще дійсний).
+
+    :param telegram_id: ID користувача в Telegram.
+    :return: Запис працівника, або None, якщо користувач не є працівником.
+    """
+    return await employee_cache.get_or_load(telegram_id, _fetch_employee_by_telegram_id)
+
+def invalidate_employee_cache(telegram_id: int = None):
+    """
+    Видаляє закешований результат перевірки працівника.
+
+    :param telegram_id: Telegram ID працівника; None - очистити кеш повністю.
+    """
+    employee_cache.invalidate(telegram_id)
+
 async def get_all_equipment():
-    # Підключення до бази даних
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+    # Каталог обладнання береться з кешу
+    equipment_list = await get_equipment_with_responsible()
+    return [equipment for equipment, _ in equipment_list]
 
-    try:
-        rows = await conn.fetch(get_all_equipment_query)
-        # Створюємо список об'єктів Equipment
-        equipment_list = [Equipment(**row) for row in rows]
-        return equipment_list
+async def get_available_equipment(starts_at=None, ends_at=None):
+    """
+    Отримує доступне обладнання.
 
-    except Exception as e:
-        print(f"Помилка при отриманні обладнання: {e}")
-        return []
+    Без проміжку часу повертає обладнання зі статусом 'Доступний' з кешу каталогу.
+    З проміжком - обладнання, яке не має бронювань, що перетинаються з [starts_at, ends_at).
 
-    finally:
-        # Закриття підключення
-        await conn.close()
+    :param starts_at: Початок проміжку (datetime з часовим поясом), або None.
+    :param ends_at: Кінець проміжку (не включно), або None.
+    :return: Список об'єктів Equipment.
+    """
+    if starts_at is None or ends_at is None:
+        equipment_list = await get_equipment_with_responsible(only_available=True)
+        return [equipment for equipment, _ in equipment_list]
+    return await _get_equipment_free_in_period(starts_at, ends_at)
 
-async def get_available_equipment():
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+@db_operation("Помилка при отриманні вільного обладнання за проміжок часу")
+@instrument_query
+async def _get_equipment_free_in_period(conn, starts_at, ends_at):
+    rows = await conn.fetch(get_equipment_free_in_period_query, starts_at, ends_at)
+    return [Equipment.from_record(row) for row in rows]
 
-    try:
-        rows = await conn.fetch(get_available_equipment_query)
-        equipment_list = [Equipment(**row) for row in rows]
-        return equipment_list
+@db_operation("Помилка при отриманні відповідального працівника")
+@instrument_query
+async def get_responsible_employee_for_equipment(conn, equipment_id: int):
+    # Виконання запиту для отримання відповідального працівника
+    employee_row = await conn.fetchrow(get_responsible_employee_query, equipment_id)
 
-    except Exception as e:
-        print(f"Помилка при отриманні обладнання: {e}")
-        return []
+    if employee_row:
+        # Якщо знайшовся відповідальний працівник, створюємо об'єкт Employee
+        responsible_employee = Employee.from_record(employee_row)
+        return responsible_employee
+    else:
+        return None
 
-    finally:
-        await conn.close()
+def _equipment_with_responsible_from_row(row):
+    """
+    Створює пару (Equipment, Employee) з рядка запиту з приєднаним працівником.
 
-async def get_responsible_employee_for_equipment(equipment_id: int):
-    # Підключення до бази даних
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+    :param row: Рядок результату запиту з колонками обладнання та колонками працівника з префіксом "e_".
+    :return: Кортеж (Equipment, Employee або None, якщо відповідального не призначено).
+    """
+    equipment = Equipment.from_record(row)
+    # Колонки працівника йдуть після шести колонок обладнання
+    if row[6] is None:
+        return equipment, None
+    responsible_employee = Employee.from_record(row, offset=6)
+    return equipment, responsible_employee
 
-    try:
-        # Виконання запиту для отримання відповідального працівника
-        employee_row = await conn.fetchrow(get_responsible_employee_query, equipment_id)
+@db_operation("Помилка при отриманні обладнання з відповідальними")
+@instrument_query
+async def _load_equipment_catalogue(conn):
+    """
+    Завантажує весь каталог обладнання з відповідальними працівниками одним запитом.
 
-        if employee_row:
-            # Якщо знайшовся відповідальний працівник, створюємо об'єкт Employee
-            responsible_employee = Employee(**employee_row)
-            return responsible_employee
-        else:
-            return None
+    :param conn: Підключення asyncpg (передається db_operation).
+    :return: Словник {id обладнання: (Equipment, Employee або None)} у порядку id.
+    """
+    rows = await conn.fetch(get_all_equipment_with_responsible_query)
+    catalogue = {}
+    for row in rows:
+        equipment, responsible_employee = _equipment_with_responsible_from_row(row)
+        catalogue[equipment.id] = (equipment, responsible_employee)
+    return catalogue
 
-    except Exception as e:
-        print(f"Помилка при отриманні відповідального працівника: {e}")
-        return None
+async def get_equipment_with_responsible(only_available: bool = False):
+    """
+    Отримує обладнання разом із відповідальними працівниками з кешу каталогу.
 
-    finally:
-        # Закриття підключення
-        await conn.close()
+    Каталог завантажується одним запитом при першому зверненні та після інвалідації.
 
-async def update_equipment_location(equipment_id: int, new_location: str):
+    :param only_available: Якщо True, повертає лише обладнання зі статусом 'Доступний'.
+    :return: Список кортежів (Equipment, Employee або None).
+    """
+    catalogue = await equipment_catalogue.get(_load_equipment_catalogue)
+    if only_available:
+        return [entry for entry in catalogue.values() if entry[0].status == 'Доступний']
+    return list(catalogue.values())
+
+def _patch_catalogue_equipment(equipment_id: int, **changes):
+    """
+    Оновлює поля обладнання в кеші каталогу без повторного завантаження з БД.
+
+    :param equipment_id: ID зміненого обладнання.
+    :param changes: Нові значення полів Equipment (наприклад, location або status).
+    """
+    def patch(catalogue):
+        entry = catalogue.get(equipment_id)
+        if entry is None:
+            return catalogue
+        equipment, responsible_employee = entry
+        catalogue[equipment_id] = (equipment.replace(**changes), responsible_employee)
+        return catalogue
+
+    equipment_catalogue.update(patch)
+    search_cache.invalidate()
+
+def invalidate_equipment_catalogue():
+    """
+    Скидає кеш каталогу обладнання та кеш результатів пошуку.
+    """
+    equipment_catalogue.invalidate()
+    search_cache.invalidate()
+
+@db_operation("Помилка при пошуку обладнання")
+@instrument_query
+async def _search_equipment(conn, key: tuple):
+    text, only_available = key
+    # Екрануємо спецсимволи ILIKE, щоб текст користувача шукався буквально
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rows = await conn.fetch(search_equipment_query, text, pattern, only_available, SEARCH_RESULTS_LIMIT)
+    return [_equipment_with_responsible_from_row(row) for row in rows]
+
+async def search_equipment(text: str, only_available: bool = False):
+    """
+    Шукає обладнання за назвою та описом з ранжуванням за схожістю (нечіткий пошук).
+
+    Результати для однакових запитів кешуються на кілька секунд.
+
+    :param text: Текст запиту.
+    :param only_available: Якщо True, шукає лише обладнання зі статусом 'Доступний'.
+    :return: Список кортежів (Equipment, Employee або None), найбільш схожі спочатку.
+    """
+    text = " ".join(text.lower().split())
+    if not text:
+        return []
+    return await search_cache.get_or_load((text, only_available), _search_equipment)
+
+async def _notify_catalogue_changed(conn, always: bool = False):
+    """
+    Сповіщає інші процеси бота про зміну каталогу обладнання через NOTIFY.
+
+    :param conn: Підключення, через яке виконано зміну.
+    :param always: Надіслати сповіщення, навіть якщо в цьому процесі воно вимкнене (імпорт з окремого процесу).
+    """
+    if CATALOGUE_NOTIFY_ENABLED or always:
+        await conn.execute("SELECT pg_notify($1, $2);", CATALOGUE_NOTIFY_CHANNEL, _process_token)
+
+def _on_catalogue_notification(connection, pid, channel, payload):
+    # Власні зміни вже застосовано до кешу, інвалідуємо лише при змінах від інших процесів
+    if payload != _process_token:
+        invalidate_equipment_catalogue()
+
+async def start_catalogue_listener():
+    """
+    Починає слухати сповіщення про зміни каталогу від інших процесів бота (якщо увімкнено в конфігурації).
+    """
+    global _listener_conn
+    if CATALOGUE_NOTIFY_ENABLED and _listener_conn is None:
+        _listener_conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+        await _listener_conn.add_listener(CATALOGUE_NOTIFY_CHANNEL, _on_catalogue_notification)
+        # Зміни, зроблені до початку прослуховування, могли бути пропущені
+        invalidate_equipment_catalogue()
+        print(f"Прослуховування каналу {CATALOGUE_NOTIFY_CHANNEL} розпочато.")
+
+async def stop_catalogue_listener():
+    """
+    Припиняє прослуховування сповіщень про зміни каталогу.
+    """
+    global _listener_conn
+    if _listener_conn is not None:
+        await _listener_conn.close()
+        _listener_conn = None
+
+@db_operation("Помилка при оновленні місцезнаходження обладнання")
+@instrument_query
+async def update_equipment_location(conn, equipment_id: int, new_location: str):
     """
     Оновлює місцезнаходження обладнання в базі даних.
 
     :param equipment_id: ID обладнання, місцезнаходження якого потрібно оновити.
     :param new_location: Нове місцезнаходження обладнання.
     """
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
-
-    try:
-        # Виконання запиту на оновлення місцезнаходження обладнання
-        result = await conn.execute(update_equipment_location_query, new_location, equipment_id)
+    # Виконання запиту на оновлення місцезнаходження обладнання
+    result = await conn.execute(update_equipment_location_query, new_location, equipment_id)
 
-        if result == "UPDATE 1":
-            print(f"Місцезнаходження обладнання з ID {equipment_id} успішно оновлено.")
-        else:
-            print(f"Не вдалося оновити місцезнаходження для обладнання з ID {equipment_id}.")
-    except Exception as e:
-        print(f"Помилка при оновленні місцезнаходження обладнання: {e}")
-    finally:
-        # Закриття підключення
-        await conn.close()
+    if result == "UPDATE 1":
+        _patch_catalogue_equipment(equipment_id, location=new_location)
+        await _notify_catalogue_changed(conn)
+        print(f"Місцезнаходження обладнання з ID {equipment_id} успішно оновлено.")
+    else:
+        print(f"Не вдалося оновити місцезнаходження для обладнання з ID {equipment_id}.")
 
-async def insert_equipment_movement(equipment_movement: EquipmentMovement):
+@db_operation("Помилка при вставці запису про переміщення обладнання", idempotent=False)
+@instrument_query
+async def insert_equipment_movement(conn, equipment_movement: EquipmentMovement):
     """
     Вставляє новий запис про переміщення обладнання в базу даних.
 
     :param equipment_movement: Об'єкт EquipmentMovement, що містить інформацію про переміщення.
-    :return: ID нового запису, якщо вставка успішна, або None в разі помилки.
+    :return: ID нового запису.
     """
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+    # Виконання запиту на вставку нового запису
+    movement_id = await conn.fetchval(insert_equipment_movement_query,
+                                      equipment_movement.equipment_id,
+                                      equipment_movement.from_location,
+                                      equipment_movement.to_location,
+                                      equipment_movement.movement_date)
 
-    try:
-        # Виконання запиту на вставку нового запису
-        movement_id = await conn.fetchval(insert_equipment_movement_query,
-                                           equipment_movement.equipment_id,
-                                           equipment_movement.from_location,
-                                           equipment_movement.to_location,
-                                           equipment_movement.movement_date)
-
-        if movement_id:
-            print(f"Запис про переміщення обладнання успішно додано з ID {movement_id}.")
-            return movement_id
-        else:
-            print("Не вдалося додати запис про переміщення обладнання.")
-            return None
-    except Exception as e:
-        print(f"Помилка при вставці запису про переміщення обладнання: {e}")
-        return None
-    finally:
-        # Закриття підключення
-        await conn.close()
+    # Запис руху означає зміну місцезнаходження, тому каталог перечитується при наступному зверненні
+    invalidate_equipment_catalogue()
+    await _notify_catalogue_changed(conn)
+    print(f"Запис про переміщення обладнання успішно додано з ID {movement_id}.")
+    return movement_id
+
+
+@db_operation("Помилка при переміщенні обладнання", idempotent=False)
+@instrument_query
+async def relocate_equipment(conn, equipment_id: int, new_location: str):
+    """
+    Атомарно переміщує обладнання на нову локацію та записує рух обладнання.
+
+    Оновлення equipment.location і вставка запису в equipment_movements виконуються одним виразом,
+    тому одночасні переміщення того самого обладнання не запишуть неправильне from_location.
+
+    :param equipment_id: ID обладнання, яке потрібно перемістити.
+    :param new_location: Нове місцезнаходження обладнання.
+    :return: ID нового запису про переміщення, або None, якщо обладнання не знайдено.
+    """
+    movement_id = await conn.fetchval(relocate_equipment_query, equipment_id, new_location)
 
+    if movement_id:
+        _patch_catalogue_equipment(equipment_id, location=new_location)
+        await _notify_catalogue_changed(conn)
+        print(f"Обладнання з ID {equipment_id} переміщено на {new_location}, запис руху з ID {movement_id}.")
+        return movement_id
+    else:
+        print(f"Обладнання з ID {equipment_id} не знайдено.")
+        return None
 
 
-async def get_equipment_by_id(equipment_id: int):
+@db_operation("Помилка при отриманні обладнання за ID")
+@instrument_query
+async def get_equipment_by_id(conn, equipment_id: int):
     """
     Отримує інформацію про обладнання за його ID.
 
     :param equipment_id: ID обладнання, яке потрібно отримати.
     :return: Об'єкт Equipment, якщо обладнання знайдено, або None, якщо не знайдено.
     """
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+    # Виконання запиту для отримання обладнання за ID
+    row = await conn.fetchrow(get_equipment_by_id_query, equipment_id)
+
+    if row:
+        # Якщо знайдено обладнання, створюємо об'єкт Equipment
+        equipment = Equipment.from_record(row)
+        return equipment
+    else:
+        print(f"Обладнання з ID {equipment_id} не знайдено.")
+        return None
+
+@instrument_query
+async def iter_equipment_movements(date_from=None, date_to=None, equipment_id: int = None, location: str = None):
+    """
+    Потоково повертає рухи обладнання через серверний курсор, не завантажуючи всю таблицю в пам'ять.
+
+    Потік не повторюється після збою (частину рядків уже могло бути віддано), але тайм-аут застосовується
+    до кожної порції курсора, а збої перетворюються на помилки StorageError.
 
+    :param date_from: Початок періоду (включно), або None.
+    :param date_to: Кінець періоду (не включно), або None.
+    :param equipment_id: ID обладнання, або None для всього обладнання.
+    :param location: Локація, з якої або до якої переміщено обладнання, або None.
+    :return: Асинхронний генератор пар (EquipmentMovement, назва обладнання) у порядку дати переміщення.
+    """
+    description = "Помилка при експорті рухів обладнання"
+    if not db_circuit.allow():
+        raise StorageUnavailableError(f"{description}: звернення до бази даних тимчасово призупинено")
     try:
-        # Виконання запиту для отримання обладнання за ID
-        row = await conn.fetchrow(get_equipment_by_id_query, equipment_id)
-
-        if row:
-            # Якщо знайдено обладнання, створюємо об'єкт Equipment
-            equipment = Equipment(**row)
-            return equipment
-        else:
-            print(f"Обладнання з ID {equipment_id} не знайдено.")
-            return None
+        async with acquire() as conn:
+            # Серверні курсори в PostgreSQL працюють лише всередині транзакції
+            async with conn.transaction(readonly=True):
+                db_circuit.record_success()
+                async for row in conn.cursor(export_equipment_movements_query, date_from, date_to, equipment_id,
+                                             location, prefetch=EXPORT_CURSOR_PREFETCH, timeout=DB_QUERY_TIMEOUT):
+                    yield EquipmentMovement.from_record(row), row['equipment_name']
     except Exception as e:
-        print(f"Помилка при отриманні обладнання за ID: {e}")
-        return None
-    finally:
-        # Закриття підключення
-        await conn.close()
+        raise _storage_error(description, e) from e
 
-async def get_all_equipment_movements():
+@db_operation("Помилка при отриманні рухів обладнання")
+@instrument_query
+async def get_all_equipment_movements(conn):
     """
     Отримує всі записи про рухи обладнання з бази даних.
 
     :return: Список об'єктів EquipmentMovement, якщо є рухи обладнання, або порожній список, якщо рухів немає.
     """
-    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+    # Виконання запиту для отримання всіх рухів обладнання
+    rows = await conn.fetch(get_all_equipment_movements_query)
+
+    # Якщо є результати, створюємо список об'єктів EquipmentMovement
+    equipment_movements = [EquipmentMovement.from_record(row) for row in rows]
+    return equipment_movements
+
+@db_operation("Помилка при отриманні сторінки рухів обладнання")
+@instrument_query
+async def get_equipment_movements_page(conn, older_than: tuple = None, newer_than: tuple = None,
+                                       page_size: int = MOVEMENTS_PAGE_SIZE):
+    """
+    Отримує одну сторінку рухів обладнання (від найновіших до найстаріших) разом із назвами обладнання.
+
+    Використовує keyset-пагінацію за (movement_date, id), тому вартість запиту не залежить від номера сторінки.
+
+    :param older_than: Курсор (movement_date, id) - повернути рухи, старші за нього (наступна сторінка).
+    :param newer_than: Курсор (movement_date, id) - повернути рухи, новіші за нього (попередня сторінка).
+    :param page_size: Кількість рухів на сторінці.
+    :return: Кортеж (список пар (EquipmentMovement, назва обладнання), чи є ще записи в напрямку гортання).
+    """
+    # Запитуємо на один запис більше, щоб дізнатися, чи є ще сторінки
+    if older_than is not None:
+        rows = await conn.fetch(get_equipment_movements_older_page_query, *older_than, page_size + 1)
+    elif newer_than is not None:
+        rows = await conn.fetch(get_equipment_movements_newer_page_query, *newer_than, page_size + 1)
+    else:
+        rows = await conn.fetch(get_equipment_movements_first_page_query, page_size + 1)
 
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if newer_than is not None:
+        # Новіші рухи вибираються за зростанням, повертаємо їх у порядку від найновіших
+        rows.reverse()
+
+    page = [(EquipmentMovement.from_record(row), row['equipment_name']) for row in rows]
+    return page, has_more
+
+@db_operation("Помилка при оновленні статусу обладнання")
+@instrument_query
+async def update_equipment_status(conn, equipment_id: int, new_status: str):
+    """
+    Оновлює статус обладнання в базі даних.
+
+    :param equipment_id: ID обладнання, для якого потрібно оновити статус.
+    :param new_status: Новий статус для обладнання.
+    :return: True, якщо статус оновлено, або False, якщо обладнання не знайдено.
+    """
+    # Виконання запиту на оновлення статусу
+    result = await conn.execute(update_equipment_status_query, new_status, equipment_id)
+
+    if result == "UPDATE 1":
+        _patch_catalogue_equipment(equipment_id, status=new_status)
+        await _notify_catalogue_changed(conn)
+        print(f"Статус обладнання з ID {equipment_id} успішно оновлено на '{new_status}'.")
+        return True
+    else:
+        print(f"Не вдалося оновити статус для обладнання з ID {equipment_id}.")
+        return False
+
+
+@db_operation("Помилка при імпорті працівників", timeout=DB_BULK_TIMEOUT)
+@instrument_query
+async def _bulk_upsert_employees(conn, records: list):
+    async with conn.transaction():
+        await conn.execute(create_employees_staging_query)
+        await conn.copy_records_to_table("employees_staging", records=records)
+        await conn.execute(upsert_employees_from_staging_query)
+        # Каталог містить відповідальних працівників, тому їхні зміни теж інвалідовують його в інших процесах
+        await _notify_catalogue_changed(conn, always=True)
+
+async def bulk_upsert_employees(records: list):
+    """
+    Масово додає або оновлює працівників (за telegram_id) одним COPY та однією транзакцією.
+
+    :param records: Список кортежів (номер рядка, telegram_id, telegram_username, first_name, last_name, role,
+                    contact_number, email, location).
+    :return: Кількість імпортованих працівників.
+    """
+    if not records:
+        return 0
+    await _bulk_upsert_employees(records)
+    # Змінені працівники могли стати (або перестати бути) працівниками для перевірки доступу
+    invalidate_employee_cache()
+    invalidate_equipment_catalogue()
+    return len(records)
+
+@db_operation("Помилка при імпорті обладнання", idempotent=False, timeout=DB_BULK_TIMEOUT)
+@instrument_query
+async def _bulk_upsert_equipment(conn, records: list):
+    async with conn.transaction():
+        await conn.execute(create_equipment_staging_query)
+        await conn.copy_records_to_table("equipment_staging", records=records)
+        unknown = await conn.fetch(get_equipment_staging_unknown_responsible_query)
+        errors = [(row['line_number'], f"працівника з telegram_id {row['responsible_telegram_id']} не знайдено")
+                  for row in unknown]
+        if errors:
+            await conn.execute(delete_equipment_staging_unknown_responsible_query)
+        await conn.execute(upsert_equipment_with_id_from_staging_query)
+        # Послідовність зсувається за явні id до вставки рядків без id, інакше вони отримали б зайняті id
+        await conn.execute(sync_equipment_id_sequence_query)
+        await conn.execute(insert_equipment_without_id_from_staging_query)
+        await _notify_catalogue_changed(conn, always=True)
+    return errors
+
+async def bulk_upsert_equipment(records: list):
+    """
+    Масово додає або оновлює обладнання одним COPY та однією транзакцією.
+
+    Рядки з ID оновлюють існуюче обладнання (або створюють його з цим ID), рядки без ID додають нове обладнання.
+    Рядки з невідомим відповідальним працівником пропускаються й повертаються як помилки.
+
+    :param records: Список кортежів (номер рядка, id або None, name, description, location, status,
+                    telegram_id відповідального або None).
+    :return: Кортеж (кількість імпортованого обладнання, список пар (номер рядка, текст помилки)).
+    """
+    if not records:
+        return 0, []
+    errors = await _bulk_upsert_equipment(records)
+    invalidate_equipment_catalogue()
+    return len(records) - len(errors), errors
+
+
+@db_operation("Помилка при масовому переміщенні обладнання", idempotent=False)
+@instrument_query
+async def relocate_equipment_bulk(conn, equipment_ids: list, new_location: str):
+    """
+    Атомарно переміщує кілька одиниць обладнання на нову локацію та записує всі рухи одним виразом.
+
+    :param equipment_ids: Список ID обладнання.
+    :param new_location: Нове місцезнаходження обладнання.
+    :return: Список ID переміщеного обладнання (без того, що вже було на цій локації).
+    """
+    rows = await conn.fetch(bulk_relocate_equipment_query, list(equipment_ids), new_location)
+    moved_ids = [row['equipment_id'] for row in rows]
+    for equipment_id in moved_ids:
+        _patch_catalogue_equipment(equipment_id, location=new_location)
+    if moved_ids:
+        await _notify_catalogue_changed(conn)
+    print(f"Переміщено {len(moved_ids)} одиниць обладнання на {new_location}.")
+    return moved_ids
+
+@db_operation("Помилка при масовому оновленні статусу обладнання")
+@instrument_query
+async def update_equipment_status_bulk(conn, equipment_ids: list, new_status: str):
+    """
+    Оновлює статус кількох одиниць обладнання одним виразом.
+
+    :param equipment_ids: Список ID обладнання.
+    :param new_status: Новий статус для обладнання.
+    :return: Список ID оновленого обладнання.
+    """
+    rows = await conn.fetch(bulk_update_equipment_status_query, new_status, list(equipment_ids))
+    updated_ids = [row['id'] for row in rows]
+    for equipment_id in updated_ids:
+        _patch_catalogue_equipment(equipment_id, status=new_status)
+    if updated_ids:
+        await _notify_catalogue_changed(conn)
+    print(f"Статус {len(updated_ids)} одиниць обладнання оновлено на '{new_status}'.")
+    return updated_ids
+
+@db_operation("Помилка при отриманні зведення за локаціями")
+@instrument_query
+async def get_equipment_occupancy(conn):
+    """
+    Отримує кількість обладнання в кожній локації за статусами.
+
+    Зведення підтримується тригерами при кожній зміні обладнання, тому запит не сканує каталог.
+
+    :return: Словник {локація: {статус: кількість}}.
+    """
+    rows = await conn.fetch(get_equipment_occupancy_query)
+    occupancy = {}
+    for row in rows:
+        occupancy.setdefault(row['location'], {})[row['status']] = row['item_count']
+    return occupancy
+
+@db_operation("Помилка при бронюванні обладнання", idempotent=False)
+@instrument_query
+async def create_reservation(conn, equipment_id: int, employee_id: int, starts_at, ends_at):
+    """
+    Бронює обладнання на проміжок часу [starts_at, ends_at).
+
+    Перетин з іншими бронюваннями перевіряє обмеження-виключення в базі даних,
+    тому два одночасні запити на той самий час не можуть обидва пройти.
+
+    :param equipment_id: ID обладнання.
+    :param employee_id: ID працівника, який бронює обладнання.
+    :param starts_at: Початок бронювання (datetime з часовим поясом).
+    :param ends_at: Кінець бронювання (не включно).
+    :return: ID нового бронювання.
+    :raises ConflictError: Якщо проміжок перетинається з іншим бронюванням цього обладнання.
+    :raises NotFoundError: Якщо обладнання (або працівника) не існує.
+    """
     try:
-        # Виконання запиту для отримання всіх рухів обладнання
-        rows = await conn.fetch(get_all_equipment_movements_query)
+        reservation_id = await conn.fetchval(insert_reservation_query, equipment_id, employee_id, starts_at, ends_at)
+    except asyncpg.exceptions.ExclusionViolationError:
+        raise ConflictError(f"Обладнання з ID {equipment_id} вже заброньовано на цей час.")
+    except asyncpg.exceptions.ForeignKeyViolationError:
+        raise NotFoundError(f"Обладнання з ID {equipment_id} не знайдено.")
+    print(f"Обладнання з ID {equipment_id} заброньовано працівником {employee_id}, бронювання з ID {reservation_id}.")
+    return reservation_id
 
-        # Якщо є результати, створюємо список об'єктів EquipmentMovement
-        equipment_movements = [EquipmentMovement(**row) for row in rows]
-        return equipment_movements
-    except Exception as e:
-        print(f"Помилка при отриманні рухів обладнання: {e}")
-        return []
-    finally:
-        # Закриття підключення
-        await conn.close()
+@db_operation("Помилка при отриманні бронювань обладнання")
+@instrument_query
+async def get_conflicting_reservations(conn, equipment_id: int, starts_at, ends_at):
+    """
+    Отримує бронювання обладнання, що перетинаються з проміжком [starts_at, ends_at).
+
+    :param equipment_id: ID обладнання.
+    :param starts_at: Початок проміжку.
+    :param ends_at: Кінець проміжку (не включно).
+    :return: Список об'єктів Reservation.
+    """
+    rows = await conn.fetch(get_conflicting_reservations_query, equipment_id, starts_at, ends_at)
+    return [Reservation.from_record(row) for row in rows]
+
+@db_operation("Помилка при отриманні бронювань працівника")
+@instrument_query
+async def get_employee_reservations(conn, employee_id: int):
+    """
+    Отримує поточні та майбутні бронювання працівника разом із назвами обладнання.
 
-    async def update_equipment_status(equipment_id: int, new_status: str):
-        """
-        Оновлює статус обладнання в базі даних.
+    :param employee_id: ID працівника.
+    :return: Список пар (Reservation, назва обладнання) за часом початку.
+    """
+    rows = await conn.fetch(get_employee_reservations_query, employee_id)
+    return [(Reservation.from_record(row), row['equipment_name']) for row in rows]
+
+@db_operation("Помилка при скасуванні бронювання")
+@instrument_query
+async def cancel_reservation(conn, reservation_id: int, employee_id: int):
+    """
+    Скасовує бронювання працівника.
+
+    :param reservation_id: ID бронювання.
+    :param employee_id: ID працівника (скасувати можна лише власне бронювання).
+    :return: True, якщо бронювання скасовано, або False, якщо його вже немає.
+    """
+    deleted_id = await conn.fetchval(delete_reservation_query, reservation_id, employee_id)
+    return deleted_id is not None
+
+@db_operation("Помилка при додаванні сповіщень до черги", idempotent=False)
+@instrument_query
+async def _enqueue_equipment_notifications(conn, equipment_ids: list, kind: str, new_value: str,
+                                           actor_telegram_id: int = None):
+    result = await conn.execute(enqueue_notification_events_query, list(equipment_ids), kind, new_value,
+                                actor_telegram_id)
+    return int(result.split()[-1])
+
+async def enqueue_equipment_notifications(equipment_ids: list, kind: str, new_value: str, actor_telegram_id: int = None):
+    """
+    Додає до черги сповіщення відповідальним працівникам про зміну обладнання.
+
+    Одна вставка на всі одиниці обладнання; самі повідомлення надсилає фоновий обробник черги.
+
+    :param equipment_ids: Список ID зміненого обладнання.
+    :param kind: Вид зміни ('location' або 'status').
+    :param new_value: Нова локація або новий статус.
+    :param actor_telegram_id: Telegram ID працівника, який зробив зміну (його не сповіщаємо), або None.
+    :return: Кількість доданих подій.
+    """
+    if not equipment_ids:
+        return 0
+    return await _enqueue_equipment_notifications(equipment_ids, kind, new_value, actor_telegram_id)
+
+@db_operation("Помилка при отриманні сповіщень з черги")
+@instrument_query
+async def claim_notification_events(conn, coalesce_window: float, max_groups: int, lease: float, max_attempts: int):
+    """
+    Захоплює події сповіщень, готові до надсилання, на час оренди.
+
+    Якщо надсилання не завершиться (наприклад, бот перезапуститься), після закінчення оренди події
+    захопить наступний виклик. Події, що вичерпали max_attempts спроб, видаляються.
+
+    :param coalesce_window: Скільки секунд чекати після першої зміни, щоб об'єднати наступні зміни в одне повідомлення.
+    :param max_groups: Максимальна кількість груп (отримувач, обладнання) за один виклик.
+    :param lease: Тривалість оренди захоплених подій у секундах.
+    :param max_attempts: Максимальна кількість спроб надіслати подію.
+    :return: Список записів подій.
+    """
+    await conn.execute(delete_exhausted_notification_events_query, max_attempts)
+    return await conn.fetch(claim_notification_events_query, float(coalesce_window), max_groups, float(lease))
+
+@db_operation("Помилка при видаленні сповіщень з черги")
+@instrument_query
+async def _delete_notification_events(conn, event_ids: list):
+    await conn.execute(delete_notification_events_query, list(event_ids))
+
+async def delete_notification_events(event_ids: list):
+    """
+    Видаляє з черги надіслані (або більше не потрібні) події сповіщень.
+
+    :param event_ids: Список ID подій.
+    """
+    if event_ids:
+        await _delete_notification_events(event_ids)
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _partition_month(partition_name: str) -> tuple:
+    # equipment_movements_y2024m05 -> (2024, 5)
+    suffix = partition_name.rsplit("_", 1)[1]
+    return int(suffix[1:5]), int(suffix[6:8])
+
+@db_operation("Помилка при обслуговуванні секцій рухів обладнання", timeout=DB_BULK_TIMEOUT)
+@instrument_query
+async def _maintain_equipment_movement_partitions(conn, months_ahead: int, retention_months: int,
+                                                  archive_schema: str):
+    async with conn.transaction():
+        if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1);", MOVEMENTS_MAINTENANCE_LOCK_ID):
+            return 0, []
+        created = await conn.fetchval(ensure_equipment_movement_partitions_query, months_ahead)
+        created += await conn.fetchval(ensure_equipment_movement_partitions_from_default_query)
+
+        detached = []
+        if retention_months is not None:
+            now = datetime.now(timezone.utc)
+            cutoff = now.year * 12 + now.month - 1 - retention_months
+            if archive_schema:
+                await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {_quote_identifier(archive_schema)};")
+            for row in await conn.fetch(get_equipment_movement_partitions_query):
+                year, month = _partition_month(row['relname'])
+                if year * 12 + month - 1 >= cutoff:
+                    continue
+                partition = _quote_identifier(row['relname'])
+                await conn.execute(f"ALTER TABLE equipment_movements DETACH PARTITION {partition};")
+                if archive_schema:
+                    archived = f"{_quote_identifier(archive_schema)}.{partition}"
+                    # Секцію цього місяця вже архівовано раніше (її знову створено з рядків секції за замовчуванням)
+                    if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL;", archived):
+                        await conn.execute(f"INSERT INTO {archived} SELECT * FROM {partition};")
+                        await conn.execute(f"DROP TABLE {partition};")
+                    else:
+                        await conn.execute(f"ALTER TABLE {partition} SET SCHEMA {_quote_identifier(archive_schema)};")
+                else:
+                    await conn.execute(f"DROP TABLE {partition};")
+                detached.append(row['relname'])
+    return created, detached
 
-        :param equipment_id: ID обладнання, для якого потрібно оновити статус.
-        :param new_status: Новий статус для обладнання.
-        """
-        conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+async def maintain_equipment_movement_partitions(months_ahead: int = MOVEMENTS_PARTITIONS_AHEAD,
+                                                 retention_months: int = MOVEMENTS_RETENTION_MONTHS,
+                                                 archive_schema: str = MOVEMENTS_ARCHIVE_SCHEMA):
+    """
+    Створює секції equipment_movements на найближчі місяці та для рядків, що потрапили в секцію
+    за замовчуванням, і від'єднує секції, старші за термін зберігання.
+
+    Від'єднані секції переносяться в схему архіву (або видаляються, якщо схему не задано);
+    денне зведення equipment_movement_daily при цьому зберігається.
 
+    :param months_ahead: На скільки місяців наперед створювати секції.
+    :param retention_months: Скільки повних місяців зберігати крім поточного (None - зберігати все).
+    :param archive_schema: Схема для від'єднаних секцій, або None, щоб їх видаляти.
+    :return: Кортеж (кількість створених секцій, список від'єднаних секцій).
+    """
+    created, detached = await _maintain_equipment_movement_partitions(months_ahead, retention_months, archive_schema)
+    if created or detached:
+        print(f"Секції рухів обладнання: створено {created}, від'єднано {detached}.")
+    return created, detached
+
+async def _run_partition_maintenance():
+    while True:
         try:
-            # Виконання запиту на оновлення статусу
-            result = await conn.execute(update_equipment_status_query, new_status, equipment_id)
+            await maintain_equipment_movement_partitions()
+        except StorageError as e:
+            print(f"Обслуговування секцій рухів обладнання відкладено: {e}")
+        await asyncio.sleep(MOVEMENTS_MAINTENANCE_INTERVAL)
 
-            if result == "UPDATE 1":
-                print(f"Статус обладнання з ID {equipment_id} успішно оновлено на '{new_status}'.")
-            else:
-                print(f"Не вдалося оновити статус для обладнання з ID {equipment_id}.")
-        except Exception as e:
-            print(f"Помилка при оновленні статусу обладнання: {e}")
-        finally:
-            # Закриття підключення
-            await conn.close()
\ No newline at end of file
+def start_partition_maintenance():
+    """
+    Запускає фонове обслуговування секцій equipment_movements (одразу та далі з інтервалом із конфігурації).
+    """
+    global _maintenance_task
+    if _maintenance_task is None:
+        _maintenance_task = asyncio.create_task(_run_partition_maintenance())
+
+async def stop_partition_maintenance():
+    """
+    Зупиняє фонове обслуговування секцій equipment_movements.
+    """
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        try:
+            await _maintenance_task
+        except asyncio.CancelledError:
+            pass
+        _maintenance_task = None
+
+@db_operation("Помилка при формуванні звіту про рухи обладнання")
+@instrument_query
+async def get_movement_report(conn, date_from: date, date_to: date, top_equipment: int):
+    """
+    Формує звіт про рухи обладнання за період з денного зведення, не читаючи журнал рухів.
+
+    :param date_from: Перший день періоду (UTC, включно).
+    :param date_to: Останній день періоду (UTC, включно).
+    :param top_equipment: Скільки найчастіше переміщуваних одиниць обладнання повернути.
+    :return: Кортеж (список (локація, прибуття, відбуття), список (ID обладнання, назва, кількість переміщень)).
+    """
+    locations = await conn.fetch(get_location_movement_totals_query, date_from, date_to)
+    equipment = await conn.fetch(get_most_moved_equipment_query, date_from, date_to, top_equipment)
+    return ([(row['location'], row['arrivals'], row['departures']) for row in locations],
+            [(row['equipment_id'], row['name'], row['moves']) for row in equipment])
@@ -0,0 +1,143 @@
+import asyncio
+import random
+import time
+
+import asyncpg
+
+# Конфлікти паралельних транзакцій: транзакцію відкочено, база доступна, запит можна повторити навіть для запису
+TRANSACTION_CONFLICT_ERRORS = (
+    asyncpg.exceptions.SerializationError,
+    asyncpg.exceptions.DeadlockDetectedError,
+)
+
+# Сервер відхилив підключення (запускається або перевантажений): запит не виконувався
+SERVER_UNAVAILABLE_ERRORS = (
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.TooManyConnectionsError,
+)
+
+# Помилки з'єднання: запит міг бути виконаний до обриву, тому повторюються лише ідемпотентні операції
+CONNECTION_ERRORS = (
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+    asyncpg.exceptions.InterfaceError,
+    ConnectionError,
+    OSError,
+)
+
+
+def is_unavailable(error: Exception) -> bool:
+    """
+    Визначає, чи означає помилка недоступність бази даних (а не помилку в самому запиті чи даних).
+
+    :param error: Виняток.
+    :return: True для помилок з'єднання, перевантаження сервера та тайм-аутів.
+    """
+    return isinstance(error, SERVER_UNAVAILABLE_ERRORS + CONNECTION_ERRORS + (asyncio.TimeoutError,
+                                                                              asyncpg.exceptions.QueryCanceledError))
+
+
+def is_retryable(error: Exception, idempotent: bool) -> bool:
+    """
+    Визначає, чи можна повторити операцію після помилки.
+
+    Тайм-аути не повторюються: запит, що завис, найімовірніше зависне знову, а повтори лише подовжать очікування.
+
+    :param error: Виняток.
+    :param idempotent: Чи безпечно виконати операцію повторно, якщо перша спроба могла встигнути застосуватись.
+    :return: True, якщо операцію варто повторити.
+    """
+    # asyncio.TimeoutError з Python 3.11 є підкласом OSError, тому перевіряється першим
+    if isinstance(error, asyncio.TimeoutError):
+        return False
+    if isinstance(error, TRANSACTION_CONFLICT_ERRORS + SERVER_UNAVAILABLE_ERRORS):
+        return True
+    return idempotent and isinstance(error, CONNECTION_ERRORS)
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Затримка перед повтором: експоненційна з повним випадковим розкидом, щоб процеси не повторювали запити одночасно.
+
+    :param attempt: Номер невдалої спроби, починаючи з 1.
+    :param base_delay: Затримка після першої спроби (секунди).
+    :param max_delay: Найбільша затримка (секунди).
+    :return: Затримка в секундах.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+# Запобіжник (circuit breaker): після кількох поспіль збоїв доступу до БД запити одразу відхиляються,
+# доки не мине reset_timeout; потім пропускається один пробний запит, успіх якого знову замикає запобіжник.
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Ініціалізація запобіжника.
+
+        :param failure_threshold: Кількість збоїв поспіль, після якої запобіжник розмикається.
+        :param reset_timeout: Секунди, протягом яких запити відхиляються без звернення до БД.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = None
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """
+        Перевіряє, чи можна зараз звертатися до БД.
+
+        :return: True, якщо запит можна виконати (у напіврозімкненому стані - лише один пробний запит).
+        """
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return True
+        # Пробний запит, що так і не завершився (наприклад, його задачу скасовано), не блокує наступну пробу
+        if self.state == self.HALF_OPEN and (self._probe_started_at is None
+                                              or now - self._probe_started_at >= self.reset_timeout):
+            self._probe_started_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        """
+        Позначає успішне звернення до БД (зокрема з помилкою в даних - база доступна).
+        """
+        self._failures = 0
+        self._probe_started_at = None
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        """
+        Позначає збій доступу до БД.
+        """
+        self._failures += 1
+        self._probe_started_at = None
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """
+        Повертає стан і лічильники запобіжника.
+
+        :return: Словник зі станом, кількістю збоїв поспіль, розмикань та відхилених запитів.
+        """
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
@@ -1,19 +1,42 @@
 import logging
-import asyncio
-import time
-from datetime import datetime
-
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
-from db_manager import create_tables, get_employee_by_telegram_id, get_all_equipment, get_available_equipment, get_responsible_employee_for_equipment, update_equipment_location, insert_equipment_movement, get_equipment_by_id, get_all_equipment_movements, update_equipment_status as update_equipment_status_db
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler, MessageHandler, InlineQueryHandler, filters
+from telegram.error import TelegramError
+from storage import Storage, PostgresStorage
+from memory_storage import MemoryStorage
+from errors import StorageError, StorageUnavailableError, ConflictError, NotFoundError
 
 # Встановлюємо токен бота
 from config import API_TELEGRAM_TOKEN as API_TOKEN
-from models import EquipmentMovement
-
-LOCATIONS = "Аудиторія 3.333", "Інженерна кімната", "Co-working-зона", "Виробнича зона", "Ремонтна майстерня", "Внутрішній дворик"
-
-STATUS_LIST = "Доступний", "Зайнятий"
+from config import STORAGE_BACKEND
+from config import EQUIPMENT_PAGE_SIZE
+from config import SEND_GLOBAL_RATE, SEND_PER_CHAT_INTERVAL, SEND_MAX_RETRIES
+from config import LOCATIONS, STATUS_LIST
+from config import ADMIN_TELEGRAM_IDS
+from config import IMPORT_UPLOAD_MAX_BYTES, IMPORT_UPLOAD_MAX_ROWS
+from config import METRICS_HTTP_HOST, METRICS_HTTP_PORT
+from config import TELEGRAM_BASE_URL
+from config import SEARCH_CACHE_TTL
+from config import CONCURRENT_UPDATES
+from config import WEBHOOK_ENABLED, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_URL_PATH, WEBHOOK_URL, WEBHOOK_SECRET_TOKEN
+from config import REPORT_DEFAULT_DAYS, REPORT_TOP_EQUIPMENT, REPORT_MAX_DAYS
+from config import RESERVATION_TIMEZONE, RESERVATION_MAX_DAYS, RESERVATION_FREE_LIST_LIMIT
+from config import NOTIFY_ENABLED, NOTIFY_COALESCE_WINDOW, NOTIFY_POLL_INTERVAL, NOTIFY_BATCH_SIZE, \
+    NOTIFY_SEND_CONCURRENCY, NOTIFY_LEASE, NOTIFY_MAX_ATTEMPTS
+from callbacks import encode_callback, decode_callback, MOVE, MOVE_TO, STATUS, STATUS_TO, EQUIPMENT_PAGE, \
+    MOVEMENTS_OLDER, MOVEMENTS_NEWER, SELECT_MODE, SELECT_CANCEL, TOGGLE, BULK_MOVE, BULK_MOVE_TO, BULK_STATUS, \
+    BULK_STATUS_TO, RESERVATION_CANCEL
+from rate_limiter import ChatRateLimiter
+from update_processor import PerChatUpdateProcessor
+from export import export_movements_csv
+from bulk_import import import_csv, format_import_report
+from metrics import instrument_handler, format_stats, start_metrics_server
+from notifications import NotificationWorker, NOTIFY_LOCATION, NOTIFY_STATUS
 
 # Налаштовуємо логування
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -26,70 +49,286 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     print("start called")
     await update.message.reply_text(
         'Привіт! Я бот для обліку обладнання. Використовуй команди, щоб дізнатися інформацію про обладнання. /help')
-    await create_tables()
     print(update.message.from_user.id)
 
+# Текстовий опис відповідального працівника для повідомлення про обладнання
+def format_responsible(responsible_employee, full: bool = True) -> str:
+    if responsible_employee is None:
+        return "Відповідальний: не призначено"
+    if full:
+        return (f"Відповідальний: {responsible_employee.first_name} {responsible_employee.last_name}\n"
+                f"Контакти: @{responsible_employee.telegram_username}\n"
+                f"Phone: {responsible_employee.contact_number}\n"
+                f"Mail: {responsible_employee.email}")
+    return (f"Відповідальний: {responsible_employee.first_name} {responsible_employee.last_name}\n"
+            f"Зв'язатися @{responsible_employee.telegram_username}")
+
+# Формування тексту та клавіатури для однієї сторінки списку обладнання
+# Текст одиниці обладнання: працівникам - повна інформація, іншим користувачам - коротка
+def format_equipment(equipment, responsible_employee, staff: bool) -> str:
+    if staff:
+        return (f"Назва: {equipment.name}\n"
+                f"Опис: {equipment.description}\n"
+                f"Місцезнаходження: {equipment.location}\n"
+                f"Статус: {equipment.status}\n"
+                f"{format_responsible(responsible_employee)}")
+    return (f"Назва: {equipment.name}\n"
+            f"Опис: {equipment.description}\n"
+            f"{format_responsible(responsible_employee, full=False)}")
+
+# Кнопки дій з обладнанням для працівників (number - номер у списку, None - без номера)
+def equipment_action_buttons(equipment, number: int = None) -> list:
+    prefix = f"{number}. " if number is not None else ""
+    buttons = []
+    if equipment.status == 'Доступний':
+        buttons.append(InlineKeyboardButton(f"{prefix}Перемістити", callback_data=encode_callback(MOVE, equipment.id)))
+    buttons.append(InlineKeyboardButton(f"{prefix}Змінити статус", callback_data=encode_callback(STATUS, equipment.id)))
+    return buttons
+
+# Текст та рядки клавіатури для кількох одиниць обладнання, пронумерованих з first_number
+def render_equipment_items(entries, first_number: int, staff: bool, selected: set = None, page: int = 0):
+    message = ""
+    keyboard = []
+    for number, (equipment, responsible_employee) in enumerate(entries, start=first_number):
+        message += f"{number}. {format_equipment(equipment, responsible_employee, staff)}\n\n"
+        if not staff:
+            continue
+        if selected is not None:
+            mark = "☑" if equipment.id in selected else "☐"
+            keyboard.append([InlineKeyboardButton(f"{mark} {number}. {equipment.name}",
+                                                  callback_data=encode_callback(TOGGLE, equipment.id, page))])
+        else:
+            keyboard.append(equipment_action_buttons(equipment, number))
+    return message, keyboard
+
+# selected - множина вибраних ID обладнання в режимі вибору кількох одиниць, або None поза цим режимом
+def render_equipment_page(equipment_list, page: int, staff: bool, selected: set = None):
+    if not equipment_list:
+        return "Обладнання не знайдено", None
+
+    total_pages = (len(equipment_list) + EQUIPMENT_PAGE_SIZE - 1) // EQUIPMENT_PAGE_SIZE
+    page = min(max(page, 0), total_pages - 1)
+    first = page * EQUIPMENT_PAGE_SIZE
+    chunk = equipment_list[first:first + EQUIPMENT_PAGE_SIZE]
+
+    message, keyboard = render_equipment_items(chunk, first + 1, staff, selected=selected, page=page)
+    message = f"Ось список обладнання (сторінка {page + 1}/{total_pages})\n\n" + message
+
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton("« Назад", callback_data=encode_callback(EQUIPMENT_PAGE, page - 1)))
+    if page < total_pages - 1:
+        navigation.append(InlineKeyboardButton("Далі »", callback_data=encode_callback(EQUIPMENT_PAGE, page + 1)))
+    if navigation:
+        keyboard.append(navigation)
+
+    if staff and selected is None:
+        keyboard.append([InlineKeyboardButton("Вибрати кілька", callback_data=encode_callback(SELECT_MODE, page))])
+    elif staff:
+        keyboard.append([
+            InlineKeyboardButton(f"Перемістити вибране ({len(selected)})", callback_data=encode_callback(BULK_MOVE)),
+            InlineKeyboardButton("Статус вибраного", callback_data=encode_callback(BULK_STATUS)),
+        ])
+        keyboard.append([InlineKeyboardButton("Скасувати вибір", callback_data=encode_callback(SELECT_CANCEL, page))])
+
+    reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else None
+    return message, reply_markup
+
 # Функція для команди /equipment
 async def equipment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    employee = await get_employee_by_telegram_id(update.message.chat.id)
-    await update.message.reply_text("Ось список обладнання")
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
 
-    if employee:
-        equipment_list = await get_all_equipment()
-        for equipment in equipment_list:
-            print(equipment)
-            responsible_employee = await get_responsible_employee_for_equipment(equipment.id)
-            message = (f"Назва: {equipment.name}\n"
-                      f"Опис: {equipment.description}\n"
-                      f"Місцезнаходження: {equipment.location}\n"
-                      f"Статус: {equipment.status}\n"
-                      f"Відповідальний: {responsible_employee.first_name} {responsible_employee.last_name}\n"
-                      f"Контакти: @{responsible_employee.telegram_username}\n"
-                      f"Phone: {responsible_employee.contact_number}\n"
-                      f"Mail: {responsible_employee.email}")
-            if equipment.status == 'Доступний':
-                keyboard = [
-                    [
-                        InlineKeyboardButton("Перемістити обладнання", callback_data=f"move_{equipment.id}"),
-                        InlineKeyboardButton("Змінити статус", callback_data=f"upd_status_{equipment.id}")
-                     ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await update.message.reply_text(message, reply_markup=reply_markup)
-            else:
-                keyboard = [
-                    [
-                        InlineKeyboardButton("Змінити статус", callback_data=f"upd_status_{equipment.id}")
-                     ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                await update.message.reply_text(message, reply_markup=reply_markup)
-    else:
-        equipment_list = await get_available_equipment()
-        for equipment in equipment_list:
-            print(equipment)
-            responsible_employee = await get_responsible_employee_for_equipment(equipment.id)
-            await update.message.reply_text(f"Назва: {equipment.name}\n"
-                                            f"Опис: {equipment.description}\n"
-                                            f"Відповідальний: {responsible_employee.first_name} {responsible_employee.last_name}\n"
-                                            f"Зв'язатися @{responsible_employee.telegram_username}\n")
-
-async def move_equipment(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Новий список завжди відкривається без режиму вибору
+    context.user_data.pop("selected_equipment", None)
+
+    # Працівники бачать усе обладнання, інші користувачі - лише доступне
+    equipment_list = await storage.get_equipment_with_responsible(only_available=not employee)
+    message, reply_markup = render_equipment_page(equipment_list, page=0, staff=bool(employee))
+    await update.message.reply_text(message, reply_markup=reply_markup)
+
+# Оновлення повідомлення зі списком обладнання на вказаній сторінці
+async def show_equipment_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int):
+    storage = context.bot_data["storage"]
     query = update.callback_query
-    print(query.data)
+    employee = await storage.get_employee_by_telegram_id(query.from_user.id)
+
+    equipment_list = await storage.get_equipment_with_responsible(only_available=not employee)
+    selected = context.user_data.get("selected_equipment") if employee else None
+    message, reply_markup = render_equipment_page(equipment_list, page=page, staff=bool(employee), selected=selected)
+    await query.edit_message_text(message, reply_markup=reply_markup)
+
+# Функція для команди /locations - кількість обладнання в кожній локації за статусами
+async def locations(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
+    if not employee:
+        return
+
+    occupancy = await storage.get_equipment_occupancy()
+    # Спочатку відомі локації в порядку LOCATIONS, потім інші значення з бази
+    names = list(LOCATIONS) + sorted(name for name in occupancy if name not in LOCATIONS)
+    message = "Обладнання за локаціями\n\n"
+    for name in names:
+        counts = occupancy.get(name, {})
+        statuses = list(STATUS_LIST) + sorted(status for status in counts if status not in STATUS_LIST)
+        details = ", ".join(f"{status}: {counts.get(status, 0)}" for status in statuses)
+        message += f"{name} - {sum(counts.values())} ({details})\n"
+    await update.message.reply_text(message)
+
+# Функція для команди /find <текст> - пошук обладнання за назвою та описом
+async def find(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    storage = context.bot_data["storage"]
+    text = " ".join(context.args)
+    if not text:
+        await update.message.reply_text("Використання: /find <назва або опис обладнання>")
+        return
+
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
+    results = await storage.search_equipment(text, only_available=not employee)
+    if not results:
+        await update.message.reply_text(f"За запитом «{text}» нічого не знайдено")
+        return
+
+    message, keyboard = render_equipment_items(results, 1, staff=bool(employee))
+    reply_markup = InlineKeyboardMarkup(keyboard) if keyboard else None
+    await update.message.reply_text(f"Результати пошуку «{text}»\n\n" + message, reply_markup=reply_markup)
+
+# Обробка inline-запитів (@бот <текст>) - пошук обладнання в будь-якому чаті
+async def inline_search(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    storage = context.bot_data["storage"]
+    inline_query = update.inline_query
+    text = inline_query.query.strip()
+    if len(text) < 2:
+        await inline_query.answer([], cache_time=SEARCH_CACHE_TTL, is_personal=True)
+        return
+
+    employee = await storage.get_employee_by_telegram_id(inline_query.from_user.id)
+    results = await storage.search_equipment(text, only_available=not employee)
+    articles = [
+        InlineQueryResultArticle(
+            id=str(equipment.id),
+            title=equipment.name,
+            description=f"{equipment.location} · {equipment.status}",
+            input_message_content=InputTextMessageContent(format_equipment(equipment, responsible_employee,
+                                                                           staff=bool(employee))),
+            reply_markup=InlineKeyboardMarkup([equipment_action_buttons(equipment)]) if employee else None,
+        )
+        for equipment, responsible_employee in results
+    ]
+    # Працівники та інші користувачі бачать різні результати, тому кеш Telegram - персональний
+    await inline_query.answer(articles, cache_time=SEARCH_CACHE_TTL, is_personal=True)
+
+# Обробка натискання кнопок "Назад"/"Далі" у списку обладнання
+async def equipment_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int):
+    await update.callback_query.answer()
+    await show_equipment_page(update, context, page)
+
+# Увімкнення режиму вибору кількох одиниць обладнання (вибір зберігається в context.user_data)
+async def start_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int):
+    await update.callback_query.answer()
+    context.user_data["selected_equipment"] = set()
+    await show_equipment_page(update, context, page)
+
+# Вимкнення режиму вибору
+async def cancel_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, page: int):
+    await update.callback_query.answer()
+    context.user_data.pop("selected_equipment", None)
+    await show_equipment_page(update, context, page)
+
+# Позначка або зняття позначки з обладнання в режимі вибору
+async def toggle_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, equipment_id: int, page: int):
+    await update.callback_query.answer()
+    selected = context.user_data.setdefault("selected_equipment", set())
+    selected.symmetric_difference_update({equipment_id})
+    await show_equipment_page(update, context, page)
+
+# Перевірка, що користувач - працівник і вибрав хоча б одну одиницю обладнання
+async def get_bulk_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    storage = context.bot_data["storage"]
+    query = update.callback_query
+    selected = context.user_data.get("selected_equipment")
+    if not selected or not await storage.get_employee_by_telegram_id(query.from_user.id):
+        await query.answer("Спочатку виберіть обладнання у списку /equipment.")
+        return None
     await query.answer()
+    return selected
 
-    # Отримуємо ID обладнання з callback_data
-    equipment_id = query.data.split("_")[1]
+# Вибір локації для переміщення всього вибраного обладнання
+async def bulk_move(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    selected = await get_bulk_selection(update, context)
+    if not selected:
+        return
 
-    # Отримуємо список доступних локацій
-    locations = LOCATIONS
+    indexes = range(len(LOCATIONS))
+    rows = [indexes[i:i + 3] for i in range(0, len(indexes), 3)]
+    keyboard = [
+        [InlineKeyboardButton(LOCATIONS[index], callback_data=encode_callback(BULK_MOVE_TO, index)) for index in row]
+        for row in rows
+    ]
+    await update.callback_query.edit_message_text(
+        f"Оберіть нову локацію для вибраного обладнання ({len(selected)}):",
+        reply_markup=InlineKeyboardMarkup(keyboard))
+
+# Додавання сповіщень відповідальним до черги; збій черги не скасовує вже виконану зміну обладнання
+async def notify_responsible(storage: Storage, equipment_ids, kind: str, new_value: str, actor_telegram_id: int):
+    try:
+        await storage.enqueue_equipment_notifications(equipment_ids, kind, new_value, actor_telegram_id)
+    except StorageError as e:
+        print(f"Сповіщення про зміну обладнання {equipment_ids} не додано до черги: {e}")
+
+# Переміщення всього вибраного обладнання однією транзакцією
+async def bulk_move_to(update: Update, context: ContextTypes.DEFAULT_TYPE, location_index: int):
+    storage = context.bot_data["storage"]
+    selected = await get_bulk_selection(update, context)
+    if not selected:
+        return
+
+    location = LOCATIONS[location_index]
+    moved_ids = await storage.relocate_equipment_bulk(sorted(selected), location)
+    context.user_data.pop("selected_equipment", None)
+    await update.callback_query.edit_message_text(
+        f"Переміщено на локацію {location}: {len(moved_ids)} з {len(selected)} вибраних одиниць обладнання.")
+    await notify_responsible(storage, moved_ids, NOTIFY_LOCATION, location, update.callback_query.from_user.id)
+
+# Вибір статусу для всього вибраного обладнання
+async def bulk_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    selected = await get_bulk_selection(update, context)
+    if not selected:
+        return
 
-    # Розбиваємо локації на групи по 2 або 3 елементи
-    rows = [locations[i:i + 3] for i in range(0, len(locations), 3)]
-    # Створюємо клавіатуру для вибору локації
     keyboard = [
-        [InlineKeyboardButton(location, callback_data=f"movee_to_{equipment_id}_{location}") for location in row]
+        [InlineKeyboardButton(status, callback_data=encode_callback(BULK_STATUS_TO, index))
+         for index, status in enumerate(STATUS_LIST)]
+    ]
+    await update.callback_query.edit_message_text(
+        f"Оновіть статус вибраного обладнання ({len(selected)}):", reply_markup=InlineKeyboardMarkup(keyboard))
+
+# Зміна статусу всього вибраного обладнання одним запитом
+async def bulk_status_to(update: Update, context: ContextTypes.DEFAULT_TYPE, status_index: int):
+    storage = context.bot_data["storage"]
+    selected = await get_bulk_selection(update, context)
+    if not selected:
+        return
+
+    new_status = STATUS_LIST[status_index]
+    updated_ids = await storage.update_equipment_status_bulk(sorted(selected), new_status)
+    context.user_data.pop("selected_equipment", None)
+    await update.callback_query.edit_message_text(
+        f"Статус {len(updated_ids)} одиниць обладнання оновлено на {new_status}")
+    await notify_responsible(storage, updated_ids, NOTIFY_STATUS, new_status, update.callback_query.from_user.id)
+
+async def move_equipment(update: Update, context: ContextTypes.DEFAULT_TYPE, equipment_id: int):
+    query = update.callback_query
+    await query.answer()
+
+    # Розбиваємо індекси локацій на групи по 3 елементи
+    indexes = range(len(LOCATIONS))
+    rows = [indexes[i:i + 3] for i in range(0, len(indexes), 3)]
+    # Створюємо клавіатуру для вибору локації (у callback_data передається індекс локації)
+    keyboard = [
+        [InlineKeyboardButton(LOCATIONS[index], callback_data=encode_callback(MOVE_TO, equipment_id, index))
+         for index in row]
         for row in rows
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -98,74 +337,413 @@ async def move_equipment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.edit_message_text("Оберіть нову локацію для переміщення обладнання:", reply_markup=reply_markup)
 
 # Обробка натискання на вибір локації
-async def move_to_location(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def move_to_location(update: Update, context: ContextTypes.DEFAULT_TYPE, equipment_id: int,
+                           location_index: int) -> None:
+    storage = context.bot_data["storage"]
     query = update.callback_query
-    print(query.data)
     await query.answer()
 
-    # Отримуємо ID обладнання та локації з callback_data
-    data = query.data.split("_")
-    equipment_id = data[2]
-    location = data[3]
+    location = LOCATIONS[location_index]
     print(equipment_id, location)
 
     # Переміщуємо обладнання в нову локацію
-    # Функція для оновлення місця обладнання
-    await move_equipment_to_location(int(equipment_id), location)
+    movement_id = await move_equipment_to_location(storage, equipment_id, location)
 
-    await query.edit_message_text(f"Обладнання переміщено на нову локацію {location}.")
+    if movement_id:
+        await query.edit_message_text(f"Обладнання переміщено на нову локацію {location}.")
+        # Сповіщення відповідальному надсилає фоновий обробник черги, тож натискання не чекає на Bot API
+        await notify_responsible(storage, [equipment_id], NOTIFY_LOCATION, location, query.from_user.id)
+    else:
+        await query.edit_message_text("Не вдалося перемістити обладнання.")
 
 
-# Функція для переміщення обладнання на нову локацію (реалізуємо її за потребою)
-async def move_equipment_to_location(equipment_id, location):
-    equipment_location = await get_equipment_by_id(equipment_id)
-    await insert_equipment_movement(EquipmentMovement(equipment_id=equipment_id, from_location=equipment_location.location, to_location=location, movement_date=datetime.now()))
-    await update_equipment_location(equipment_id, location)
+# Функція для переміщення обладнання на нову локацію
+async def move_equipment_to_location(storage: Storage, equipment_id, location):
+    movement_id = await storage.relocate_equipment(equipment_id, location)
     print(f"Переміщення обладнання з ID {equipment_id} на локацію {location}")
-    pass
+    return movement_id
+
+# Початок відліку для кодування курсора сторінки рухів у callback_data
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# Кодування курсора (movement_date, id) у пару цілих чисел для callback_data
+def encode_movement_cursor(movement) -> tuple:
+    microseconds = (movement.movement_date - EPOCH) // timedelta(microseconds=1)
+    return microseconds, movement.id
+
+
+# Декодування курсора з callback_data у (movement_date, id)
+def decode_movement_cursor(microseconds: int, movement_id: int) -> tuple:
+    return EPOCH + timedelta(microseconds=microseconds), movement_id
+
+
+# Формування тексту та клавіатури для сторінки рухів обладнання
+def render_movements_page(page, has_older: bool, has_newer: bool):
+    if not page:
+        return "Рухів обладнання ще немає", None
+
+    message = "Ось список рухів обладнання\n\n"
+    for movement, equipment_name in page:
+        message += (f"Обладнання: {equipment_name}\n"
+                    f"Переміщено із {movement.from_location}\n"
+                    f"до {movement.to_location}\n"
+                    f"Дата переміщення: {movement.movement_date}\n")
+        message += "\n"
+
+    buttons = []
+    if has_newer:
+        buttons.append(InlineKeyboardButton("« Назад", callback_data=encode_callback(MOVEMENTS_NEWER, *encode_movement_cursor(page[0][0]))))
+    if has_older:
+        buttons.append(InlineKeyboardButton("Далі »", callback_data=encode_callback(MOVEMENTS_OLDER, *encode_movement_cursor(page[-1][0]))))
+    reply_markup = InlineKeyboardMarkup([buttons]) if buttons else None
+    return message, reply_markup
 
 async def equipment_movements(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    movements = await get_all_equipment_movements()
-    employee = await get_employee_by_telegram_id(update.message.chat.id)
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
     if employee:
-        message = "Ось список усіх рухів обладнання\n\n"
-        for movement in movements:
-            equipment = await get_equipment_by_id(movement.equipment_id)
-            message += (f"Обладнання: {equipment.name}\n"
-                        f"Переміщено із {movement.from_location}\n"
-                        f"до {movement.to_location}\n"
-                        f"Дата переміщення: {movement.movement_date}\n")
-            message += "\n"
-        await update.message.reply_text(message)
-
-async def update_equipment_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        page, has_older = await storage.get_equipment_movements_page()
+        message, reply_markup = render_movements_page(page, has_older=has_older, has_newer=False)
+        await update.message.reply_text(message, reply_markup=reply_markup)
+
+# Обробка натискання кнопки "Далі" у списку рухів обладнання
+async def equipment_movements_older(update: Update, context: ContextTypes.DEFAULT_TYPE, microseconds: int,
+                                    movement_id: int):
+    await show_movements_page(update, context, decode_movement_cursor(microseconds, movement_id), older=True)
+
+# Обробка натискання кнопки "Назад" у списку рухів обладнання
+async def equipment_movements_newer(update: Update, context: ContextTypes.DEFAULT_TYPE, microseconds: int,
+                                    movement_id: int):
+    await show_movements_page(update, context, decode_movement_cursor(microseconds, movement_id), older=False)
+
+async def show_movements_page(update: Update, context: ContextTypes.DEFAULT_TYPE, cursor: tuple, older: bool):
+    storage = context.bot_data["storage"]
     query = update.callback_query
-    print(query.data)
     await query.answer()
 
-    equipment_id = query.data.split("_")[2]
+    employee = await storage.get_employee_by_telegram_id(query.from_user.id)
+    if not employee:
+        return
 
-    status_options = STATUS_LIST
+    if older:
+        page, has_older = await storage.get_equipment_movements_page(older_than=cursor)
+        has_newer = True
+    else:
+        page, has_newer = await storage.get_equipment_movements_page(newer_than=cursor)
+        has_older = True
+
+    message, reply_markup = render_movements_page(page, has_older=has_older, has_newer=has_newer)
+    await query.edit_message_text(message, reply_markup=reply_markup)
+
+async def update_equipment_status(update: Update, context: ContextTypes.DEFAULT_TYPE, equipment_id: int):
+    query = update.callback_query
+    await query.answer()
 
     keyboard = [
-        [InlineKeyboardButton(status, callback_data=f"update_status_{equipment_id}_{status}") for status in
-         status_options]
+        [InlineKeyboardButton(status, callback_data=encode_callback(STATUS_TO, equipment_id, index))
+         for index, status in enumerate(STATUS_LIST)]
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
 
     await query.edit_message_text("Оновіть статус обладнання:", reply_markup=reply_markup)
 
-async def update_equipment_status_to(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    print("UPDATE STATUS TO")
+async def update_equipment_status_to(update: Update, context: ContextTypes.DEFAULT_TYPE, equipment_id: int,
+                                     status_index: int):
+    storage = context.bot_data["storage"]
     query = update.callback_query
-    print(query.data)
     await query.answer()
 
-    equipment_id = query.data.split("_")[2]
-    new_status = query.data.split("_")[3]
+    new_status = STATUS_LIST[status_index]
+
+    if await storage.update_equipment_status(equipment_id, new_status):
+        await query.edit_message_text(f"Статус успішно оновлено на {new_status}")
+        await notify_responsible(storage, [equipment_id], NOTIFY_STATUS, new_status, query.from_user.id)
+    else:
+        await query.edit_message_text("Не вдалося оновити статус обладнання.")
+
+# Необов'язковий аргумент команди: None, якщо його немає або замість нього вказано "-"
+def optional_arg(args, index: int):
+    if len(args) > index and args[index] != "-":
+        return args[index]
+    return None
+
+# Функція для команди /export [YYYY-MM-DD] [YYYY-MM-DD] [номер локації] [ID обладнання]
+async def export_movements(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
+    if not employee:
+        return
+
+    try:
+        date_from, date_to, location_number, equipment_id = (optional_arg(context.args, index) for index in range(4))
+        date_from = date.fromisoformat(date_from) if date_from else None
+        date_to = date.fromisoformat(date_to) if date_to else None
+        location_number = int(location_number) if location_number else None
+        if location_number is not None and not 1 <= location_number <= len(LOCATIONS):
+            raise ValueError(f"Немає локації з номером {location_number}")
+        location = LOCATIONS[location_number - 1] if location_number is not None else None
+        equipment_id = int(equipment_id) if equipment_id else None
+    except ValueError:
+        locations = "\n".join(f"{number}. {location}" for number, location in enumerate(LOCATIONS, start=1))
+        await update.message.reply_text("Використання: /export [від YYYY-MM-DD] [до YYYY-MM-DD] [номер локації] "
+                                        "[ID обладнання]\n"
+                                        "Щоб пропустити аргумент, вкажіть замість нього -\n\n"
+                                        f"Локації:\n{locations}")
+        return
+
+    # Файл пишеться потоково на диск і видаляється після надсилання
+    file_descriptor, path = tempfile.mkstemp(suffix=".csv")
+    os.close(file_descriptor)
+    try:
+        count = await export_movements_csv(storage, path, date_from=date_from, date_to=date_to,
+                                           equipment_id=equipment_id, location=location)
+        with open(path, "rb") as file:
+            await update.message.reply_document(file, filename="equipment_movements.csv",
+                                                caption=f"Рухів обладнання: {count}")
+    finally:
+        os.remove(path)
+
+# Функція для команди /report [від YYYY-MM-DD] [до YYYY-MM-DD] - рухи обладнання за період з денного зведення
+async def movement_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
+    if not employee:
+        return
+
+    try:
+        date_to = date.fromisoformat(context.args[1]) if len(context.args) > 1 else datetime.now(timezone.utc).date()
+        date_from = (date.fromisoformat(context.args[0]) if len(context.args) > 0
+                     else date_to - timedelta(days=REPORT_DEFAULT_DAYS - 1))
+        if date_from > date_to:
+            raise ValueError("Початок періоду пізніше за кінець")
+        if (date_to - date_from).days >= REPORT_MAX_DAYS:
+            raise ValueError("Період задовгий")
+    except ValueError:
+        await update.message.reply_text("Використання: /report [від YYYY-MM-DD] [до YYYY-MM-DD]\n"
+                                        f"Період - не довше {REPORT_MAX_DAYS} днів, початок не пізніше за кінець.")
+        return
+
+    locations, equipment = await storage.get_movement_report(date_from, date_to, REPORT_TOP_EQUIPMENT)
+    if not locations:
+        await update.message.reply_text(f"За період {date_from} – {date_to} рухів обладнання не було.")
+        return
+
+    message = f"Рухи обладнання за {date_from} – {date_to}\n\nЛокація: прибуло / вибуло\n"
+    for location, arrivals, departures in locations:
+        message += f"{location}: {arrivals} / {departures}\n"
+    message += "\nНайчастіше переміщували:\n"
+    for equipment_id, name, moves in equipment:
+        message += f"{name or f'ID {equipment_id}'} - {moves}\n"
+    await update.message.reply_text(message)
+
+# Обробка CSV-файлу з підписом "/import employees" або "/import equipment" (лише для адміністраторів)
+async def import_upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.message.from_user.id not in ADMIN_TELEGRAM_IDS:
+        await update.message.reply_text("Імпорт доступний лише адміністраторам.")
+        return
+
+    kind = update.message.caption.split()[1]
+    document = update.message.document
+    # Розмір перевіряється до завантаження: файл повністю читається в пам'ять
+    if (document.file_size or 0) > IMPORT_UPLOAD_MAX_BYTES:
+        await update.message.reply_text(f"Файл завеликий: максимум {IMPORT_UPLOAD_MAX_BYTES // (1024 * 1024)} МБ.")
+        return
+    file = await document.get_file()
+    data = await file.download_as_bytearray()
+    try:
+        text = bytes(data).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        await update.message.reply_text("Файл має бути у кодуванні UTF-8.")
+        return
+    # Перший рядок - заголовок, тому кількість переведень рядка приблизно дорівнює кількості записів
+    if text.count("\n") > IMPORT_UPLOAD_MAX_ROWS:
+        await update.message.reply_text(f"Забагато рядків: максимум {IMPORT_UPLOAD_MAX_ROWS}.")
+        return
+
+    imported, errors = await import_csv(context.bot_data["storage"], kind, text)
+    await update.message.reply_text(format_import_report(imported, errors))
+
+# Функція для команди /stats (лише для адміністраторів): затримки обробників, запити до БД, пул та кеші
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.message.from_user.id not in ADMIN_TELEGRAM_IDS:
+        return
+
+    extra = context.bot_data["storage"].stats()
+    notification_worker = context.application.bot_data.get("notification_worker")
+    if notification_worker is not None:
+        extra["Сповіщення"] = notification_worker.stats()
+    await update.message.reply_text(format_stats(extra))
+
+# Часовий пояс, у якому користувачі вводять і бачать час бронювань
+RESERVATION_TZ = ZoneInfo(RESERVATION_TIMEZONE)
+
+RESERVE_USAGE = ("Використання:\n"
+                 "/reserve <ID> <YYYY-MM-DD> <HH:MM> <HH:MM> - забронювати обладнання на один день\n"
+                 "/reserve <ID> <YYYY-MM-DD> <HH:MM> <YYYY-MM-DD> <HH:MM> - забронювати на кілька днів\n"
+                 "/reserve <YYYY-MM-DD> <HH:MM> <HH:MM> - показати обладнання, вільне в цей час")
+
+
+# Розбір проміжку бронювання з аргументів команди: дата, час початку, [дата кінця], час кінця
+def parse_reservation_period(args) -> tuple:
+    if len(args) == 3:
+        start_day, start_time, end_day, end_time = args[0], args[1], args[0], args[2]
+    elif len(args) == 4:
+        start_day, start_time, end_day, end_time = args
+    else:
+        raise ValueError("Невірна кількість аргументів")
+
+    starts_at = datetime.strptime(f"{start_day} {start_time}", "%Y-%m-%d %H:%M").replace(tzinfo=RESERVATION_TZ)
+    ends_at = datetime.strptime(f"{end_day} {end_time}", "%Y-%m-%d %H:%M").replace(tzinfo=RESERVATION_TZ)
+    return starts_at, ends_at
+
+
+# Перевірка проміжку бронювання; повертає текст помилки або None
+def validate_reservation_period(starts_at: datetime, ends_at: datetime):
+    if ends_at <= starts_at:
+        return "Кінець бронювання має бути пізніше за початок."
+    if ends_at <= datetime.now(timezone.utc):
+        return "Не можна забронювати обладнання на час, що вже минув."
+    if ends_at - starts_at > timedelta(days=RESERVATION_MAX_DAYS):
+        return f"Бронювання не може тривати довше {RESERVATION_MAX_DAYS} днів."
+    return None
+
+
+# Текстовий проміжок бронювання в часовому поясі користувачів
+def format_reservation_period(starts_at: datetime, ends_at: datetime) -> str:
+    starts_at = starts_at.astimezone(RESERVATION_TZ)
+    ends_at = ends_at.astimezone(RESERVATION_TZ)
+    if starts_at.date() == ends_at.date():
+        return f"{starts_at:%Y-%m-%d %H:%M}–{ends_at:%H:%M}"
+    return f"{starts_at:%Y-%m-%d %H:%M} – {ends_at:%Y-%m-%d %H:%M}"
+
+
+# Функція для команди /reserve - бронювання обладнання або перегляд вільного обладнання на проміжок часу
+async def reserve(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
+    if not employee:
+        return
+
+    args = list(context.args)
+    equipment_id = int(args.pop(0)) if args and args[0].isdigit() else None
+    try:
+        starts_at, ends_at = parse_reservation_period(args)
+    except ValueError:
+        await update.message.reply_text(RESERVE_USAGE)
+        return
+
+    error = validate_reservation_period(starts_at, ends_at)
+    if error:
+        await update.message.reply_text(error)
+        return
+
+    period = format_reservation_period(starts_at, ends_at)
+    if equipment_id is None:
+        free_equipment = await storage.get_available_equipment(starts_at, ends_at)
+        if not free_equipment:
+            await update.message.reply_text(f"На {period} вільного обладнання немає.")
+            return
+        message = f"Вільне обладнання на {period}\n\n"
+        for equipment in free_equipment[:RESERVATION_FREE_LIST_LIMIT]:
+            message += f"{equipment.id}. {equipment.name} ({equipment.location})\n"
+        if len(free_equipment) > RESERVATION_FREE_LIST_LIMIT:
+            message += f"\n...та ще {len(free_equipment) - RESERVATION_FREE_LIST_LIMIT}"
+        await update.message.reply_text(message)
+        return
+
+    try:
+        await storage.create_reservation(equipment_id, employee['id'], starts_at, ends_at)
+    except NotFoundError:
+        await update.message.reply_text(f"Обладнання з ID {equipment_id} не знайдено.")
+        return
+    except ConflictError:
+        conflicts = await storage.get_conflicting_reservations(equipment_id, starts_at, ends_at)
+        busy = "\n".join(format_reservation_period(conflict.starts_at, conflict.ends_at) for conflict in conflicts)
+        await update.message.reply_text(f"Обладнання з ID {equipment_id} вже заброньовано:\n{busy}")
+        return
+    await update.message.reply_text(f"Обладнання з ID {equipment_id} заброньовано на {period}.")
+
+# Формування тексту та клавіатури зі списком бронювань працівника
+def render_reservations(reservations):
+    if not reservations:
+        return "У вас немає активних бронювань", None
+
+    message = "Ваші бронювання\n\n"
+    keyboard = []
+    for reservation, equipment_name in reservations:
+        period = format_reservation_period(reservation.starts_at, reservation.ends_at)
+        message += f"{equipment_name} (ID {reservation.equipment_id})\n{period}\n\n"
+        keyboard.append([InlineKeyboardButton(f"Скасувати: {equipment_name}, {period}",
+                                              callback_data=encode_callback(RESERVATION_CANCEL, reservation.id))])
+    return message, InlineKeyboardMarkup(keyboard)
+
+# Функція для команди /my_reservations - поточні та майбутні бронювання працівника
+async def my_reservations(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    storage = context.bot_data["storage"]
+    employee = await storage.get_employee_by_telegram_id(update.message.chat.id)
+    if not employee:
+        return
+
+    reservations = await storage.get_employee_reservations(employee['id'])
+    message, reply_markup = render_reservations(reservations)
+    await update.message.reply_text(message, reply_markup=reply_markup)
+
+# Обробка натискання кнопки скасування бронювання
+async def reservation_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE, reservation_id: int):
+    storage = context.bot_data["storage"]
+    query = update.callback_query
+    employee = await storage.get_employee_by_telegram_id(query.from_user.id)
+    if not employee:
+        await query.answer()
+        return
+
+    cancelled = await storage.cancel_reservation(reservation_id, employee['id'])
+    await query.answer("Бронювання скасовано." if cancelled else "Бронювання вже скасовано або завершено.")
+
+    reservations = await storage.get_employee_reservations(employee['id'])
+    message, reply_markup = render_reservations(reservations)
+    await query.edit_message_text(message, reply_markup=reply_markup)
+
+# Таблиця маршрутизації callback-запитів: код дії -> обробник (кожен обробник вимірюється окремо)
+CALLBACK_HANDLERS = {action: instrument_handler(handler) for action, handler in {
+    MOVE: move_equipment,
+    MOVE_TO: move_to_location,
+    STATUS: update_equipment_status,
+    STATUS_TO: update_equipment_status_to,
+    EQUIPMENT_PAGE: equipment_page,
+    MOVEMENTS_OLDER: equipment_movements_older,
+    MOVEMENTS_NEWER: equipment_movements_newer,
+    SELECT_MODE: start_selection,
+    SELECT_CANCEL: cancel_selection,
+    TOGGLE: toggle_selection,
+    BULK_MOVE: bulk_move,
+    BULK_MOVE_TO: bulk_move_to,
+    BULK_STATUS: bulk_status,
+    BULK_STATUS_TO: bulk_status_to,
+    RESERVATION_CANCEL: reservation_cancel,
+}.items()}
+
+# Дії, доступні лише працівникам: кнопки з inline-результатів можуть натиснути будь-які учасники чату
+STAFF_ACTIONS = {MOVE, MOVE_TO, STATUS, STATUS_TO}
+
+# Єдиний обробник натискань кнопок: розбирає callback_data один раз і передає аргументи обробнику дії
+async def route_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    print(query.data)
+
+    decoded = decode_callback(query.data)
+    handler = CALLBACK_HANDLERS.get(decoded[0]) if decoded else None
+    if handler is None:
+        await query.answer("Ця кнопка застаріла, відкрийте список ще раз.")
+        return
 
-    await update_equipment_status_db(int(equipment_id), new_status)
-    await query.edit_message_text(f"Статус успішно оновлено на {new_status}")
+    action, args = decoded
+    if action in STAFF_ACTIONS:
+        if not await context.bot_data["storage"].get_employee_by_telegram_id(query.from_user.id):
+            await query.answer("Ця дія доступна лише працівникам.")
+            return
+    await handler(update, context, *args)
 
 # Функція для команди /help
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -181,30 +759,146 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "/start - Привітання\n"
         "/equipment - Список доступного обладнання\n"
         "/movements - Інформація про переміщення обладнання\n"
+        "/find - Пошук обладнання за назвою або описом\n"
+        "/locations - Кількість обладнання в кожній локації\n"
+        "/reserve - Забронювати обладнання на певний час\n"
+        "/my_reservations - Ваші бронювання\n"
+        "/export - Вивантажити журнал переміщень у CSV (за період, локацією чи обладнанням)\n"
+        "/report - Звіт про переміщення за період\n"
         "/help - Показати цю допомогу"
     )
     await update.message.reply_text(help_text)
 
 
-# Основна функція для запуску
-def main():
+# Підготовка сховища даних під час запуску бота
+async def on_startup(application: Application) -> None:
+    storage = application.bot_data["storage"]
+    await storage.start()
+    if METRICS_HTTP_PORT:
+        application.bot_data["metrics_server"] = await start_metrics_server(METRICS_HTTP_HOST, METRICS_HTTP_PORT)
+    if application.bot_data["notifications"]:
+        notification_worker = NotificationWorker(application.bot, storage, NOTIFY_COALESCE_WINDOW,
+                                                 NOTIFY_POLL_INTERVAL, NOTIFY_BATCH_SIZE, NOTIFY_SEND_CONCURRENCY,
+                                                 NOTIFY_LEASE, NOTIFY_MAX_ATTEMPTS)
+        notification_worker.start()
+        application.bot_data["notification_worker"] = notification_worker
+
+
+# Звільнення сховища даних під час зупинки бота
+async def on_shutdown(application: Application) -> None:
+    notification_worker = application.bot_data.pop("notification_worker", None)
+    if notification_worker is not None:
+        await notification_worker.stop()
+    metrics_server = application.bot_data.pop("metrics_server", None)
+    if metrics_server is not None:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+    await application.bot_data["storage"].stop()
+
+
+# Відповіді користувачу, коли дію не вдалося виконати через сховище даних
+DEGRADED_MESSAGE = "Сервіс тимчасово працює в обмеженому режимі: база даних недоступна. Спробуйте за хвилину."
+STORAGE_ERROR_MESSAGE = "Не вдалося виконати дію. Спробуйте ще раз пізніше."
+
+
+# Обробник помилок: при збоях сховища користувач одразу отримує відповідь замість тиші
+async def on_error(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
+    error = context.error
+    if not isinstance(error, StorageError):
+        logger.error("Помилка при обробці оновлення", exc_info=error)
+        return
+
+    text = DEGRADED_MESSAGE if isinstance(error, StorageUnavailableError) else STORAGE_ERROR_MESSAGE
+    print(f"{text} ({error})")
+    # Вбудованим запитам відповісти текстом неможливо - лише журналюємо
+    if not isinstance(update, Update) or update.inline_query is not None:
+        return
+    try:
+        if update.callback_query is not None:
+            try:
+                await update.callback_query.answer(text, show_alert=True)
+                return
+            except TelegramError:
+                # На натискання вже відповіли в обробнику - повідомляємо окремим повідомленням
+                pass
+        if update.effective_message is not None:
+            await update.effective_message.reply_text(text)
+    except TelegramError as e:
+        print(f"Не вдалося повідомити користувача про помилку: {e}")
+
+# Реалізації сховища даних, з яких обирає STORAGE_BACKEND у config.py
+STORAGE_BACKENDS = {
+    "postgres": PostgresStorage,
+    "memory": MemoryStorage,
+}
+
+
+# Створення Application з усіма обробниками
+def build_application(base_url: str = TELEGRAM_BASE_URL, rate_limited: bool = True,
+                      storage: Storage = None, notifications: bool = NOTIFY_ENABLED) -> Application:
+    """
+    Створює об'єкт Application бота з усіма обробниками.
+
+    :param base_url: Адреса Bot API (None - офіційний сервер Telegram); використовується для локального тестування.
+    :param rate_limited: Чи обмежувати частоту вихідних запитів до Bot API.
+    :param storage: Сховище даних; None - реалізація, обрана в config.py (STORAGE_BACKEND).
+    :param notifications: Чи запускати фоновий обробник сповіщень відповідальних працівників.
+    :return: Налаштований об'єкт Application.
+    """
     # Створюємо об'єкт Application та передаємо токен
-    application = Application.builder().token(API_TOKEN).build()
+    builder = Application.builder().token(API_TOKEN)
+    if base_url:
+        builder = builder.base_url(base_url)
+    if rate_limited:
+        builder = builder.rate_limiter(ChatRateLimiter(global_rate=SEND_GLOBAL_RATE,
+                                                       per_chat_interval=SEND_PER_CHAT_INTERVAL,
+                                                       max_retries=SEND_MAX_RETRIES))
+    if CONCURRENT_UPDATES > 1:
+        # Оновлення різних чатів обробляються паралельно, одного чату - по черзі
+        builder = builder.concurrent_updates(PerChatUpdateProcessor(CONCURRENT_UPDATES))
+    application = (builder
+                   .post_init(on_startup)
+                   .post_shutdown(on_shutdown)
+                   .build())
+    # Обробники отримують сховище з bot_data, тож його можна підмінити, не змінюючи обробників
+    application.bot_data["storage"] = storage if storage is not None else STORAGE_BACKENDS[STORAGE_BACKEND]()
+    application.bot_data["notifications"] = notifications
 
     # Додаємо обробники команд
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("equipment", equipment))
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("movements", equipment_movements))
+    application.add_handler(CommandHandler("start", instrument_handler(start)))
+    application.add_handler(CommandHandler("equipment", instrument_handler(equipment)))
+    application.add_handler(CommandHandler("help", instrument_handler(help_command)))
+    application.add_handler(CommandHandler("movements", instrument_handler(equipment_movements)))
+    application.add_handler(CommandHandler("export", instrument_handler(export_movements)))
+    application.add_handler(CommandHandler("report", instrument_handler(movement_report)))
+    application.add_handler(CommandHandler("stats", instrument_handler(stats)))
+    application.add_handler(CommandHandler("find", instrument_handler(find)))
+    application.add_handler(CommandHandler("locations", instrument_handler(locations)))
+    application.add_handler(CommandHandler("reserve", instrument_handler(reserve)))
+    application.add_handler(CommandHandler("my_reservations", instrument_handler(my_reservations)))
+    application.add_handler(InlineQueryHandler(instrument_handler(inline_search)))
+    application.add_handler(MessageHandler(filters.Document.FileExtension("csv")
+                                           & filters.CaptionRegex(r"^/import\s+(employees|equipment)\b"),
+                                           instrument_handler(import_upload)))
+
+    # Кожна дія вимірюється своєю обгорткою в CALLBACK_HANDLERS, тому маршрутизатор не обгортається
+    application.add_handler(CallbackQueryHandler(route_callback))
+    application.add_error_handler(on_error)
+    return application
+
 
-    application.add_handler(CallbackQueryHandler(move_equipment, pattern="^move_"))
-    application.add_handler(CallbackQueryHandler(move_to_location, pattern="^movee_to_"))
-    application.add_handler(CallbackQueryHandler(update_equipment_status, pattern="^upd_status_"))
-    application.add_handler(CallbackQueryHandler(update_equipment_status_to, pattern="^update_status_"))
+# Основна функція для запуску
+def main():
+    application = build_application()
 
-    # Запускаємо бота
-    application.run_polling()
+    # Запускаємо бота (run_webhook/run_polling самі керують циклом подій)
+    if WEBHOOK_ENABLED:
+        # Локальний HTTP-сервер за зворотним проксі, що приймає HTTPS-запити від Telegram
+        application.run_webhook(listen=WEBHOOK_LISTEN, port=WEBHOOK_PORT, url_path=WEBHOOK_URL_PATH,
+                                webhook_url=WEBHOOK_URL, secret_token=WEBHOOK_SECRET_TOKEN)
+    else:
+        application.run_polling()
 
-# Запуск основної асинхронної функції
+# Запуск бота
 if __name__ == '__main__':
-    asyncio.run(main())
+    main()
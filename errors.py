@@ -0,0 +1,32 @@
+# Помилки сховища даних, які отримують обробники замість порожніх результатів ([] / None) при збоях
+
+
+class StorageError(Exception):
+    """
+    Базова помилка сховища: операцію не виконано.
+    """
+
+
+class StorageUnavailableError(StorageError):
+    """
+    Сховище тимчасово недоступне (немає з'єднання, вичерпано повтори або розімкнено запобіжник).
+    Обробники відповідають користувачу, що сервіс працює в обмеженому режимі.
+    """
+
+
+class StorageTimeoutError(StorageUnavailableError):
+    """
+    Операція не завершилась за відведений час.
+    """
+
+
+class ConflictError(StorageError):
+    """
+    Операція суперечить наявним даним (наприклад, бронювання перетинається з іншим).
+    """
+
+
+class NotFoundError(StorageError):
+    """
+    Пов'язаний запис не існує (наприклад, бронювання обладнання з неіснуючим ID).
+    """
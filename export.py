@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import csv
+from datetime import date, datetime, time, timedelta, timezone
+
+from db_manager import init_pool, close_pool
+from storage import PostgresStorage
+
+# Заголовки колонок CSV-файлу з рухами обладнання
+EXPORT_COLUMNS = ("id", "equipment_id", "equipment_name", "from_location", "to_location", "movement_date")
+
+
+def day_start(day: date) -> datetime:
+    """
+    Перетворює дату на початок цього дня (UTC).
+
+    :param day: Дата.
+    :return: datetime з часовим поясом UTC.
+    """
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def period_bounds(date_from: date = None, date_to: date = None) -> tuple:
+    """
+    Перетворює період з датами "від" і "до" (обидві включно) на межі запиту.
+
+    :param date_from: Перший день періоду, або None.
+    :param date_to: Останній день періоду, або None.
+    :return: Кортеж (початок включно, кінець не включно), де кожен елемент - datetime або None.
+    """
+    start = day_start(date_from) if date_from else None
+    end = day_start(date_to + timedelta(days=1)) if date_to else None
+    return start, end
+
+
+async def export_movements_csv(storage, path: str, date_from: date = None, date_to: date = None, equipment_id: int = None,
+                               location: str = None) -> int:
+    """
+    Записує рухи обладнання у CSV-файл рядок за рядком (пам'ять не залежить від розміру журналу).
+
+    :param storage: Сховище даних (storage.Storage), з якого читаються рухи.
+    :param path: Шлях до CSV-файлу.
+    :param date_from: Перший день періоду (включно), або None.
+    :param date_to: Останній день періоду (включно), або None.
+    :param equipment_id: ID обладнання, або None.
+    :param location: Локація, з якої або до якої переміщено обладнання, або None.
+    :return: Кількість записаних рухів.
+    """
+    start, end = period_bounds(date_from, date_to)
+    count = 0
+    # utf-8-sig, щоб Excel правильно відкривав кирилицю
+    with open(path, "w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file)
+        writer.writerow(EXPORT_COLUMNS)
+        async for movement, equipment_name in storage.iter_equipment_movements(start, end, equipment_id, location):
+            writer.writerow((movement.id, movement.equipment_id, equipment_name, movement.from_location,
+                             movement.to_location, movement.movement_date.isoformat()))
+            count += 1
+    return count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Експорт журналу рухів обладнання у CSV")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="перший день (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="останній день (YYYY-MM-DD)")
+    parser.add_argument("--equipment-id", type=int, help="ID обладнання")
+    parser.add_argument("--location", help="локація, з якої або до якої переміщено обладнання")
+    parser.add_argument("--output", default="equipment_movements.csv", help="шлях до CSV-файлу")
+    args = parser.parse_args()
+
+    await init_pool()
+    try:
+        count = await export_movements_csv(PostgresStorage(), args.output, args.date_from, args.date_to,
+                                           args.equipment_id, args.location)
+        print(f"Експортовано {count} рухів обладнання у {args.output}")
+    finally:
+        await close_pool()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,368 @@
+import bisect
+import itertools
+from datetime import datetime, timedelta, timezone
+
+from config import SEARCH_RESULTS_LIMIT
+from config import MOVEMENTS_PAGE_SIZE
+from errors import ConflictError, NotFoundError
+from models import Employee, Equipment, EquipmentMovement, Reservation
+from storage import Storage
+
+# Статус обладнання, яке можна взяти
+AVAILABLE_STATUS = 'Доступний'
+
+
+# Сховище в пам'яті процесу: для тестів і профілювання обробників без бази даних.
+# Записи індексуються словниками (за id, telegram_id, парою (локація, статус), обладнанням і працівником),
+# тож операції не переглядають усі записи. Методи не поступаються циклом подій посередині зміни,
+# тому кожна операція атомарна, як транзакція в PostgreSQL. Дані зникають разом із процесом.
+class MemoryStorage(Storage):
+    def __init__(self):
+        """
+        Ініціалізація порожнього сховища.
+        """
+        self._employees = {}  # id -> Employee
+        self._employees_by_telegram_id = {}  # telegram_id -> Employee
+        self._employee_ids = itertools.count(1)
+
+        self._equipment = {}  # id -> Equipment
+        self._equipment_ids = []  # відсортовані ID обладнання
+        self._equipment_by_location_status = {}  # (локація, статус) -> множина ID обладнання
+
+        self._movements = {}  # id -> EquipmentMovement у порядку id
+        self._movement_keys = []  # відсортовані ключі (movement_date, id) для гортання та експорту
+        self._movement_ids = itertools.count(1)
+        self._movement_daily = {}  # день (UTC) -> {(ID обладнання, локація): [прибуття, відбуття]}
+
+        self._reservations_by_equipment = {}  # ID обладнання -> {ID бронювання: Reservation}
+        self._reservations_by_employee = {}  # ID працівника -> {ID бронювання: Reservation}
+        self._reservation_ids = itertools.count(1)
+
+        self._notification_groups = {}  # (Telegram ID отримувача, ID обладнання) -> {ID події: подія}
+        self._notification_events = {}  # ID події -> подія
+        self._notification_ids = itertools.count(1)
+
+    def stats(self) -> dict:
+        return {
+            "Сховище в пам'яті": {
+                "employees": len(self._employees),
+                "equipment": len(self._equipment),
+                "movements": len(self._movements),
+                "reservations": sum(len(reservations) for reservations in self._reservations_by_equipment.values()),
+                "notification_events": len(self._notification_events),
+            },
+        }
+
+    # Заміна запису обладнання з оновленням індексу за локацією та статусом
+    def _store_equipment(self, equipment: Equipment):
+        old = self._equipment.get(equipment.id)
+        if old is None:
+            bisect.insort(self._equipment_ids, equipment.id)
+        else:
+            key = (old.location, old.status)
+            self._equipment_by_location_status[key].discard(old.id)
+            if not self._equipment_by_location_status[key]:
+                del self._equipment_by_location_status[key]
+        self._equipment[equipment.id] = equipment
+        self._equipment_by_location_status.setdefault((equipment.location, equipment.status), set()).add(equipment.id)
+
+    def _with_responsible(self, equipment: Equipment) -> tuple:
+        return equipment, self._employees.get(equipment.responsible_person_id)
+
+    def _available_ids(self) -> list:
+        ids = []
+        for (location, status), equipment_ids in self._equipment_by_location_status.items():
+            if status == AVAILABLE_STATUS:
+                ids.extend(equipment_ids)
+        return sorted(ids)
+
+    # Запис руху з оновленням денного зведення (як тригер у PostgreSQL)
+    def _record_movement(self, equipment_id: int, from_location: str, to_location: str,
+                         movement_date: datetime = None) -> int:
+        if movement_date is None:
+            movement_date = datetime.now(timezone.utc)
+        elif movement_date.tzinfo is None:
+            # asyncpg записує дату без часового поясу в TIMESTAMPTZ як UTC
+            movement_date = movement_date.replace(tzinfo=timezone.utc)
+        movement = EquipmentMovement(equipment_id, from_location, to_location, movement_date,
+                                     id=next(self._movement_ids))
+        self._movements[movement.id] = movement
+        bisect.insort(self._movement_keys, (movement.movement_date, movement.id))
+
+        day = self._movement_daily.setdefault(movement.movement_date.astimezone(timezone.utc).date(), {})
+        day.setdefault((equipment_id, to_location), [0, 0])[0] += 1
+        day.setdefault((equipment_id, from_location), [0, 0])[1] += 1
+        return movement.id
+
+    def _movement_with_name(self, key: tuple) -> tuple:
+        movement = self._movements[key[1]]
+        return movement, self._equipment[movement.equipment_id].name
+
+    async def get_employee_by_telegram_id(self, telegram_id: int):
+        employee = self._employees_by_telegram_id.get(telegram_id)
+        return {"id": employee.id} if employee is not None else None
+
+    async def get_all_equipment(self):
+        return [self._equipment[equipment_id] for equipment_id in self._equipment_ids]
+
+    async def get_available_equipment(self, starts_at=None, ends_at=None):
+        if starts_at is None or ends_at is None:
+            return [self._equipment[equipment_id] for equipment_id in self._available_ids()]
+        return [self._equipment[equipment_id] for equipment_id in self._equipment_ids
+                if not self._overlapping_reservations(equipment_id, starts_at, ends_at)]
+
+    async def get_responsible_employee_for_equipment(self, equipment_id: int):
+        equipment = self._equipment.get(equipment_id)
+        if equipment is None:
+            return None
+        return self._employees.get(equipment.responsible_person_id)
+
+    async def get_equipment_with_responsible(self, only_available: bool = False):
+        ids = self._available_ids() if only_available else self._equipment_ids
+        return [self._with_responsible(self._equipment[equipment_id]) for equipment_id in ids]
+
+    async def search_equipment(self, text: str, only_available: bool = False):
+        # Замість триграмного індексу - пошук усіх слів запиту в назві та описі;
+        # збіг усього запиту з назвою ставиться вище
+        text = " ".join(text.lower().split())
+        if not text:
+            return []
+        words = text.split()
+        ids = self._available_ids() if only_available else self._equipment_ids
+        matches = []
+        for equipment_id in ids:
+            equipment = self._equipment[equipment_id]
+            haystack = f"{equipment.name} {equipment.description or ''}".lower()
+            if all(word in haystack for word in words):
+                matches.append((text not in equipment.name.lower(), equipment_id))
+        matches.sort()
+        return [self._with_responsible(self._equipment[equipment_id])
+                for _, equipment_id in matches[:SEARCH_RESULTS_LIMIT]]
+
+    async def update_equipment_location(self, equipment_id: int, new_location: str):
+        equipment = self._equipment.get(equipment_id)
+        if equipment is not None:
+            self._store_equipment(equipment.replace(location=new_location))
+
+    async def insert_equipment_movement(self, equipment_movement: EquipmentMovement):
+        if equipment_movement.equipment_id not in self._equipment:
+            raise NotFoundError(f"Обладнання з ID {equipment_movement.equipment_id} не знайдено.")
+        return self._record_movement(equipment_movement.equipment_id, equipment_movement.from_location,
+                                     equipment_movement.to_location, equipment_movement.movement_date)
+
+    async def relocate_equipment(self, equipment_id: int, new_location: str):
+        equipment = self._equipment.get(equipment_id)
+        if equipment is None:
+            return None
+        self._store_equipment(equipment.replace(location=new_location))
+        return self._record_movement(equipment_id, equipment.location, new_location)
+
+    async def get_equipment_by_id(self, equipment_id: int):
+        return self._equipment.get(equipment_id)
+
+    async def iter_equipment_movements(self, date_from=None, date_to=None, equipment_id: int = None,
+                                       location: str = None):
+        first = bisect.bisect_left(self._movement_keys, (date_from,)) if date_from is not None else 0
+        last = (bisect.bisect_left(self._movement_keys, (date_to,)) if date_to is not None
+                else len(self._movement_keys))
+        for key in self._movement_keys[first:last]:
+            movement, equipment_name = self._movement_with_name(key)
+            if equipment_id is not None and movement.equipment_id != equipment_id:
+                continue
+            if location is not None and location not in (movement.from_location, movement.to_location):
+                continue
+            yield movement, equipment_name
+
+    async def get_all_equipment_movements(self):
+        return list(self._movements.values())
+
+    async def get_equipment_movements_page(self, older_than: tuple = None, newer_than: tuple = None,
+                                           page_size: int = MOVEMENTS_PAGE_SIZE):
+        # Як і в PostgreSQL, вибираємо на один запис більше, щоб дізнатися, чи є ще сторінки
+        if newer_than is not None:
+            first = bisect.bisect_right(self._movement_keys, tuple(newer_than))
+            keys = self._movement_keys[first:first + page_size + 1]
+            has_more = len(keys) > page_size
+            keys = keys[:page_size]
+        else:
+            last = (bisect.bisect_left(self._movement_keys, tuple(older_than)) if older_than is not None
+                    else len(self._movement_keys))
+            keys = self._movement_keys[max(last - page_size - 1, 0):last]
+            has_more = len(keys) > page_size
+            keys = keys[1:] if has_more else keys
+        # Сторінка завжди від найновіших рухів до найстаріших
+        return [self._movement_with_name(key) for key in reversed(keys)], has_more
+
+    async def update_equipment_status(self, equipment_id: int, new_status: str):
+        equipment = self._equipment.get(equipment_id)
+        if equipment is None:
+            return False
+        self._store_equipment(equipment.replace(status=new_status))
+        return True
+
+    async def bulk_upsert_employees(self, records: list):
+        for (line_number, telegram_id, telegram_username, first_name, last_name, role, contact_number, email,
+             location) in records:
+            existing = self._employees_by_telegram_id.get(telegram_id)
+            employee_id = existing.id if existing is not None else next(self._employee_ids)
+            employee = Employee(employee_id, telegram_id, telegram_username, first_name, last_name, role,
+                                contact_number, email, location)
+            self._employees[employee_id] = employee
+            self._employees_by_telegram_id[telegram_id] = employee
+        return len(records)
+
+    async def bulk_upsert_equipment(self, records: list):
+        errors = []
+        rows = []
+        for line_number, equipment_id, name, description, location, status, responsible_telegram_id in records:
+            responsible = None
+            if responsible_telegram_id is not None:
+                responsible = self._employees_by_telegram_id.get(responsible_telegram_id)
+                if responsible is None:
+                    errors.append((line_number, f"працівника з telegram_id {responsible_telegram_id} не знайдено"))
+                    continue
+            rows.append((equipment_id, name, description, location, status,
+                         responsible.id if responsible is not None else None))
+
+        # Спочатку рядки з ID, потім нові - з ID після найбільшого наявного
+        for row in sorted(rows, key=lambda row: row[0] is None):
+            equipment_id = row[0]
+            if equipment_id is None:
+                equipment_id = self._equipment_ids[-1] + 1 if self._equipment_ids else 1
+            self._store_equipment(Equipment(equipment_id, *row[1:]))
+        errors.sort()
+        return len(records) - len(errors), errors
+
+    async def relocate_equipment_bulk(self, equipment_ids: list, new_location: str):
+        moved_ids = []
+        for equipment_id in sorted(set(equipment_ids)):
+            equipment = self._equipment.get(equipment_id)
+            if equipment is None or equipment.location == new_location:
+                continue
+            self._store_equipment(equipment.replace(location=new_location))
+            self._record_movement(equipment_id, equipment.location, new_location)
+            moved_ids.append(equipment_id)
+        return moved_ids
+
+    async def update_equipment_status_bulk(self, equipment_ids: list, new_status: str):
+        updated_ids = []
+        for equipment_id in sorted(set(equipment_ids)):
+            equipment = self._equipment.get(equipment_id)
+            if equipment is None:
+                continue
+            self._store_equipment(equipment.replace(status=new_status))
+            updated_ids.append(equipment_id)
+        return updated_ids
+
+    async def get_equipment_occupancy(self):
+        occupancy = {}
+        for (location, status), equipment_ids in sorted(self._equipment_by_location_status.items()):
+            occupancy.setdefault(location, {})[status] = len(equipment_ids)
+        return occupancy
+
+    def _overlapping_reservations(self, equipment_id: int, starts_at, ends_at) -> list:
+        reservations = self._reservations_by_equipment.get(equipment_id, {}).values()
+        return [reservation for reservation in reservations
+                if reservation.starts_at < ends_at and starts_at < reservation.ends_at]
+
+    async def create_reservation(self, equipment_id: int, employee_id: int, starts_at, ends_at):
+        if equipment_id not in self._equipment or employee_id not in self._employees:
+            raise NotFoundError(f"Обладнання з ID {equipment_id} не знайдено.")
+        if self._overlapping_reservations(equipment_id, starts_at, ends_at):
+            raise ConflictError(f"Обладнання з ID {equipment_id} вже заброньовано на цей час.")
+        reservation = Reservation(equipment_id, employee_id, starts_at, ends_at, id=next(self._reservation_ids))
+        self._reservations_by_equipment.setdefault(equipment_id, {})[reservation.id] = reservation
+        self._reservations_by_employee.setdefault(employee_id, {})[reservation.id] = reservation
+        return reservation.id
+
+    async def get_conflicting_reservations(self, equipment_id: int, starts_at, ends_at):
+        return sorted(self._overlapping_reservations(equipment_id, starts_at, ends_at),
+                      key=lambda reservation: reservation.starts_at)
+
+    async def get_employee_reservations(self, employee_id: int):
+        now = datetime.now(timezone.utc)
+        reservations = [reservation for reservation in self._reservations_by_employee.get(employee_id, {}).values()
+                        if reservation.ends_at > now]
+        reservations.sort(key=lambda reservation: (reservation.starts_at, reservation.id))
+        return [(reservation, self._equipment[reservation.equipment_id].name) for reservation in reservations]
+
+    async def cancel_reservation(self, reservation_id: int, employee_id: int):
+        reservation = self._reservations_by_employee.get(employee_id, {}).pop(reservation_id, None)
+        if reservation is None:
+            return False
+        del self._reservations_by_equipment[reservation.equipment_id][reservation_id]
+        return True
+
+    async def enqueue_equipment_notifications(self, equipment_ids: list, kind: str, new_value: str,
+                                              actor_telegram_id: int = None):
+        now = datetime.now(timezone.utc)
+        count = 0
+        for equipment_id in set(equipment_ids):
+            equipment = self._equipment.get(equipment_id)
+            responsible = self._employees.get(equipment.responsible_person_id) if equipment is not None else None
+            if responsible is None or responsible.telegram_id == actor_telegram_id:
+                continue
+            event = {"id": next(self._notification_ids), "recipient_telegram_id": responsible.telegram_id,
+                     "equipment_id": equipment_id, "equipment_name": equipment.name, "kind": kind,
+                     "new_value": new_value, "created_at": now, "claimed_until": None, "attempts": 0}
+            self._notification_events[event["id"]] = event
+            self._notification_groups.setdefault((responsible.telegram_id, equipment_id), {})[event["id"]] = event
+            count += 1
+        return count
+
+    async def claim_notification_events(self, coalesce_window: float, max_groups: int, lease: float,
+                                        max_attempts: int):
+        now = datetime.now(timezone.utc)
+        exhausted = [event_id for event_id, event in self._notification_events.items()
+                     if event["attempts"] >= max_attempts
+                     and (event["claimed_until"] is None or event["claimed_until"] < now)]
+        await self.delete_notification_events(exhausted)
+
+        due_before = now - timedelta(seconds=coalesce_window)
+        claimed = []
+        groups = 0
+        for events in self._notification_groups.values():
+            if groups >= max_groups:
+                break
+            free = [event for event in events.values()
+                    if event["claimed_until"] is None or event["claimed_until"] < now]
+            if not free or min(event["created_at"] for event in free) > due_before:
+                continue
+            groups += 1
+            for event in free:
+                event["claimed_until"] = now + timedelta(seconds=lease)
+                event["attempts"] += 1
+                claimed.append({key: event[key] for key in ("id", "recipient_telegram_id", "equipment_id",
+                                                            "equipment_name", "kind", "new_value", "created_at")})
+        return claimed
+
+    async def delete_notification_events(self, event_ids: list):
+        for event_id in event_ids:
+            event = self._notification_events.pop(event_id, None)
+            if event is None:
+                continue
+            group_key = (event["recipient_telegram_id"], event["equipment_id"])
+            group = self._notification_groups[group_key]
+            del group[event_id]
+            if not group:
+                del self._notification_groups[group_key]
+
+    async def get_movement_report(self, date_from, date_to, top_equipment: int):
+        totals = {}
+        moves = {}
+        for day, rows in self._movement_daily.items():
+            if not date_from <= day <= date_to:
+                continue
+            for (equipment_id, location), (arrivals, departures) in rows.items():
+                location_totals = totals.setdefault(location, [0, 0])
+                location_totals[0] += arrivals
+                location_totals[1] += departures
+                moves[equipment_id] = moves.get(equipment_id, 0) + arrivals
+
+        most_moved = sorted(((-count, equipment_id) for equipment_id, count in moves.items() if count > 0))
+        equipment = []
+        for count, equipment_id in most_moved[:top_equipment]:
+            entry = self._equipment.get(equipment_id)
+            equipment.append((equipment_id, entry.name if entry is not None else None, -count))
+        return ([(location, arrivals, departures) for location, (arrivals, departures) in sorted(totals.items())],
+                equipment)
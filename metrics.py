@@ -0,0 +1,295 @@
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Межі кошиків гістограм затримки (секунди)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+# Гістограма з фіксованими кошиками (як у Prometheus)
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Додає одне спостереження.
+
+        :param value: Значення (секунди).
+        """
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """
+        Оцінює квантиль як верхню межу кошика, в який він потрапляє.
+
+        :param q: Квантиль від 0 до 1 (наприклад, 0.95).
+        :return: Оцінка квантиля в секундах, або 0, якщо спостережень немає.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            cumulative += self.counts[index]
+            if cumulative >= target:
+                # Для останнього (нескінченного) кошика повертаємо найбільшу скінченну межу
+                return bound if bound != float("inf") else LATENCY_BUCKETS[-2]
+        return LATENCY_BUCKETS[-2]
+
+
+# Сховище всіх метрик процесу бота
+class Metrics:
+    def __init__(self):
+        self.started_at = time.time()
+        self.handler_latency = defaultdict(Histogram)
+        self.handler_errors = defaultdict(int)
+        self.query_latency = defaultdict(Histogram)
+        self.query_rows = defaultdict(int)
+        self.query_errors = defaultdict(int)
+        self.query_retries = defaultdict(int)
+        self.pool_wait = Histogram()
+        self.pool_timeouts = 0
+
+    def reset(self):
+        self.__init__()
+
+
+metrics = Metrics()
+
+
+def instrument_handler(handler):
+    """
+    Обгортає обробник Telegram для вимірювання затримки та підрахунку помилок.
+
+    :param handler: Асинхронний обробник.
+    :return: Обгорнутий обробник.
+    """
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            metrics.handler_errors[name] += 1
+            raise
+        finally:
+            metrics.handler_latency[name].observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def _count_rows(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (list, dict)):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], list):
+        return len(result[0])
+    return 1
+
+
+def instrument_query(function):
+    """
+    Обгортає функцію db_manager для вимірювання часу виконання, кількості рядків та помилок.
+
+    Підтримує як звичайні асинхронні функції, так і асинхронні генератори (потокові запити).
+
+    :param function: Асинхронна функція або асинхронний генератор.
+    :return: Обгорнута функція.
+    """
+    name = function.__name__
+
+    if inspect.isasyncgenfunction(function):
+        @functools.wraps(function)
+        async def generator_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            rows = 0
+            try:
+                async for item in function(*args, **kwargs):
+                    rows += 1
+                    yield item
+            except Exception:
+                metrics.query_errors[name] += 1
+                raise
+            finally:
+                metrics.query_latency[name].observe(time.perf_counter() - started)
+                metrics.query_rows[name] += rows
+
+        return generator_wrapper
+
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await function(*args, **kwargs)
+            metrics.query_rows[name] += _count_rows(result)
+            return result
+        except Exception:
+            metrics.query_errors[name] += 1
+            raise
+        finally:
+            metrics.query_latency[name].observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def log_db_error(message: str, error: Exception):
+    """
+    Записує в журнал помилку операції з базою даних.
+
+    Помилки в метриках рахує instrument_query (а тайм-аути - шар виконання db_manager), тому тут
+    вони не враховуються повторно.
+
+    :param message: Опис операції, що не вдалася.
+    :param error: Виняток.
+    """
+    logger.error(f"{message}: {error}")
+
+
+def observe_pool_wait(seconds: float, timed_out: bool = False):
+    """
+    Враховує час очікування вільного підключення з пулу.
+
+    :param seconds: Час очікування.
+    :param timed_out: Чи завершилось очікування тайм-аутом.
+    """
+    metrics.pool_wait.observe(seconds)
+    if timed_out:
+        metrics.pool_timeouts += 1
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+def format_stats(extra: dict = None) -> str:
+    """
+    Формує текстовий звіт про метрики для команди /stats.
+
+    :param extra: Додаткові розділи звіту {назва: словник значень} (наприклад, статистика кешів).
+    :return: Текст звіту.
+    """
+    uptime = int(time.time() - metrics.started_at)
+    lines = [f"Час роботи: {uptime // 3600} год {uptime % 3600 // 60} хв", "",
+             "Обробники (к-сть, p50/p95/p99 мс, помилки):"]
+    for name, histogram in sorted(metrics.handler_latency.items()):
+        lines.append(f"{name}: {histogram.count}, {_ms(histogram.quantile(0.5))}/{_ms(histogram.quantile(0.95))}/"
+                     f"{_ms(histogram.quantile(0.99))}, {metrics.handler_errors[name]}")
+
+    lines += ["", "Запити до БД (к-сть, сер./p95 мс, рядків, помилки):"]
+    for name, histogram in sorted(metrics.query_latency.items()):
+        average = histogram.sum / histogram.count if histogram.count else 0.0
+        lines.append(f"{name}: {histogram.count}, {_ms(average)}/{_ms(histogram.quantile(0.95))}, "
+                     f"{metrics.query_rows[name]}, {metrics.query_errors[name]}")
+
+    wait = metrics.pool_wait
+    lines += ["", f"Очікування пулу: {wait.count} разів, p50/p95 {_ms(wait.quantile(0.5))}/"
+                  f"{_ms(wait.quantile(0.95))} мс, тайм-аутів {metrics.pool_timeouts}"]
+    if metrics.query_retries:
+        lines.append("Повтори запитів до БД: " + ", ".join(f"{name}={value}"
+                                                          for name, value in sorted(metrics.query_retries.items())))
+
+    for section, values in (extra or {}).items():
+        lines += ["", f"{section}: " + ", ".join(f"{key}={value}" for key, value in values.items())]
+    return "\n".join(lines)
+
+
+def _labels(**labels) -> str:
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for key, value in labels.items())
+    return ",".join(escaped)
+
+
+def _histogram_lines(metric: str, histogram: Histogram, **labels) -> list:
+    lines = []
+    cumulative = 0
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        cumulative += histogram.counts[index]
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f"{metric}_bucket{{{_labels(**labels, le=le)}}} {cumulative}")
+    suffix = f"{{{_labels(**labels)}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {histogram.sum}")
+    lines.append(f"{metric}_count{suffix} {histogram.count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    """
+    Формує метрики у текстовому форматі Prometheus.
+
+    :return: Текст для відповіді на /metrics.
+    """
+    lines = ["# TYPE bot_handler_latency_seconds histogram"]
+    for name, histogram in sorted(metrics.handler_latency.items()):
+        lines += _histogram_lines("bot_handler_latency_seconds", histogram, handler=name)
+    lines.append("# TYPE bot_handler_errors_total counter")
+    for name, value in sorted(metrics.handler_errors.items()):
+        lines.append(f"bot_handler_errors_total{{{_labels(handler=name)}}} {value}")
+
+    lines.append("# TYPE bot_db_query_latency_seconds histogram")
+    for name, histogram in sorted(metrics.query_latency.items()):
+        lines += _histogram_lines("bot_db_query_latency_seconds", histogram, query=name)
+    lines.append("# TYPE bot_db_query_rows_total counter")
+    for name, value in sorted(metrics.query_rows.items()):
+        lines.append(f"bot_db_query_rows_total{{{_labels(query=name)}}} {value}")
+    lines.append("# TYPE bot_db_query_errors_total counter")
+    for name, value in sorted(metrics.query_errors.items()):
+        lines.append(f"bot_db_query_errors_total{{{_labels(query=name)}}} {value}")
+
+    lines.append("# TYPE bot_db_query_retries_total counter")
+    for name, value in sorted(metrics.query_retries.items()):
+        lines.append(f"bot_db_query_retries_total{{{_labels(query=name)}}} {value}")
+
+    lines.append("# TYPE bot_db_pool_wait_seconds histogram")
+    lines += _histogram_lines("bot_db_pool_wait_seconds", metrics.pool_wait)
+    lines.append("# TYPE bot_db_pool_timeouts_total counter")
+    lines.append(f"bot_db_pool_timeouts_total {metrics.pool_timeouts}")
+    return "\n".join(lines) + "\n"
+
+
+async def _handle_metrics_request(reader, writer):
+    try:
+        request_line = await reader.readline()
+        # Читаємо та відкидаємо заголовки запиту
+        while (await reader.readline()).strip():
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", render_prometheus().encode("utf-8")
+        else:
+            status, body = "404 Not Found", b"Not Found\n"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int):
+    """
+    Запускає HTTP-сервер, що віддає метрики у форматі Prometheus за адресою /metrics.
+
+    :param host: Адреса прослуховування (зазвичай 127.0.0.1).
+    :param port: Порт.
+    :return: Об'єкт asyncio.Server.
+    """
+    server = await asyncio.start_server(_handle_metrics_request, host, port)
+    logger.info(f"Метрики Prometheus доступні на http://{host}:{port}/metrics")
+    return server
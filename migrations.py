@@ -0,0 +1,457 @@
+import argparse
+import asyncio
+
+import asyncpg
+
+from config import DB_USER
+from config import DB_NAME
+from config import DB_PASSWORD
+from config import DB_HOST
+
+# Ідентифікатор advisory-блокування, щоб міграції не виконувались одночасно кількома процесами
+MIGRATIONS_LOCK_ID = 727001
+
+# SQL-запит для створення таблиці застосованих міграцій
+create_schema_migrations_table = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+get_applied_migrations_query = """
+SELECT version, description, applied_at
+FROM schema_migrations
+ORDER BY version;
+"""
+
+insert_applied_migration_query = """
+INSERT INTO schema_migrations (version, description)
+VALUES ($1, $2);
+"""
+
+# SQL-запити для створення таблиць
+create_employee_table = """
+CREATE TABLE IF NOT EXISTS employees (
+    id SERIAL PRIMARY KEY,
+    telegram_id BIGINT NOT NULL,
+    telegram_username TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    role TEXT NOT NULL,
+    contact_number TEXT NOT NULL,
+    email TEXT NOT NULL,
+    location TEXT NOT NULL  
+);
+"""
+
+create_equipment_table = """
+CREATE TABLE IF NOT EXISTS equipment (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    location TEXT NOT NULL,
+    status TEXT NOT NULL,
+    responsible_person_id INTEGER REFERENCES employees(id) ON DELETE SET NULL
+);
+"""
+
+create_equipment_movement_table = """
+CREATE TABLE IF NOT EXISTS equipment_movements (
+    id SERIAL PRIMARY KEY,
+    equipment_id INTEGER REFERENCES equipment(id) ON DELETE CASCADE,
+    from_location TEXT NOT NULL,
+    to_location TEXT NOT NULL,
+    movement_date TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# SQL-запити для зведення кількості обладнання за локацією та статусом.
+# Лічильники змінюються тригерами на кожну вставку, видалення або зміну location/status,
+# тому звіт читає лише кілька рядків незалежно від розміру каталогу.
+create_equipment_occupancy_table = """
+CREATE TABLE IF NOT EXISTS equipment_occupancy (
+    location TEXT NOT NULL,
+    status TEXT NOT NULL,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (location, status)
+);
+"""
+
+create_equipment_occupancy_functions = """
+CREATE OR REPLACE FUNCTION equipment_occupancy_refresh() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE equipment_occupancy
+        SET item_count = item_count - 1
+        WHERE location = OLD.location AND status = OLD.status;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO equipment_occupancy (location, status, item_count)
+        VALUES (NEW.location, NEW.status, 1)
+        ON CONFLICT (location, status) DO UPDATE SET item_count = equipment_occupancy.item_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION equipment_occupancy_clear() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM equipment_occupancy;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+create_equipment_occupancy_triggers = """
+DROP TRIGGER IF EXISTS equipment_occupancy_insert_delete ON equipment;
+CREATE TRIGGER equipment_occupancy_insert_delete
+AFTER INSERT OR DELETE ON equipment
+FOR EACH ROW EXECUTE FUNCTION equipment_occupancy_refresh();
+
+DROP TRIGGER IF EXISTS equipment_occupancy_update ON equipment;
+CREATE TRIGGER equipment_occupancy_update
+AFTER UPDATE OF location, status ON equipment
+FOR EACH ROW
+WHEN (OLD.location IS DISTINCT FROM NEW.location OR OLD.status IS DISTINCT FROM NEW.status)
+EXECUTE FUNCTION equipment_occupancy_refresh();
+
+DROP TRIGGER IF EXISTS equipment_occupancy_truncate ON equipment;
+CREATE TRIGGER equipment_occupancy_truncate
+AFTER TRUNCATE ON equipment
+FOR EACH STATEMENT EXECUTE FUNCTION equipment_occupancy_clear();
+"""
+
+# SQL-запит для створення таблиці бронювань обладнання.
+# Обмеження-виключення (GiST за equipment_id та проміжком часу) не дає двом бронюванням одного обладнання
+# перетинатися навіть при одночасних вставках; той самий індекс використовується для пошуку вільного обладнання.
+create_equipment_reservations_table = """
+CREATE TABLE IF NOT EXISTS equipment_reservations (
+    id SERIAL PRIMARY KEY,
+    equipment_id INTEGER NOT NULL REFERENCES equipment(id) ON DELETE CASCADE,
+    employee_id INTEGER NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+    period TSTZRANGE NOT NULL CHECK (NOT isempty(period) AND NOT lower_inf(period) AND NOT upper_inf(period)),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT equipment_reservations_no_overlap EXCLUDE USING gist (equipment_id WITH =, period WITH &&)
+);
+"""
+
+# SQL-запит для створення черги сповіщень відповідальних працівників про зміни обладнання.
+# Події зберігаються до успішного надсилання, тому переживають перезапуск бота.
+create_notification_events_table = """
+CREATE TABLE IF NOT EXISTS notification_events (
+    id BIGSERIAL PRIMARY KEY,
+    recipient_telegram_id BIGINT NOT NULL,
+    equipment_id INTEGER NOT NULL,
+    equipment_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    new_value TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claimed_until TIMESTAMPTZ,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# SQL-запити для переходу equipment_movements на помісячне секціонування за movement_date.
+# Первинний ключ секціонованої таблиці має містити ключ секціонування, тому він стає (id, movement_date);
+# рядки поза наявними секціями потрапляють у секцію за замовчуванням.
+create_partitioned_equipment_movement_table = """
+CREATE TABLE equipment_movements (
+    id INTEGER NOT NULL DEFAULT nextval('equipment_movements_id_seq'),
+    equipment_id INTEGER REFERENCES equipment(id) ON DELETE CASCADE,
+    from_location TEXT NOT NULL,
+    to_location TEXT NOT NULL,
+    movement_date TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, movement_date)
+) PARTITION BY RANGE (movement_date);
+
+CREATE TABLE equipment_movements_default PARTITION OF equipment_movements DEFAULT;
+"""
+
+# Створює помісячні секції equipment_movements_yYYYYmMM (межі місяців за UTC) з першого до останнього місяця
+# включно; вже наявні секції пропускаються. Повертає кількість створених секцій.
+create_equipment_movement_partitions_function = """
+CREATE OR REPLACE FUNCTION create_equipment_movement_partitions(first_month TIMESTAMPTZ, last_month TIMESTAMPTZ)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', first_month AT TIME ZONE 'UTC');
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month AT TIME ZONE 'UTC' LOOP
+        partition_name := 'equipment_movements_' || to_char(month_start, '"y"YYYY"m"MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I PARTITION OF equipment_movements FOR VALUES FROM (%L) TO (%L)',
+                           partition_name, month_start AT TIME ZONE 'UTC',
+                           (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC');
+            created := created + 1;
+        END IF;
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# SQL-запити для денного зведення рухів обладнання (прибуття та відбуття за обладнанням, локацією та днем UTC).
+# Звіти читають зведення, тому воно зберігає історію і після від'єднання старих секцій журналу.
+create_equipment_movement_daily_table = """
+CREATE TABLE IF NOT EXISTS equipment_movement_daily (
+    day DATE NOT NULL,
+    equipment_id INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    arrivals INTEGER NOT NULL DEFAULT 0,
+    departures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, equipment_id, location)
+);
+"""
+
+fill_equipment_movement_daily_query = """
+INSERT INTO equipment_movement_daily (day, equipment_id, location, arrivals, departures)
+SELECT day, equipment_id, location, SUM(arrivals), SUM(departures)
+FROM (
+    SELECT (movement_date AT TIME ZONE 'UTC')::date AS day, equipment_id, to_location AS location,
+           1 AS arrivals, 0 AS departures
+    FROM equipment_movements
+    WHERE equipment_id IS NOT NULL
+    UNION ALL
+    SELECT (movement_date AT TIME ZONE 'UTC')::date, equipment_id, from_location, 0, 1
+    FROM equipment_movements
+    WHERE equipment_id IS NOT NULL
+) moves
+GROUP BY day, equipment_id, location;
+"""
+
+create_equipment_movement_daily_trigger = """
+CREATE OR REPLACE FUNCTION equipment_movement_daily_refresh() RETURNS trigger AS $$
+DECLARE
+    movement_day DATE := (NEW.movement_date AT TIME ZONE 'UTC')::date;
+BEGIN
+    IF NEW.equipment_id IS NULL THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO equipment_movement_daily (day, equipment_id, location, arrivals, departures)
+    VALUES (movement_day, NEW.equipment_id, NEW.to_location, 1, 0)
+    ON CONFLICT (day, equipment_id, location) DO UPDATE SET arrivals = equipment_movement_daily.arrivals + 1;
+    INSERT INTO equipment_movement_daily (day, equipment_id, location, arrivals, departures)
+    VALUES (movement_day, NEW.equipment_id, NEW.from_location, 0, 1)
+    ON CONFLICT (day, equipment_id, location) DO UPDATE SET departures = equipment_movement_daily.departures + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS equipment_movement_daily_insert ON equipment_movements;
+CREATE TRIGGER equipment_movement_daily_insert
+AFTER INSERT ON equipment_movements
+FOR EACH ROW EXECUTE FUNCTION equipment_movement_daily_refresh();
+"""
+
+# Створення однієї місячної секції equipment_movements. Рядки цього місяця, що вже лежать у секції за
+# замовчуванням (рухи з датою в майбутньому, запізніле обслуговування, старі рухи без дати), переносяться
+# в нову таблицю до її приєднання: інакше PostgreSQL відмовляє в приєднанні, бо рядки секції за
+# замовчуванням порушили б її нове обмеження. Блокування не дає іншим транзакціям додати такі рядки
+# між перенесенням і приєднанням. Повертає TRUE, якщо секцію створено.
+create_equipment_movement_partition_function = """
+CREATE OR REPLACE FUNCTION create_equipment_movement_partition(month_start TIMESTAMP)
+RETURNS BOOLEAN AS $$
+DECLARE
+    partition_name TEXT := 'equipment_movements_' || to_char(month_start, '"y"YYYY"m"MM');
+    range_start TIMESTAMPTZ := month_start AT TIME ZONE 'UTC';
+    range_end TIMESTAMPTZ := (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC';
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+    LOCK TABLE equipment_movements_default IN SHARE ROW EXCLUSIVE MODE;
+    EXECUTE format('CREATE TABLE %I (LIKE equipment_movements INCLUDING DEFAULTS)', partition_name);
+    EXECUTE format('WITH moved AS (DELETE FROM equipment_movements_default '
+                   'WHERE movement_date >= %L AND movement_date < %L RETURNING *) '
+                   'INSERT INTO %I SELECT * FROM moved', range_start, range_end, partition_name);
+    EXECUTE format('ALTER TABLE equipment_movements ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   partition_name, range_start, range_end);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION create_equipment_movement_partitions(first_month TIMESTAMPTZ, last_month TIMESTAMPTZ)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', first_month AT TIME ZONE 'UTC');
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= last_month AT TIME ZONE 'UTC' LOOP
+        IF create_equipment_movement_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Створює секції для всіх місяців, рядки яких лежать у секції за замовчуванням, щоб вона залишалась порожньою,
+# а старі рухи (зокрема перенесені міграцією 7 рухи без дати з датою 'epoch') підпадали під термін зберігання.
+# Повертає кількість створених секцій.
+create_equipment_movement_partitions_from_default_function = """
+CREATE OR REPLACE FUNCTION create_equipment_movement_partitions_from_default()
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMP;
+    created INTEGER := 0;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', movement_date AT TIME ZONE 'UTC') FROM equipment_movements_default
+    LOOP
+        IF create_equipment_movement_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Список міграцій: (версія, опис, список SQL-виразів). Нові міграції додаються лише в кінець.
+MIGRATIONS = [
+    (1, "Створення таблиць employees, equipment, equipment_movements", [
+        create_employee_table,
+        create_equipment_table,
+        create_equipment_movement_table,
+    ]),
+    (2, "Індекси для частих запитів та унікальний telegram_id працівника", [
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'employees_telegram_id_key') THEN
+                ALTER TABLE employees ADD CONSTRAINT employees_telegram_id_key UNIQUE (telegram_id);
+            END IF;
+        END
+        $$;
+        """,
+        "CREATE INDEX IF NOT EXISTS equipment_responsible_person_id_idx ON equipment (responsible_person_id);",
+        "CREATE INDEX IF NOT EXISTS equipment_status_idx ON equipment (status);",
+        "CREATE INDEX IF NOT EXISTS equipment_movements_equipment_id_date_idx "
+        "ON equipment_movements (equipment_id, movement_date);",
+        "CREATE INDEX IF NOT EXISTS equipment_movements_date_id_idx ON equipment_movements (movement_date, id);",
+    ]),
+    (3, "Триграмний індекс для пошуку обладнання за назвою та описом", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+        "CREATE INDEX IF NOT EXISTS equipment_search_trgm_idx "
+        "ON equipment USING GIN ((name || ' ' || coalesce(description, '')) gin_trgm_ops);",
+    ]),
+    (4, "Зведення кількості обладнання за локацією та статусом, що підтримується тригерами", [
+        create_equipment_occupancy_table,
+        create_equipment_occupancy_functions,
+        create_equipment_occupancy_triggers,
+        "DELETE FROM equipment_occupancy;",
+        "INSERT INTO equipment_occupancy (location, status, item_count) "
+        "SELECT location, status, COUNT(*) FROM equipment GROUP BY location, status;",
+    ]),
+    (5, "Бронювання обладнання на проміжки часу без перетинів", [
+        "CREATE EXTENSION IF NOT EXISTS btree_gist;",
+        create_equipment_reservations_table,
+        "CREATE INDEX IF NOT EXISTS equipment_reservations_employee_id_end_idx "
+        "ON equipment_reservations (employee_id, upper(period));",
+    ]),
+    (6, "Черга сповіщень відповідальних працівників про переміщення та зміну статусу обладнання", [
+        create_notification_events_table,
+        "CREATE INDEX IF NOT EXISTS notification_events_recipient_equipment_idx "
+        "ON notification_events (recipient_telegram_id, equipment_id, created_at);",
+    ]),
+    (7, "Помісячне секціонування equipment_movements та денне зведення рухів обладнання", [
+        "ALTER TABLE equipment_movements RENAME TO equipment_movements_legacy;",
+        "ALTER INDEX IF EXISTS equipment_movements_pkey RENAME TO equipment_movements_legacy_pkey;",
+        "ALTER INDEX IF EXISTS equipment_movements_equipment_id_date_idx "
+        "RENAME TO equipment_movements_legacy_equipment_id_date_idx;",
+        "ALTER INDEX IF EXISTS equipment_movements_date_id_idx RENAME TO equipment_movements_legacy_date_id_idx;",
+        create_partitioned_equipment_movement_table,
+        create_equipment_movement_partitions_function,
+        "SELECT create_equipment_movement_partitions("
+        "COALESCE((SELECT MIN(movement_date) FROM equipment_movements_legacy), CURRENT_TIMESTAMP), "
+        "CURRENT_TIMESTAMP + INTERVAL '3 months');",
+        # Рухи без дати (до цієї міграції стовпець допускав NULL) потрапляють у секцію за замовчуванням
+        "INSERT INTO equipment_movements (id, equipment_id, from_location, to_location, movement_date) "
+        "SELECT id, equipment_id, from_location, to_location, COALESCE(movement_date, 'epoch') "
+        "FROM equipment_movements_legacy;",
+        "ALTER SEQUENCE equipment_movements_id_seq OWNED BY equipment_movements.id;",
+        "DROP TABLE equipment_movements_legacy;",
+        "CREATE INDEX equipment_movements_equipment_id_date_idx ON equipment_movements (equipment_id, movement_date);",
+        "CREATE INDEX equipment_movements_date_id_idx ON equipment_movements (movement_date, id);",
+        create_equipment_movement_daily_table,
+        "CREATE INDEX IF NOT EXISTS equipment_movement_daily_equipment_id_day_idx "
+        "ON equipment_movement_daily (equipment_id, day);",
+        "DELETE FROM equipment_movement_daily;",
+        fill_equipment_movement_daily_query,
+        create_equipment_movement_daily_trigger,
+    ]),
+    (8, "Перенесення рядків із секції за замовчуванням equipment_movements у власні місячні секції", [
+        create_equipment_movement_partition_function,
+        create_equipment_movement_partitions_from_default_function,
+        "SELECT create_equipment_movement_partitions_from_default();",
+    ]),
+]
+
+
+async def run_migrations(conn) -> list:
+    """
+    Застосовує всі ще не застосовані міграції, кожну у власній транзакції.
+
+    :param conn: Підключення asyncpg.
+    :return: Список версій міграцій, застосованих під час цього виклику.
+    """
+    # Таблиця створюється вже під блокуванням: одночасне CREATE TABLE IF NOT EXISTS з іншого процесу
+    # на порожній базі може завершитись помилкою унікальності
+    await conn.execute("SELECT pg_advisory_lock($1);", MIGRATIONS_LOCK_ID)
+    applied_now = []
+    try:
+        await conn.execute(create_schema_migrations_table)
+        applied = {row['version'] for row in await conn.fetch(get_applied_migrations_query)}
+        for version, description, statements in MIGRATIONS:
+            if version in applied:
+                continue
+            async with conn.transaction():
+                for statement in statements:
+                    await conn.execute(statement)
+                await conn.execute(insert_applied_migration_query, version, description)
+            applied_now.append(version)
+            print(f"Міграцію {version} застосовано: {description}")
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1);", MIGRATIONS_LOCK_ID)
+    return applied_now
+
+
+async def print_migrations_status(conn):
+    """
+    Виводить список міграцій та позначає, які з них вже застосовано.
+
+    :param conn: Підключення asyncpg.
+    """
+    await conn.execute(create_schema_migrations_table)
+    applied = {row['version']: row['applied_at'] for row in await conn.fetch(get_applied_migrations_query)}
+    for version, description, _ in MIGRATIONS:
+        state = f"застосовано {applied[version]}" if version in applied else "не застосовано"
+        print(f"{version:>4}  {state:<45}  {description}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Міграції схеми бази даних бота обліку обладнання")
+    parser.add_argument("command", nargs="?", choices=("migrate", "status"), default="migrate",
+                        help="migrate - застосувати нові міграції, status - показати стан міграцій")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(user=DB_USER, password=DB_PASSWORD, database=DB_NAME, host=DB_HOST)
+    try:
+        if args.command == "status":
+            await print_migrations_status(conn)
+        else:
+            applied_now = await run_migrations(conn)
+            if not applied_now:
+                print("Схема бази даних актуальна.")
+    finally:
+        await conn.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -2,6 +2,9 @@ from datetime import datetime
 
 # Модель для працівників
 class Employee:
+    __slots__ = ("id", "telegram_id", "telegram_username", "first_name", "last_name", "role", "contact_number",
+                 "email", "location")
+
     def __init__(self, id: int, telegram_id: int, telegram_username: str, first_name: str, last_name: str,
                  role: str, contact_number: str, email: str, location: str):
         """
@@ -27,6 +30,30 @@ class Employee:
         self.email = email
         self.location = location
 
+    @classmethod
+    def from_record(cls, row, offset: int = 0):
+        """
+        Швидке створення працівника з рядка запиту за позиціями колонок.
+
+        :param row: Рядок asyncpg Record (або кортеж) з колонками в порядку полів конструктора.
+        :param offset: Позиція першої колонки працівника в рядку (для запитів з JOIN).
+        :return: Об'єкт Employee.
+        """
+        return cls(row[offset], row[offset + 1], row[offset + 2], row[offset + 3], row[offset + 4],
+                   row[offset + 5], row[offset + 6], row[offset + 7], row[offset + 8])
+
+    def _key(self):
+        return (self.id, self.telegram_id, self.telegram_username, self.first_name, self.last_name, self.role,
+                self.contact_number, self.email, self.location)
+
+    def __eq__(self, other):
+        if not isinstance(other, Employee):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
     def __repr__(self):
         """
         Представлення об'єкта працівника у вигляді рядка.
@@ -40,6 +67,8 @@ class Employee:
 
 # Модель для обладнання
 class Equipment:
+    __slots__ = ("id", "name", "description", "location", "status", "responsible_person_id")
+
     def __init__(self, id: int, name: str, description: str, location: str, status: str, responsible_person_id: int):
         """
         Ініціалізація об'єкта обладнання.
@@ -58,6 +87,40 @@ class Equipment:
         self.status = status
         self.responsible_person_id = responsible_person_id
 
+    @classmethod
+    def from_record(cls, row, offset: int = 0):
+        """
+        Швидке створення обладнання з рядка запиту за позиціями колонок.
+
+        :param row: Рядок asyncpg Record (або кортеж) з колонками в порядку полів конструктора.
+        :param offset: Позиція першої колонки обладнання в рядку (для запитів з JOIN).
+        :return: Об'єкт Equipment.
+        """
+        return cls(row[offset], row[offset + 1], row[offset + 2], row[offset + 3], row[offset + 4],
+                   row[offset + 5])
+
+    def replace(self, **changes):
+        """
+        Створює копію обладнання зі зміненими полями.
+
+        :param changes: Нові значення полів (наприклад, location або status).
+        :return: Новий об'єкт Equipment.
+        """
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return Equipment(**fields)
+
+    def _key(self):
+        return self.id, self.name, self.description, self.location, self.status, self.responsible_person_id
+
+    def __eq__(self, other):
+        if not isinstance(other, Equipment):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
     def __repr__(self):
         """
         Представлення об'єкта обладнання у вигляді рядка.
@@ -70,6 +133,8 @@ class Equipment:
 
 # Модель для переміщень обладнання
 class EquipmentMovement:
+    __slots__ = ("id", "equipment_id", "from_location", "to_location", "movement_date")
+
     def __init__(self, equipment_id: int, from_location: str, to_location: str, movement_date: datetime, id: int = None):
         """
         Ініціалізація об'єкта для переміщення обладнання.
@@ -86,6 +151,29 @@ class EquipmentMovement:
         self.to_location = to_location
         self.movement_date = movement_date
 
+    @classmethod
+    def from_record(cls, row, offset: int = 0):
+        """
+        Швидке створення переміщення з рядка запиту за позиціями колонок.
+
+        :param row: Рядок asyncpg Record (або кортеж) з колонками id, equipment_id, from_location, to_location,
+                    movement_date.
+        :param offset: Позиція першої колонки переміщення в рядку.
+        :return: Об'єкт EquipmentMovement.
+        """
+        return cls(row[offset + 1], row[offset + 2], row[offset + 3], row[offset + 4], row[offset])
+
+    def _key(self):
+        return self.id, self.equipment_id, self.from_location, self.to_location, self.movement_date
+
+    def __eq__(self, other):
+        if not isinstance(other, EquipmentMovement):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
     def __repr__(self):
         """
         Представлення об'єкта переміщення обладнання у вигляді рядка.
@@ -94,3 +182,54 @@ class EquipmentMovement:
         """
         return f"EquipmentMovement(id={self.id}, equipment_id={self.equipment_id}, from_location={self.from_location}, " \
                f"to_location={self.to_location}, movement_date={self.movement_date})"
+
+
+class Reservation:
+    __slots__ = ("id", "equipment_id", "employee_id", "starts_at", "ends_at")
+
+    def __init__(self, equipment_id: int, employee_id: int, starts_at: datetime, ends_at: datetime, id: int = None):
+        """
+        Ініціалізація об'єкта бронювання обладнання.
+
+        :param id: Унікальний ідентифікатор бронювання.
+        :param equipment_id: Ідентифікатор заброньованого обладнання.
+        :param employee_id: Ідентифікатор працівника, який забронював обладнання.
+        :param starts_at: Початок бронювання (включно).
+        :param ends_at: Кінець бронювання (не включно).
+        """
+        self.id = id
+        self.equipment_id = equipment_id
+        self.employee_id = employee_id
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+
+    @classmethod
+    def from_record(cls, row, offset: int = 0):
+        """
+        Швидке створення бронювання з рядка запиту за позиціями колонок.
+
+        :param row: Рядок asyncpg Record (або кортеж) з колонками id, equipment_id, employee_id, starts_at, ends_at.
+        :param offset: Позиція першої колонки бронювання в рядку.
+        :return: Об'єкт Reservation.
+        """
+        return cls(row[offset + 1], row[offset + 2], row[offset + 3], row[offset + 4], row[offset])
+
+    def _key(self):
+        return self.id, self.equipment_id, self.employee_id, self.starts_at, self.ends_at
+
+    def __eq__(self, other):
+        if not isinstance(other, Reservation):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        """
+        Представлення об'єкта бронювання у вигляді рядка.
+
+        :return: Рядок, що містить усі атрибути бронювання.
+        """
+        return f"Reservation(id={self.id}, equipment_id={self.equipment_id}, employee_id={self.employee_id}, " \
+               f"starts_at={self.starts_at}, ends_at={self.ends_at})"
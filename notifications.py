@@ -0,0 +1,170 @@
+import asyncio
+
+from telegram.error import BadRequest, Forbidden, TelegramError
+
+# Види змін обладнання в черзі сповіщень
+NOTIFY_LOCATION = "location"
+NOTIFY_STATUS = "status"
+
+# Максимальна довжина одного повідомлення Telegram (символів)
+MESSAGE_LIMIT = 4096
+
+
+def format_notifications(events) -> list:
+    """
+    Формує повідомлення для одного отримувача з усіх його подій.
+
+    Кілька змін того самого обладнання об'єднуються: для кожного виду зміни показується лише останнє значення.
+
+    :param events: Записи подій одного отримувача (з колонками id, equipment_id, equipment_name, kind, new_value,
+                   created_at).
+    :return: Список пар (текст повідомлення не довший за MESSAGE_LIMIT, список ID подій, які він охоплює).
+    """
+    changes_by_equipment = {}
+    for event in sorted(events, key=lambda event: (event['created_at'], event['id'])):
+        name, changes, event_ids = changes_by_equipment.setdefault(event['equipment_id'],
+                                                                   (event['equipment_name'], {}, []))
+        changes[event['kind']] = event['new_value']
+        event_ids.append(event['id'])
+
+    blocks = []
+    for equipment_id, (name, changes, event_ids) in changes_by_equipment.items():
+        block = f"{name} (ID {equipment_id})"
+        if NOTIFY_LOCATION in changes:
+            block += f"\nПереміщено на {changes[NOTIFY_LOCATION]}"
+        if NOTIFY_STATUS in changes:
+            block += f"\nСтатус: {changes[NOTIFY_STATUS]}"
+        blocks.append((block, event_ids))
+
+    # Блоки обладнання не розриваються між повідомленнями
+    header = "Зміни обладнання, за яке ви відповідаєте\n\n"
+    messages = []
+    message, message_event_ids = header, []
+    for block, event_ids in blocks:
+        if message != header and len(message) + len(block) + 2 > MESSAGE_LIMIT:
+            messages.append((message.rstrip(), message_event_ids))
+            message, message_event_ids = header, []
+        message += block + "\n\n"
+        message_event_ids += event_ids
+    messages.append((message.rstrip(), message_event_ids))
+    return messages
+
+
+# Фоновий обробник черги сповіщень: періодично захоплює зі сховища події, чиє вікно об'єднання минуло,
+# групує їх за отримувачем і надсилає через бота (ліміти Bot API застосовує обмежувач запитів бота).
+# Події видаляються після надсилання повідомлення, що їх охоплює, тож повтор після збою чи перезапуску
+# (після закінчення оренди) надсилає лише ще не доставлені повідомлення.
+class NotificationWorker:
+    def __init__(self, bot, storage, coalesce_window: float, poll_interval: float, batch_size: int,
+                 send_concurrency: int, lease: float, max_attempts: int):
+        """
+        Ініціалізація обробника черги сповіщень.
+
+        :param bot: Об'єкт telegram.Bot, через який надсилаються повідомлення.
+        :param storage: Сховище даних (storage.Storage), у якому зберігається черга сповіщень.
+        :param coalesce_window: Секунди очікування після першої зміни обладнання для об'єднання наступних змін.
+        :param poll_interval: Секунди між перевірками черги, коли вона порожня.
+        :param batch_size: Максимальна кількість груп (отримувач, обладнання) за одну перевірку.
+        :param send_concurrency: Максимальна кількість одночасних надсилань.
+        :param lease: Секунди, на які захоплюються події; після цього незавершене надсилання повторюється.
+        :param max_attempts: Максимальна кількість спроб надіслати подію.
+        """
+        self.bot = bot
+        self.storage = storage
+        self.coalesce_window = coalesce_window
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.send_concurrency = send_concurrency
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._task = None
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def start(self):
+        """
+        Запускає обробник у фоновій задачі поточного циклу подій.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Зупиняє фонову задачу; захоплені, але не надіслані події залишаються в черзі.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                groups = await self.process_once()
+            except Exception as e:
+                print(f"Помилка при обробці черги сповіщень: {e}")
+                groups = 0
+            # Повна партія означає, що в черзі є ще події - перевіряємо одразу
+            if groups < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def process_once(self) -> int:
+        """
+        Захоплює одну партію подій і надсилає по одній групі повідомлень кожному отримувачу.
+
+        :return: Кількість оброблених груп (отримувач, обладнання).
+        """
+        events = await self.storage.claim_notification_events(self.coalesce_window, self.batch_size, self.lease, self.max_attempts)
+        if not events:
+            return 0
+
+        events_by_recipient = {}
+        for event in events:
+            events_by_recipient.setdefault(event['recipient_telegram_id'], []).append(event)
+
+        semaphore = asyncio.Semaphore(self.send_concurrency)
+        # Збій одного отримувача не перериває очікування надсилань іншим
+        results = await asyncio.gather(*(self._send(semaphore, recipient, recipient_events)
+                                         for recipient, recipient_events in events_by_recipient.items()),
+                                       return_exceptions=True)
+        for recipient, result in zip(events_by_recipient, results):
+            if isinstance(result, Exception):
+                print(f"Помилка при надсиланні сповіщень для {recipient}: {result}")
+        return len({(event['recipient_telegram_id'], event['equipment_id']) for event in events})
+
+    async def _send(self, semaphore, recipient: int, events: list):
+        async with semaphore:
+            messages = format_notifications(events)
+            for index, (message, event_ids) in enumerate(messages):
+                try:
+                    await self.bot.send_message(recipient, message)
+                except (Forbidden, BadRequest) as e:
+                    # Користувач заблокував бота або чат недоступний - повтор не допоможе
+                    print(f"Сповіщення для {recipient} відкинуто: {e}")
+                    event_ids = [event_id for _, ids in messages[index:] for event_id in ids]
+                    self.dropped += len(event_ids)
+                    await self.storage.delete_notification_events(event_ids)
+                    return
+                except TelegramError as e:
+                    print(f"Не вдалося надіслати сповіщення для {recipient}, буде повтор: {e}")
+                    self.failed += sum(len(ids) for _, ids in messages[index:])
+                    return
+                self.sent += len(event_ids)
+                # Видаляємо одразу, щоб повтор після наступного збою не надіслав це повідомлення ще раз
+                await self.storage.delete_notification_events(event_ids)
+
+    def stats(self) -> dict:
+        """
+        Повертає лічильники роботи обробника.
+
+        :return: Словник із кількістю надісланих, відкинутих та відкладених для повтору подій.
+        """
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+# Методи Bot API, що не надсилають повідомлень і тому не обмежуються
+UNLIMITED_ENDPOINTS = {"answerCallbackQuery", "answerInlineQuery", "getMe", "getUpdates",
+                       "setWebhook", "deleteWebhook", "getWebhookInfo"}
+
+
+# Обмежувач вихідних запитів до Bot API: глобальний ліміт на бота, ліміт на окремий чат та повтори після RetryAfter.
+# Запити чекають своєї черги на блокуваннях у порядку надходження, тож сплеск запитів одного чату
+# не затримує інші чати, а порядок повідомлень у межах чату зберігається.
+class ChatRateLimiter(BaseRateLimiter):
+    def __init__(self, global_rate: float, per_chat_interval: float, max_retries: int):
+        """
+        Ініціалізація обмежувача.
+
+        :param global_rate: Максимальна кількість запитів на секунду для всього бота.
+        :param per_chat_interval: Мінімальний інтервал між запитами в один чат (секунди).
+        :param max_retries: Кількість повторів запиту після відповіді RetryAfter.
+        """
+        self.global_interval = 1 / global_rate
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self._global_lock = asyncio.Lock()
+        self._global_next = 0.0
+        self._chat_locks = {}
+        self._chat_next = {}
+        self.retries = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chat_locks.clear()
+        self._chat_next.clear()
+
+    async def _wait_global_slot(self):
+        # Черга за глобальним лімітом: кожен запит займає наступний вільний інтервал
+        loop = asyncio.get_running_loop()
+        async with self._global_lock:
+            now = loop.time()
+            delay = self._global_next - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._global_next = max(now, self._global_next) + self.global_interval
+
+    async def _wait_chat_slot(self, chat_id):
+        loop = asyncio.get_running_loop()
+        delay = self._chat_next.get(chat_id, 0.0) - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._chat_next[chat_id] = loop.time() + self.per_chat_interval
+
+    def _chat_lock(self, chat_id):
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            # Прибираємо записи неактивних чатів, щоб словники не росли безмежно
+            if len(self._chat_locks) > 10000:
+                now = asyncio.get_running_loop().time()
+                for stale_id in [key for key, value in self._chat_locks.items()
+                                 if not value.locked() and self._chat_next.get(key, 0.0) < now]:
+                    del self._chat_locks[stale_id]
+                    self._chat_next.pop(stale_id, None)
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        return lock
+
+    async def _call_with_retries(self, callback, args, kwargs):
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await self._wait_global_slot()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                self.retries += 1
+                print(f"Telegram просить зачекати {retry_after} с, повтор {attempt + 1}/{self.max_retries}")
+                # Обмеження від Telegram стосується всього бота, тому зсуваємо глобальну чергу
+                self._global_next = max(self._global_next, loop.time() + retry_after)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        if endpoint in UNLIMITED_ENDPOINTS:
+            return await callback(*args, **kwargs)
+
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return await self._call_with_retries(callback, args, kwargs)
+
+        async with self._chat_lock(chat_id):
+            await self._wait_chat_slot(chat_id)
+            return await self._call_with_retries(callback, args, kwargs)
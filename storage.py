@@ -0,0 +1,379 @@
+from abc import ABC, abstractmethod
+
+import db_manager
+from config import RUN_MIGRATIONS_ON_STARTUP
+from config import MOVEMENTS_PAGE_SIZE
+
+
+# Інтерфейс сховища даних бота: обробники працюють лише з ним, тож реалізацію (PostgreSQL або пам'ять)
+# можна обрати в config.py (STORAGE_BACKEND). Збої реалізації повідомляються помилками з errors.py.
+# Обов'язкові методи абстрактні, тож реалізація без когось із них не створиться взагалі.
+class Storage(ABC):
+    async def start(self):
+        """
+        Готує сховище до роботи (викликається один раз під час запуску бота).
+        """
+
+    async def stop(self):
+        """
+        Звільняє ресурси сховища (викликається під час зупинки бота).
+        """
+
+    def stats(self) -> dict:
+        """
+        Повертає стан сховища для /stats.
+
+        :return: Словник {назва розділу: словник показників}.
+        """
+        return {}
+
+    @abstractmethod
+    async def get_employee_by_telegram_id(self, telegram_id: int):
+        """
+        Отримує працівника за його Telegram ID.
+
+        :param telegram_id: ID користувача в Telegram.
+        :return: Запис працівника з ключем 'id', або None, якщо користувач не є працівником.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_equipment(self):
+        """
+        Отримує все обладнання.
+
+        :return: Список об'єктів Equipment у порядку id.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_available_equipment(self, starts_at=None, ends_at=None):
+        """
+        Отримує доступне обладнання: без проміжку часу - зі статусом 'Доступний',
+        з проміжком - без бронювань, що перетинаються з [starts_at, ends_at).
+
+        :param starts_at: Початок проміжку (datetime з часовим поясом), або None.
+        :param ends_at: Кінець проміжку (не включно), або None.
+        :return: Список об'єктів Equipment у порядку id.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_responsible_employee_for_equipment(self, equipment_id: int):
+        """
+        Отримує працівника, відповідального за обладнання.
+
+        :param equipment_id: ID обладнання.
+        :return: Об'єкт Employee, або None, якщо обладнання не знайдено чи відповідального не призначено.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_equipment_with_responsible(self, only_available: bool = False):
+        """
+        Отримує обладнання разом із відповідальними працівниками.
+
+        :param only_available: Якщо True, повертає лише обладнання зі статусом 'Доступний'.
+        :return: Список кортежів (Equipment, Employee або None) у порядку id.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def search_equipment(self, text: str, only_available: bool = False):
+        """
+        Шукає обладнання за назвою та описом.
+
+        :param text: Текст запиту.
+        :param only_available: Якщо True, шукає лише обладнання зі статусом 'Доступний'.
+        :return: Список кортежів (Equipment, Employee або None), найбільш схожі спочатку.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_equipment_location(self, equipment_id: int, new_location: str):
+        """
+        Оновлює місцезнаходження обладнання без запису руху.
+
+        :param equipment_id: ID обладнання.
+        :param new_location: Нове місцезнаходження обладнання.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def insert_equipment_movement(self, equipment_movement):
+        """
+        Додає запис про переміщення обладнання.
+
+        :param equipment_movement: Об'єкт EquipmentMovement (movement_date None - поточний час).
+        :return: ID нового запису.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def relocate_equipment(self, equipment_id: int, new_location: str):
+        """
+        Атомарно переміщує обладнання на нову локацію та записує рух обладнання.
+
+        :param equipment_id: ID обладнання.
+        :param new_location: Нове місцезнаходження обладнання.
+        :return: ID нового запису про переміщення, або None, якщо обладнання не знайдено.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_equipment_by_id(self, equipment_id: int):
+        """
+        Отримує обладнання за ID.
+
+        :param equipment_id: ID обладнання.
+        :return: Об'єкт Equipment, або None, якщо не знайдено.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_equipment_movements(self, date_from=None, date_to=None, equipment_id: int = None,
+                                 location: str = None):
+        """
+        Потоково повертає рухи обладнання з необов'язковими фільтрами.
+
+        :param date_from: Початок періоду (включно), або None.
+        :param date_to: Кінець періоду (не включно), або None.
+        :param equipment_id: ID обладнання, або None для всього обладнання.
+        :param location: Локація, з якої або до якої переміщено обладнання, або None.
+        :return: Асинхронний генератор пар (EquipmentMovement, назва обладнання) у порядку дати переміщення.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_equipment_movements(self):
+        """
+        Отримує всі записи про рухи обладнання.
+
+        :return: Список об'єктів EquipmentMovement у порядку id.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_equipment_movements_page(self, older_than: tuple = None, newer_than: tuple = None,
+                                           page_size: int = MOVEMENTS_PAGE_SIZE):
+        """
+        Отримує одну сторінку рухів обладнання (від найновіших до найстаріших) разом із назвами обладнання.
+
+        :param older_than: Курсор (movement_date, id) - повернути рухи, старші за нього.
+        :param newer_than: Курсор (movement_date, id) - повернути рухи, новіші за нього.
+        :param page_size: Кількість рухів на сторінці.
+        :return: Кортеж (список пар (EquipmentMovement, назва обладнання), чи є ще записи в напрямку гортання).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_equipment_status(self, equipment_id: int, new_status: str):
+        """
+        Оновлює статус обладнання.
+
+        :param equipment_id: ID обладнання.
+        :param new_status: Новий статус.
+        :return: True, якщо статус оновлено, або False, якщо обладнання не знайдено.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_upsert_employees(self, records: list):
+        """
+        Масово додає або оновлює працівників (за telegram_id).
+
+        :param records: Список кортежів (номер рядка, telegram_id, telegram_username, first_name, last_name, role,
+                        contact_number, email, location).
+        :return: Кількість імпортованих працівників.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def bulk_upsert_equipment(self, records: list):
+        """
+        Масово додає або оновлює обладнання; рядки з невідомим відповідальним пропускаються.
+
+        :param records: Список кортежів (номер рядка, id або None, name, description, location, status,
+                        telegram_id відповідального або None).
+        :return: Кортеж (кількість імпортованого обладнання, список пар (номер рядка, текст помилки)).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def relocate_equipment_bulk(self, equipment_ids: list, new_location: str):
+        """
+        Атомарно переміщує кілька одиниць обладнання на нову локацію та записує рухи.
+
+        :param equipment_ids: Список ID обладнання.
+        :param new_location: Нове місцезнаходження обладнання.
+        :return: Список ID переміщеного обладнання (без того, що вже було на цій локації).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_equipment_status_bulk(self, equipment_ids: list, new_status: str):
+        """
+        Оновлює статус кількох одиниць обладнання.
+
+        :param equipment_ids: Список ID обладнання.
+        :param new_status: Новий статус.
+        :return: Список ID оновленого обладнання.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_equipment_occupancy(self):
+        """
+        Отримує кількість обладнання в кожній локації за статусами.
+
+        :return: Словник {локація: {статус: кількість}}.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def create_reservation(self, equipment_id: int, employee_id: int, starts_at, ends_at):
+        """
+        Бронює обладнання на проміжок часу [starts_at, ends_at).
+
+        :param equipment_id: ID обладнання.
+        :param employee_id: ID працівника, який бронює обладнання.
+        :param starts_at: Початок бронювання (datetime з часовим поясом).
+        :param ends_at: Кінець бронювання (не включно).
+        :return: ID нового бронювання.
+        :raises ConflictError: Якщо проміжок перетинається з іншим бронюванням цього обладнання.
+        :raises NotFoundError: Якщо обладнання (або працівника) не існує.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_conflicting_reservations(self, equipment_id: int, starts_at, ends_at):
+        """
+        Отримує бронювання обладнання, що перетинаються з проміжком [starts_at, ends_at).
+
+        :param equipment_id: ID обладнання.
+        :param starts_at: Початок проміжку.
+        :param ends_at: Кінець проміжку (не включно).
+        :return: Список об'єктів Reservation за часом початку.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_employee_reservations(self, employee_id: int):
+        """
+        Отримує поточні та майбутні бронювання працівника разом із назвами обладнання.
+
+        :param employee_id: ID працівника.
+        :return: Список пар (Reservation, назва обладнання) за часом початку.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def cancel_reservation(self, reservation_id: int, employee_id: int):
+        """
+        Скасовує бронювання працівника.
+
+        :param reservation_id: ID бронювання.
+        :param employee_id: ID працівника (скасувати можна лише власне бронювання).
+        :return: True, якщо бронювання скасовано, або False, якщо його вже немає.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def enqueue_equipment_notifications(self, equipment_ids: list, kind: str, new_value: str,
+                                              actor_telegram_id: int = None):
+        """
+        Додає до черги сповіщення відповідальним працівникам про зміну обладнання.
+
+        :param equipment_ids: Список ID зміненого обладнання.
+        :param kind: Вид зміни ('location' або 'status').
+        :param new_value: Нова локація або новий статус.
+        :param actor_telegram_id: Telegram ID працівника, який зробив зміну (його не сповіщаємо), або None.
+        :return: Кількість доданих подій.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim_notification_events(self, coalesce_window: float, max_groups: int, lease: float,
+                                        max_attempts: int):
+        """
+        Захоплює події сповіщень, готові до надсилання, на час оренди; події, що вичерпали спроби, видаляються.
+
+        :param coalesce_window: Скільки секунд чекати після першої зміни, щоб об'єднати наступні зміни.
+        :param max_groups: Максимальна кількість груп (отримувач, обладнання) за один виклик.
+        :param lease: Тривалість оренди захоплених подій у секундах.
+        :param max_attempts: Максимальна кількість спроб надіслати подію.
+        :return: Список подій з ключами id, recipient_telegram_id, equipment_id, equipment_name, kind, new_value,
+                 created_at.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def delete_notification_events(self, event_ids: list):
+        """
+        Видаляє з черги надіслані (або більше не потрібні) події сповіщень.
+
+        :param event_ids: Список ID подій.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_movement_report(self, date_from, date_to, top_equipment: int):
+        """
+        Формує звіт про рухи обладнання за період.
+
+        :param date_from: Перший день періоду (UTC, включно).
+        :param date_to: Останній день періоду (UTC, включно).
+        :param top_equipment: Скільки найчастіше переміщуваних одиниць обладнання повернути.
+        :return: Кортеж (список (локація, прибуття, відбуття), список (ID обладнання, назва, кількість переміщень)).
+        """
+        raise NotImplementedError
+
+
+# Сховище в PostgreSQL: операції виконують функції db_manager (пул підключень, кеші, повтори та запобіжник)
+class PostgresStorage(Storage):
+    async def start(self):
+        await db_manager.init_pool()
+        if RUN_MIGRATIONS_ON_STARTUP:
+            await db_manager.apply_migrations()
+        await db_manager.start_catalogue_listener()
+        db_manager.start_partition_maintenance()
+
+    async def stop(self):
+        await db_manager.stop_catalogue_listener()
+        await db_manager.stop_partition_maintenance()
+        await db_manager.close_pool()
+
+    def stats(self) -> dict:
+        return {
+            "Кеш працівників": db_manager.employee_cache.stats(),
+            "Кеш каталогу": db_manager.equipment_catalogue.stats(),
+            "Запобіжник БД": db_manager.db_circuit.stats(),
+        }
+
+    get_employee_by_telegram_id = staticmethod(db_manager.get_employee_by_telegram_id)
+    get_all_equipment = staticmethod(db_manager.get_all_equipment)
+    get_available_equipment = staticmethod(db_manager.get_available_equipment)
+    get_responsible_employee_for_equipment = staticmethod(db_manager.get_responsible_employee_for_equipment)
+    get_equipment_with_responsible = staticmethod(db_manager.get_equipment_with_responsible)
+    search_equipment = staticmethod(db_manager.search_equipment)
+    update_equipment_location = staticmethod(db_manager.update_equipment_location)
+    insert_equipment_movement = staticmethod(db_manager.insert_equipment_movement)
+    relocate_equipment = staticmethod(db_manager.relocate_equipment)
+    get_equipment_by_id = staticmethod(db_manager.get_equipment_by_id)
+    iter_equipment_movements = staticmethod(db_manager.iter_equipment_movements)
+    get_all_equipment_movements = staticmethod(db_manager.get_all_equipment_movements)
+    get_equipment_movements_page = staticmethod(db_manager.get_equipment_movements_page)
+    update_equipment_status = staticmethod(db_manager.update_equipment_status)
+    bulk_upsert_employees = staticmethod(db_manager.bulk_upsert_employees)
+    bulk_upsert_equipment = staticmethod(db_manager.bulk_upsert_equipment)
+    relocate_equipment_bulk = staticmethod(db_manager.relocate_equipment_bulk)
+    update_equipment_status_bulk = staticmethod(db_manager.update_equipment_status_bulk)
+    get_equipment_occupancy = staticmethod(db_manager.get_equipment_occupancy)
+    create_reservation = staticmethod(db_manager.create_reservation)
+    get_conflicting_reservations = staticmethod(db_manager.get_conflicting_reservations)
+    get_employee_reservations = staticmethod(db_manager.get_employee_reservations)
+    cancel_reservation = staticmethod(db_manager.cancel_reservation)
+    enqueue_equipment_notifications = staticmethod(db_manager.enqueue_equipment_notifications)
+    claim_notification_events = staticmethod(db_manager.claim_notification_events)
+    delete_notification_events = staticmethod(db_manager.delete_notification_events)
+    get_movement_report = staticmethod(db_manager.get_movement_report)
@@ -0,0 +1,65 @@
+import asyncio
+
+from telegram.ext import BaseUpdateProcessor
+
+
+# Паралельна обробка оновлень з обмеженням кількості та збереженням порядку в межах одного чату.
+# Оновлення різних чатів обробляються одночасно (не більше max_concurrent_updates), а оновлення
+# одного чату чекають одне на одне в порядку надходження. Оновлення, що чекає на попереднє оновлення
+# свого чату, не займає місця в ліміті, тож активний чат не затримує обробку інших чатів.
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int):
+        """
+        Ініціалізація обробника оновлень.
+
+        :param max_concurrent_updates: Максимальна кількість оновлень, що обробляються одночасно
+                                       (оновлення, що чекають на свій чат, не враховуються).
+        """
+        super().__init__(max_concurrent_updates)
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._chat_locks = {}
+        self._chat_waiters = {}
+
+    @staticmethod
+    def _chat_key(update):
+        # Оновлення без чату (наприклад, inline-запити) впорядковуються за користувачем
+        chat = getattr(update, "effective_chat", None)
+        if chat is not None:
+            return "chat", chat.id
+        user = getattr(update, "effective_user", None)
+        if user is not None:
+            return "user", user.id
+        return None
+
+    async def process_update(self, update, coroutine) -> None:
+        # Базовий клас займає місце в ліміті ще до виклику do_process_update, тобто й на час очікування
+        # блокування чату; тому спершу чекаємо на свій чат, а місце в ліміті займаємо лише після цього
+        key = self._chat_key(update)
+        if key is None:
+            async with self._slots:
+                await self.do_process_update(update, coroutine)
+            return
+
+        lock = self._chat_locks.get(key)
+        if lock is None:
+            lock = self._chat_locks[key] = asyncio.Lock()
+        self._chat_waiters[key] = self._chat_waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                async with self._slots:
+                    await self.do_process_update(update, coroutine)
+        finally:
+            # Прибираємо блокування чату, на яке більше ніхто не чекає
+            self._chat_waiters[key] -= 1
+            if not self._chat_waiters[key]:
+                del self._chat_waiters[key]
+                del self._chat_locks[key]
+
+    async def do_process_update(self, update, coroutine) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass